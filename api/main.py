@@ -53,11 +53,14 @@ async def get_ads(
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
     limit: int = 50,
+    source: str = "berkat.ru",
     db: AsyncSession = Depends(lambda: async_session())
 ):
     """Получить список авто с фильтрами"""
     # Здесь нужно адаптировать ваш CRUD-метод под запросы из мобильного приложения
-    ads = await get_ads_by_filters(db, brand=brand, min_price=min_price, max_price=max_price, limit=limit)
+    ads = await get_ads_by_filters(
+        db, brand=brand, min_price=min_price, max_price=max_price, limit=limit, source=source
+    )
     return ads
 
 @app.post("/filters")
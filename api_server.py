@@ -10,6 +10,7 @@ from typing import Optional, List
 from pydantic import BaseModel, ConfigDict
 
 from app.core.config import settings
+from app.db.crud import ad_brand_clause
 from app.db.models import Ad
 
 # Настройка логирования
@@ -33,6 +34,7 @@ async_session = async_sessionmaker(engine, expire_on_commit=False)
 
 class AdResponse(BaseModel):
     id: int
+    source: str
     title: str
     price: Optional[int]
     brand: Optional[str]
@@ -52,16 +54,18 @@ async def get_ads(
     brand: Optional[str] = None,
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
-    limit: int = 50
+    limit: int = 50,
+    # Как и до появления других источников, по умолчанию — только berkat.ru
+    source: str = "berkat.ru",
 ):
-    logger.info(f"📥 GET /ads: brand={brand}, limit={limit}")
+    logger.info(f"📥 GET /ads: source={source}, brand={brand}, limit={limit}")
     
     try:
         async with async_session() as session:
-            query = select(Ad).where(Ad.source == "berkat.ru")
+            query = select(Ad).where(Ad.source == source)
             
             if brand:
-                query = query.where(Ad.brand.ilike(f"%{brand}%"))
+                query = query.where(ad_brand_clause(brand))
             if min_price is not None:
                 query = query.where(Ad.price >= min_price)
             if max_price is not None:
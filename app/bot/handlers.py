@@ -11,6 +11,7 @@ from aiogram.types import (
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 
+from app.bot.notifier import notification_dispatcher
 from app.bot.states import FilterForm
 from app.bot.keyboards import (
     skip_keyboard,
@@ -23,7 +24,10 @@ from app.db.crud import (
     get_active_filters,
     get_user_by_telegram_id,
     create_user,
+    set_user_digest,
+    unblock_user,
 )
+from app.core.config import settings
 from app.db.session import async_session
 from app.db.models import FilterSet
 from app.utils.logger import setup_logger
@@ -63,6 +67,11 @@ async def cmd_start(message: Message):
                     subscription_status="trial",
                 )
                 logger.info(f"Создан новый пользователь {user_id}")
+            elif user.blocked_at is not None:
+                # Пользователь разблокировал бота — возвращаем его фильтры
+                restored = await unblock_user(db, user)
+                notification_dispatcher.revive(user_id)
+                logger.info(f"Пользователь {user_id} вернулся, восстановлено фильтров: {restored}")
 
             welcome_text = (
                 "🚗 <b>Добро пожаловать в CarBot!</b>\n\n"
@@ -104,7 +113,8 @@ async def cmd_help(message: Message):
         "⚙️ <b>Управление фильтрами:</b>\n"
         "   • «✨ Создать фильтр» — настроить новый фильтр по шагам\n"
         "   • «📋 Мои фильтры» — посмотреть активные фильтры и управлять ими\n"
-        "   • «🗑 Удалить фильтр» — удалить фильтр по ID или названию\n\n"
+        "   • «🗑 Удалить фильтр» — удалить фильтр по ID или названию\n"
+        "   • /digest — получать совпадения одной сводкой вместо отдельных сообщений\n\n"
         "💡 <b>Советы:</b>\n"
         "   • Для максимального охвата оставляйте поля «Модель» пустыми\n"
         "   • Фильтр «Lada, цена до 500 000 ₽» найдёт ВАЗ 2107, 2114, Гранту и др.\n"
@@ -120,6 +130,29 @@ async def cmd_help(message: Message):
     )
 
 
+@router.message(Command("digest"))
+async def cmd_digest(message: Message):
+    async with async_session() as db:
+        user = await get_user_by_telegram_id(db, message.from_user.id)
+        if not user:
+            await message.answer("Сначала отправьте /start")
+            return
+        user = await set_user_digest(db, user.telegram_id, not user.digest_enabled)
+
+    minutes = int(settings.DIGEST_WINDOW // 60)
+    if user.digest_enabled:
+        text = (
+            "📰 <b>Режим сводки включён</b>\n\n"
+            f"Новые объявления будут приходить одним сообщением раз в {minutes} мин.\n"
+            "Отправьте /digest ещё раз, чтобы получать их по одному."
+        )
+    else:
+        text = "🔔 <b>Режим сводки выключен</b>\n\nКаждое объявление будет приходить отдельным сообщением."
+
+    logger.info(f"Пользователь {message.from_user.id}: дайджест {'включён' if user.digest_enabled else 'выключен'}")
+    await message.answer(text, reply_markup=get_main_menu_keyboard(), parse_mode="HTML")
+
+
 @router.message(F.text == "✨ Создать фильтр")
 async def start_new_filter(message: Message, state: FSMContext):
     cancel_kb = ReplyKeyboardMarkup(
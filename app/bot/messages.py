@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+
+def _format_number(value: int) -> str:
+    return f"{value:,}".replace(",", " ")
+
+
+def render_ad_body(ad) -> str:
+    """Часть уведомления, общая для всех получателей объявления."""
+    lines = []
+
+    if ad.brand and ad.model:
+        lines.append(f"🔹 <b>{ad.brand} {ad.model}</b>\n")
+    elif ad.title:
+        lines.append(f"🔹 <b>{ad.title}</b>\n")
+
+    if ad.year:
+        lines.append(f"📅 Год: {ad.year}\n")
+
+    if ad.price:
+        lines.append(f"💰 Цена: {_format_number(ad.price)} ₽\n")
+
+    if ad.mileage:
+        lines.append(f"🛣️ Пробег: {_format_number(ad.mileage)} км\n")
+
+    if ad.region:
+        lines.append(f"📍 Регион: {ad.region}\n")
+
+    lines.append(f"\n🔗 <a href='{ad.url}'>Посмотреть объявление</a>")
+    return "".join(lines)
+
+
+def render_header(filter_name: str) -> str:
+    return f"🚗 <b>Новое объявление по вашему фильтру: {filter_name}</b>\n\n"
+
+
+def render_digest_line(ad, filter_name: str) -> str:
+    """Строка объявления в дайджесте (или подпись к фото в альбоме)."""
+    if ad.brand and ad.model:
+        name = f"{ad.brand} {ad.model}"
+    else:
+        name = ad.title or ""
+
+    details = []
+    if ad.year:
+        details.append(f"{ad.year} г.")
+    if ad.price:
+        details.append(f"{_format_number(ad.price)} ₽")
+    if ad.mileage:
+        details.append(f"{_format_number(ad.mileage)} км")
+    if ad.region:
+        details.append(ad.region)
+
+    line = f"🔹 <b>{name}</b>"
+    if details:
+        line += " — " + ", ".join(details)
+    return line + f"\n🔗 <a href='{ad.url}'>Посмотреть</a> · фильтр «{filter_name}»"
+
+
+def render_digest_header(count: int) -> str:
+    return f"🚗 <b>Новые объявления по вашим фильтрам: {count}</b>\n\n"
+
+
+def render_digest(items: List[Tuple[object, str]]) -> str:
+    return render_digest_header(len(items)) + "\n\n".join(
+        render_digest_line(ad, filter_name) for ad, filter_name in items
+    )
+
+
+class AdMessageCache:
+    """Отрисованные тексты объявлений по id.
+
+    Текст объявления одинаков для всех получателей, поэтому рисуется один
+    раз; при отправке к нему добавляется только заголовок с именем фильтра.
+    После рассылки объявления запись удаляется через evict, max_entries
+    ограничивает кэш, если рассылка прервалась.
+    """
+
+    def __init__(self, max_entries: int = 2000) -> None:
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[int, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def body(self, ad) -> str:
+        body = self._bodies.get(ad.id)
+        if body is not None:
+            self.hits += 1
+            self._bodies.move_to_end(ad.id)
+            return body
+
+        self.misses += 1
+        body = self._bodies[ad.id] = render_ad_body(ad)
+        if len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
+        return body
+
+    def render(self, ad, filter_name: str) -> str:
+        return render_header(filter_name) + self.body(ad)
+
+    def evict(self, ad_ids: Iterable[int]) -> None:
+        for ad_id in ad_ids:
+            self._bodies.pop(ad_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._bodies)}
+
+
+ad_messages = AdMessageCache()
@@ -0,0 +1,274 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.bot.telegram_bot import is_terminal_error, send_ad_notification, send_digest_notification
+from app.core.config import settings
+from app.db.models import Ad
+
+
+logger = logging.getLogger(__name__)
+
+# Сколько записей о паузах чатов копится до очистки от прошедших
+PRUNE_MIN_ENTRIES = 1000
+
+
+class Notification(NamedTuple):
+    chat_id: int
+    ad: Ad
+    filter_id: int
+    filter_name: str
+    attempt: int = 0
+    result: Optional[asyncio.Future] = None
+    # Дайджест: (объявление, имя фильтра) для отправки одним сообщением
+    digest: Optional[List[Tuple[Ad, str]]] = None
+
+
+class TokenBucket:
+    """Ограничение частоты: не больше rate операций в секунду с запасом capacity."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class NotificationDispatcher:
+    """Очередь уведомлений с пулом отправителей: не больше NOTIFY_RATE в секунду,
+    в один чат по порядку и не чаще раза в NOTIFY_CHAT_INTERVAL секунд."""
+
+    def __init__(
+        self,
+        send: Callable[..., Awaitable[None]] = send_ad_notification,
+        send_digest: Callable[..., Awaitable[None]] = send_digest_notification,
+        on_delivered: Optional[Callable[[Notification], Awaitable[None]]] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        rate: Optional[float] = None,
+        chat_interval: Optional[float] = None,
+        max_retries: Optional[int] = None,
+    ) -> None:
+        self._send = send
+        self._send_digest = send_digest
+        self._on_delivered = on_delivered
+        self.workers = workers or settings.NOTIFY_WORKERS
+        self.queue_size = queue_size or settings.NOTIFY_QUEUE_SIZE
+        self.rate = rate or settings.NOTIFY_RATE
+        self.chat_interval = settings.NOTIFY_CHAT_INTERVAL if chat_interval is None else chat_interval
+        self.max_retries = settings.NOTIFY_MAX_RETRIES if max_retries is None else max_retries
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._bucket: Optional[TokenBucket] = None
+        self._tasks: List[asyncio.Task] = []
+        self._chats: Dict[int, Deque[Notification]] = {}
+        self._chat_ready_at: Dict[int, float] = {}
+        self._paused_until = 0.0
+        self._last_flood: Dict[int, float] = {}
+        self._longest_flood = 0.0
+        self._prune_at = PRUNE_MIN_ENTRIES
+        self._unfinished = 0
+        self._idle: Optional[asyncio.Event] = None
+
+        # Недоступные чаты — только до записи в users.blocked_at (forget_dead)
+        self.dead_chats: Set[int] = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.terminal = 0
+        self.skipped_dead = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._bucket = TokenBucket(self.rate)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(
+            f"Очередь уведомлений запущена: {self.workers} отправителей, "
+            f"{self.rate} сообщ./сек, интервал в чат {self.chat_interval} сек"
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Очередь уведомлений остановлена: {self.stats()}")
+
+    async def submit(self, notification: Notification) -> asyncio.Future:
+        """Ставит уведомление в очередь; ждёт, только если очередь заполнена.
+        Итог отправки (True/False) приходит в возвращаемый future."""
+        if not self.running:
+            self.start()
+        result = asyncio.get_running_loop().create_future()
+        self._unfinished += 1
+        self._idle.clear()
+        await self._queue.put(notification._replace(result=result))
+        return result
+
+    async def join(self) -> None:
+        """Ждёт доставки всех поставленных в очередь уведомлений."""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    def revive(self, chat_id: int) -> None:
+        """Пользователь снова написал боту — его чат снова доступен."""
+        self.dead_chats.discard(chat_id)
+
+    def forget_dead(self, chat_ids: Iterable[int]) -> None:
+        """Недоступность чатов записана в БД — держать их в памяти больше не нужно."""
+        self.dead_chats.difference_update(chat_ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "terminal": self.terminal,
+            "skipped_dead": self.skipped_dead,
+            "dead_chats": len(self.dead_chats),
+            "pending": self._unfinished,
+        }
+
+    def _done(self, notification: Notification, delivered: bool) -> None:
+        if notification.result is not None and not notification.result.done():
+            notification.result.set_result(delivered)
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._idle.set()
+
+    async def _worker(self) -> None:
+        while True:
+            notification = await self._queue.get()
+            try:
+                pending = self._chats.get(notification.chat_id)
+                if pending is not None:
+                    # Чат уже обслуживает другой воркер — отдаём ему
+                    pending.append(notification)
+                    continue
+
+                pending = self._chats[notification.chat_id] = deque([notification])
+                try:
+                    while pending:
+                        await self._deliver(pending.popleft(), pending)
+                finally:
+                    del self._chats[notification.chat_id]
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, notification: Notification, pending: Deque[Notification]) -> None:
+        loop = asyncio.get_running_loop()
+        chat_id = notification.chat_id
+
+        if chat_id in self.dead_chats:
+            self.skipped_dead += 1
+            self._done(notification, False)
+            return
+
+        delay = max(self._chat_ready_at.get(chat_id, 0.0), self._paused_until) - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._bucket.acquire()
+
+        # Пауза могла начаться, пока ждали токен
+        delay = self._paused_until - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        try:
+            if notification.digest:
+                await self._send_digest(telegram_id=chat_id, items=notification.digest)
+            else:
+                await self._send(
+                    telegram_id=chat_id,
+                    ad=notification.ad,
+                    filter_name=notification.filter_name,
+                )
+        except TelegramRetryAfter as e:
+            self._on_retry_after(chat_id, e.retry_after)
+            if notification.attempt < self.max_retries:
+                self.retried += 1
+                pending.appendleft(notification._replace(attempt=notification.attempt + 1))
+                return
+            self.failed += 1
+            self._done(notification, False)
+            return
+        except Exception as e:
+            # send_ad_notification уже залогировал ошибку
+            if is_terminal_error(e):
+                self.terminal += 1
+                self.dead_chats.add(chat_id)
+                logger.warning(f"Чат {chat_id} недоступен, уведомления в него приостановлены")
+            self.failed += 1
+            self._done(notification, False)
+            return
+        finally:
+            self._chat_ready_at[chat_id] = max(
+                self._chat_ready_at.get(chat_id, 0.0), loop.time() + self.chat_interval
+            )
+            if max(len(self._chat_ready_at), len(self._last_flood)) >= self._prune_at:
+                self._prune(loop.time())
+
+        self.sent += 1
+        try:
+            if self._on_delivered is not None:
+                await self._on_delivered(notification)
+        except Exception as e:
+            logger.error(f"Ошибка при отметке доставки пользователю {chat_id}: {e}")
+        finally:
+            self._done(notification, True)
+
+    def _prune(self, now: float) -> None:
+        """Удаляет прошедшие паузы чатов, иначе словари растут с числом чатов."""
+        self._chat_ready_at = {chat_id: at for chat_id, at in self._chat_ready_at.items() if at > now}
+        self._last_flood = {
+            chat_id: at for chat_id, at in self._last_flood.items() if now - at < self._longest_flood
+        }
+        self._prune_at = max(PRUNE_MIN_ENTRIES, 2 * len(self._chat_ready_at), 2 * len(self._last_flood))
+
+    def _on_retry_after(self, chat_id: int, retry_after: float) -> None:
+        now = asyncio.get_running_loop().time()
+        resume_at = now + retry_after
+        self._longest_flood = max(self._longest_flood, retry_after)
+
+        # Флуд-контроль сразу в нескольких чатах — пауза всего бота
+        flooded_chats = [
+            other for other, at in self._last_flood.items() if other != chat_id and now - at < retry_after
+        ]
+        self._last_flood[chat_id] = now
+
+        if flooded_chats:
+            self._paused_until = max(self._paused_until, resume_at)
+            logger.warning(f"Флуд-контроль Telegram в нескольких чатах: пауза бота на {retry_after} сек")
+        else:
+            logger.warning(f"Флуд-контроль Telegram в чате {chat_id}: пауза чата на {retry_after} сек")
+        self._chat_ready_at[chat_id] = resume_at
+
+
+notification_dispatcher = NotificationDispatcher()
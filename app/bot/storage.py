@@ -0,0 +1,37 @@
+import logging
+from typing import Optional
+
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Хранилище состояний мастера фильтров.
+
+    С REDIS_URL состояние общее для всех реплик бота и переживает рестарт;
+    без него — в памяти процесса (для разработки с одной репликой).
+    """
+    if not settings.REDIS_URL:
+        return MemoryStorage()
+
+    logger.info("Состояния FSM хранятся в Redis")
+    return RedisStorage.from_url(
+        settings.REDIS_URL,
+        key_builder=DefaultKeyBuilder(prefix=settings.FSM_KEY_PREFIX),
+        state_ttl=settings.FSM_STATE_TTL,
+        data_ttl=settings.FSM_STATE_TTL,
+    )
+
+
+def create_event_isolation(storage: BaseStorage) -> Optional[BaseEventIsolation]:
+    """Блокировка на пользователя между репликами: два обновления одного
+    пользователя, пришедшие в разные реплики, обрабатываются по очереди."""
+    if isinstance(storage, RedisStorage):
+        return storage.create_isolation()
+    return None
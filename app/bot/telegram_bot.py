@@ -1,49 +1,193 @@
+import asyncio
 import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+)
+from aiogram.types import InputMediaPhoto
 
+from app.bot.messages import ad_messages, render_digest, render_digest_header, render_digest_line
 from app.core.config import settings
 
 
 logger = logging.getLogger(__name__)
-bot = Bot(token=settings.BOT_TOKEN)
 
 
-async def send_ad_notification(telegram_id: int, ad, filter_name: str) -> None:
-    """Отправляет уведомление о новом объявлении пользователю."""
-    try:
-        message = f"🚗 <b>Новое объявление по вашему фильтру: {filter_name}</b>\n\n"
+def create_bot() -> Bot:
+    """Bot с сервером API из настроек (TELEGRAM_API_URL — например, локальный
+    фейковый сервер для нагрузочных тестов)."""
+    session = None
+    if settings.TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL))
+    return Bot(token=settings.BOT_TOKEN, session=session)
+
+
+bot = create_bot()
+
+
+# Ошибки 400, после которых писать в чат бесполезно
+TERMINAL_ERROR_MARKERS = (
+    "chat not found",
+    "user is deactivated",
+    "peer_id_invalid",
+    "bot was blocked",
+    "bot was kicked",
+)
+
+# Ошибки 400, при которых Telegram не принял сам file_id фото
+FILE_ID_ERROR_MARKERS = (
+    "wrong file identifier",
+    "wrong remote file identifier",
+    "wrong padding",
+    "file_reference",
+    "media_empty",
+    "type of file mismatch",
+    "can't use file of type",
+)
+
+
+def is_terminal_error(error: Exception) -> bool:
+    """Чат недоступен навсегда: бот заблокирован, аккаунт удалён, чат не найден."""
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    if isinstance(error, (TelegramBadRequest, TelegramNotFound)):
+        message = str(error.message).lower()
+        return any(marker in message for marker in TERMINAL_ERROR_MARKERS)
+    return False
+
+
+def is_file_id_error(error: Exception) -> bool:
+    """Telegram отклонил file_id фото — его стоит забыть и загрузить фото по URL."""
+    if not isinstance(error, TelegramBadRequest):
+        return False
+    message = str(error.message).lower()
+    return any(marker in message for marker in FILE_ID_ERROR_MARKERS)
+
+
+class PhotoFileIdCache:
+    """file_id фото объявлений, уже загруженных в Telegram.
+
+    Первая отправка фото объявления идёт по URL berkat.ru, дальше всем
+    получателям отправляется file_id из ответа Telegram. Пока фото
+    загружается, остальные отправки того же объявления ждут её, а не
+    скачивают фото параллельно. Если кэш пуст, берётся ads.photo_file_id.
+    """
+
+    def __init__(self, max_entries: int = 5000) -> None:
+        self.max_entries = max_entries
+        self._file_ids: "OrderedDict[int, Optional[str]]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Сколько отправок держат или ждут блокировку объявления
+        self._lock_users: Dict[int, int] = {}
+        self.hits = 0
+        self.uploads = 0
+
+    def get(self, ad) -> Optional[str]:
+        if ad.id in self._file_ids:
+            self._file_ids.move_to_end(ad.id)
+            return self._file_ids[ad.id]
+        return getattr(ad, "photo_file_id", None)
+
+    def remember(self, ad_id: int, file_id: Optional[str]) -> None:
+        self._file_ids[ad_id] = file_id
+        self._file_ids.move_to_end(ad_id)
+        if len(self._file_ids) > self.max_entries:
+            self._file_ids.popitem(last=False)
+
+    def forget(self, ad_id: int) -> None:
+        # None, а не удаление: иначе get вернёт устаревший ads.photo_file_id
+        self.remember(ad_id, None)
+
+    def upload_lock(self, ad_id: int) -> asyncio.Lock:
+        """Блокировка загрузки фото объявления; каждому вызову должен
+        соответствовать release_lock."""
+        lock = self._locks.get(ad_id)
+        if lock is None:
+            lock = self._locks[ad_id] = asyncio.Lock()
+        self._lock_users[ad_id] = self._lock_users.get(ad_id, 0) + 1
+        return lock
+
+    def release_lock(self, ad_id: int) -> None:
+        # Удаляется, только когда её никто не ждёт: иначе новая отправка
+        # создала бы вторую блокировку и загрузила фото параллельно
+        users = self._lock_users.get(ad_id, 0) - 1
+        if users > 0:
+            self._lock_users[ad_id] = users
+            return
+        self._lock_users.pop(ad_id, None)
+        self._locks.pop(ad_id, None)
 
-        if ad.brand and ad.model:
-            message += f"🔹 <b>{ad.brand} {ad.model}</b>\n"
-        elif ad.title:
-            message += f"🔹 <b>{ad.title}</b>\n"
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "uploads": self.uploads, "entries": len(self._file_ids)}
 
-        if ad.year:
-            message += f"📅 Год: {ad.year}\n"
 
-        if ad.price:
-            price_str = f"{ad.price:,}".replace(",", " ")
-            message += f"💰 Цена: {price_str} ₽\n"
+photo_file_ids = PhotoFileIdCache()
 
-        if ad.mileage:
-            mileage_str = f"{ad.mileage:,}".replace(",", " ")
-            message += f"🛣️ Пробег: {mileage_str} км\n"
 
-        if ad.region:
-            message += f"📍 Регион: {ad.region}\n"
+async def _upload_photo(telegram_id: int, ad, caption: str) -> None:
+    message = await bot.send_photo(
+        chat_id=telegram_id,
+        photo=ad.photo_url,
+        caption=caption,
+        parse_mode="HTML",
+    )
+    photo_file_ids.uploads += 1
+    if message.photo:
+        photo_file_ids.remember(ad.id, message.photo[-1].file_id)
 
-        message += f"\n🔗 <a href='{ad.url}'>Посмотреть объявление</a>"
+
+async def _send_photo(telegram_id: int, ad, caption: str) -> None:
+    file_id = photo_file_ids.get(ad)
+    if file_id is None:
+        lock = photo_file_ids.upload_lock(ad.id)
+        try:
+            async with lock:
+                # Пока ждали, фото мог загрузить другой получатель
+                file_id = photo_file_ids.get(ad)
+                if file_id is None:
+                    await _upload_photo(telegram_id, ad, caption)
+                    return
+        finally:
+            photo_file_ids.release_lock(ad.id)
+
+    try:
+        await bot.send_photo(
+            chat_id=telegram_id,
+            photo=file_id,
+            caption=caption,
+            parse_mode="HTML",
+        )
+        photo_file_ids.hits += 1
+    except TelegramBadRequest as e:
+        # Недоступный чат или ошибка подписи — file_id тут ни при чём
+        if is_terminal_error(e) or not is_file_id_error(e):
+            raise
+        logger.warning(f"file_id фото объявления {ad.id} не принят ({e}), загружаем по URL")
+        photo_file_ids.forget(ad.id)
+        await _upload_photo(telegram_id, ad, caption)
+
+
+async def send_ad_notification(telegram_id: int, ad, filter_name: str) -> None:
+    """Отправляет уведомление о новом объявлении пользователю."""
+    try:
+        message = ad_messages.render(ad, filter_name)
 
         if ad.photo_url:
             try:
-                await bot.send_photo(
-                    chat_id=telegram_id,
-                    photo=ad.photo_url,
-                    caption=message,
-                    parse_mode="HTML",
-                )
+                await _send_photo(telegram_id, ad, message)
+            except TelegramRetryAfter:
+                raise
             except Exception as photo_error:
+                if is_terminal_error(photo_error):
+                    raise
                 logger.warning(f"Ошибка отправки фото: {photo_error}. Отправляем без фото.")
                 await bot.send_message(
                     chat_id=telegram_id,
@@ -61,4 +205,46 @@ async def send_ad_notification(telegram_id: int, ad, filter_name: str) -> None:
 
     except Exception as e:
         logger.error(f"Ошибка отправки уведомления пользователю {telegram_id}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def send_digest_notification(telegram_id: int, items: List[Tuple[object, str]]) -> None:
+    """Отправляет несколько объявлений одним сообщением: альбомом, если у
+    всех есть фото (от 2 до 10 штук), иначе — списком со ссылками."""
+    try:
+        if 2 <= len(items) <= 10 and all(ad.photo_url for ad, _ in items):
+            media = [
+                InputMediaPhoto(
+                    media=photo_file_ids.get(ad) or ad.photo_url,
+                    caption=(render_digest_header(len(items)) if i == 0 else "")
+                    + render_digest_line(ad, filter_name),
+                    parse_mode="HTML",
+                )
+                for i, (ad, filter_name) in enumerate(items)
+            ]
+            try:
+                messages = await bot.send_media_group(chat_id=telegram_id, media=media)
+            except TelegramRetryAfter:
+                raise
+            except Exception as album_error:
+                if is_terminal_error(album_error):
+                    raise
+                logger.warning(f"Ошибка отправки альбома: {album_error}. Отправляем списком.")
+            else:
+                for (ad, _), sent in zip(items, messages):
+                    if sent.photo:
+                        photo_file_ids.remember(ad.id, sent.photo[-1].file_id)
+                logger.info(f"Дайджест ({len(items)}) отправлен пользователю {telegram_id}")
+                return
+
+        await bot.send_message(
+            chat_id=telegram_id,
+            text=render_digest(items),
+            parse_mode="HTML",
+            disable_web_page_preview=True,
+        )
+        logger.info(f"Дайджест ({len(items)}) отправлен пользователю {telegram_id}")
+
+    except Exception as e:
+        logger.error(f"Ошибка отправки дайджеста пользователю {telegram_id}: {e}")
+        raise
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """Ограничивает число одновременно обрабатываемых обновлений.
+
+    В режиме webhook каждое обновление обрабатывается в отдельной задаче,
+    и без ограничения всплеск обновлений разом занял бы все соединения с БД.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async with self._semaphore:
+            return await handler(event, data)
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    """aiohttp-приложение, принимающее обновления на WEBHOOK_PATH.
+
+    Telegram получает ответ сразу, обработка идёт в фоне — медленный
+    обработчик не задерживает доставку следующих обновлений.
+    """
+    dp.update.outer_middleware(ConcurrencyLimitMiddleware(settings.WEBHOOK_CONCURRENCY))
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=settings.WEBHOOK_SECRET or None,
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Запускает сервер webhook и регистрирует его адрес в Telegram.
+
+    Webhook не удаляется при остановке: за балансировщиком может работать
+    несколько реплик, и остановка одной не должна отключать остальные.
+    """
+    if not settings.WEBHOOK_URL:
+        raise ValueError("Для BOT_MODE=webhook нужен WEBHOOK_URL")
+
+    runner = web.AppRunner(create_webhook_app(dp, bot))
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT)
+    await site.start()
+
+    url = settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH
+    try:
+        await bot.set_webhook(
+            url=url,
+            secret_token=settings.WEBHOOK_SECRET or None,
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info(
+            f"Webhook {url} слушает {settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}, "
+            f"до {settings.WEBHOOK_CONCURRENCY} обновлений одновременно"
+        )
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
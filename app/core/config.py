@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -5,10 +7,83 @@ class Settings(BaseSettings):
     BOT_TOKEN: str
     DB_URL: str
 
+    # Какие источники обходить, через запятую (Ad.source)
+    PARSER_SOURCES: str = "berkat.ru"
+
+    # Парсер berkat.ru
+    PARSER_MAX_PAGES: int = 50
+    PARSER_CONCURRENCY: int = 5
+    PARSER_REQUEST_DELAY: float = 0.5
+    PARSER_INCREMENTAL: bool = True
+    PARSER_WORKERS: int = 2
+    PARSER_BACKEND: Literal["bs4", "strainer", "lxml"] = "lxml"
+    # Конвейер обхода: одновременных сохранений страниц и размер очередей между стадиями
+    PARSER_SAVE_WORKERS: int = 1
+    PARSER_QUEUE_SIZE: int = 4
+    # Сопоставлять объявления с фильтрами запросом в Postgres, а не в Python;
+    # нужна база с UTF-8 локалью (см. match_ads_to_filters)
+    MATCH_IN_DB: bool = False
+
+    # Отправка уведомлений
+    NOTIFY_WORKERS: int = 8
+    NOTIFY_QUEUE_SIZE: int = 1000
+    NOTIFY_RATE: float = 30.0
+    NOTIFY_CHAT_INTERVAL: float = 1.0
+    NOTIFY_MAX_RETRIES: int = 3
+
+    # Дайджест: окно накопления совпадений, сек, и максимум объявлений в сообщении
+    DIGEST_WINDOW: float = 600.0
+    DIGEST_MAX_BATCH: int = 10
+
+    # Как часто переводить истёкшие пробные подписки в expired, сек
+    SUBSCRIPTION_CHECK_INTERVAL: float = 3600.0
+
+    # Outbox уведомлений
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_BATCHES: int = 4
+    OUTBOX_POLL_INTERVAL: float = 5.0
+    OUTBOX_LEASE: float = 300.0
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_DELAY: float = 60.0
+
+    # Режим получения обновлений: polling для разработки, webhook для продакшена
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    # Публичный адрес, на который Telegram шлёт обновления (https://example.com)
+    WEBHOOK_URL: str = ""
+    WEBHOOK_PATH: str = "/telegram/webhook"
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_SECRET: str = ""
+    # Одновременных соединений от Telegram (1-100) и обрабатываемых обновлений
+    WEBHOOK_MAX_CONNECTIONS: int = 40
+    WEBHOOK_CONCURRENCY: int = 100
+    # Свой сервер Bot API, пусто — api.telegram.org
+    TELEGRAM_API_URL: str = ""
+
+    # Redis для состояний мастера фильтров (redis://host:6379/0), пусто — в памяти
+    REDIS_URL: str = ""
+    FSM_KEY_PREFIX: str = "carbot_fsm"
+    # Через сколько секунд брошенный мастер фильтра забывается
+    FSM_STATE_TTL: int = 86400
+
+    # Интервал обхода сайта подстраивается под частоту новых объявлений, сек
+    CRAWL_MIN_INTERVAL: float = 120.0
+    CRAWL_MAX_INTERVAL: float = 1800.0
+    # Сколько новых объявлений в среднем должно набираться за цикл
+    CRAWL_TARGET_NEW_ADS: float = 3.0
+    # Случайное отклонение интервала (доля) и вес последнего цикла в оценке частоты
+    CRAWL_JITTER: float = 0.1
+    CRAWL_SMOOTHING: float = 0.5
+
+    # Краулер работает только на ведущей реплике (advisory lock Postgres)
+    LEADER_LOCK_KEY: int = 4_210_001
+    # Как часто ведомые пытаются взять блокировку, а ведущая — проверяет её, сек
+    LEADER_CHECK_INTERVAL: float = 15.0
+
     model_config = {
         "env_file": ".env",
         "case_sensitive": True,
     }
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,16 +1,46 @@
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-from sqlalchemy import and_, select
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    and_,
+    case,
+    column,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
-from app.db.models import Ad, FilterSet, SentNotification, User
+from app.db.models import (
+    Ad,
+    CrawlState,
+    FilterSet,
+    NotificationOutbox,
+    OutboxStatus,
+    SentNotification,
+    SubscriptionStatus,
+    User,
+)
+from app.utils.brands import BRAND_SYNONYMS, normalize_brand
+from app.utils.regions import CITY_TO_REGION
 
 
 logger = logging.getLogger(__name__)
 
+# Сколько строк отправлять в одном INSERT (ограничение на число параметров)
+INSERT_BATCH_SIZE = 500
+
+# (user_id, ad_id, filter_id) — ключ unique_user_ad_filter
+NotificationKey = Tuple[int, int, int]
+
 
 async def get_user_by_telegram_id(db: AsyncSession, telegram_id: int) -> Optional[User]:
     stmt = select(User).where(User.telegram_id == telegram_id)
@@ -39,6 +69,96 @@ async def create_user(
     return user
 
 
+async def set_user_digest(db: AsyncSession, telegram_id: int, enabled: bool) -> Optional[User]:
+    user = await db.get(User, telegram_id)
+    if not user:
+        return None
+
+    user.digest_enabled = enabled
+    try:
+        await db.commit()
+        await db.refresh(user)
+    except Exception:
+        await db.rollback()
+        raise
+    return user
+
+
+async def deactivate_blocked_users(db: AsyncSession, user_ids: Iterable[int]) -> List[int]:
+    """Отмечает пользователей с недоступным чатом, выключает их фильтры и
+    снимает с отправки их уведомления; возвращает id отмеченных."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return []
+
+    try:
+        result = await db.execute(
+            update(User)
+            .where(User.telegram_id.in_(user_ids), User.blocked_at.is_(None))
+            .values(blocked_at=func.now())
+            .returning(User.telegram_id)
+        )
+        blocked = list(result.scalars().all())
+        # Только у отмеченных сейчас: уже отмеченный мог нажать /start на другой реплике
+        if blocked:
+            await db.execute(
+                update(FilterSet)
+                .where(FilterSet.user_id.in_(blocked), FilterSet.is_active.is_(True))
+                .values(is_active=False)
+            )
+        await db.execute(
+            update(NotificationOutbox)
+            .where(
+                NotificationOutbox.user_id.in_(
+                    select(User.telegram_id).where(
+                        User.telegram_id.in_(user_ids), User.blocked_at.is_not(None)
+                    )
+                ),
+                NotificationOutbox.status.in_([OutboxStatus.pending, OutboxStatus.sending]),
+            )
+            .values(status=OutboxStatus.failed)
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Не удалось отключить пользователей с недоступным чатом: {e}")
+        return []
+    return blocked
+
+
+async def unblock_user(db: AsyncSession, user: User) -> int:
+    """Снимает отметку о недоступном чате и включает фильтры, выключенные
+    при блокировке (изменённые не раньше blocked_at). Возвращает их число."""
+    if user.blocked_at is None:
+        return 0
+
+    try:
+        result = await db.execute(
+            update(FilterSet)
+            .where(
+                FilterSet.user_id == user.telegram_id,
+                FilterSet.is_active.is_(False),
+                FilterSet.updated_at >= user.blocked_at,
+            )
+            .values(is_active=True)
+        )
+        user.blocked_at = None
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return result.rowcount
+
+
+def filter_canonical_brand(filters_json: dict) -> Optional[str]:
+    """Канонический бренд фильтра; как и у колонки brand, всё, кроме непустой
+    строки, означает «без бренда»."""
+    brand = filters_json.get("brand")
+    if not isinstance(brand, str) or not brand.strip():
+        return None
+    return normalize_brand(brand)
+
+
 async def create_filter_set(
     db: AsyncSession,
     user_id: int,
@@ -49,6 +169,7 @@ async def create_filter_set(
         user_id=user_id,
         name=name,
         filters_json=filters_json,
+        canonical_brand=filter_canonical_brand(filters_json),
         is_active=True,
     )
     db.add(fs)
@@ -77,6 +198,104 @@ async def get_all_active_filters(db: AsyncSession) -> List[FilterSet]:
     return result.scalars().all()
 
 
+def _subscribed_filter_clause():
+    """Фильтр активен, чат владельца доступен, а подписка не истекла — ни по
+    статусу, ни по subscription_end (если фоновая задача ещё не успела её
+    закрыть)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return and_(
+        FilterSet.is_active.is_(True),
+        User.blocked_at.is_(None),
+        User.subscription_status != SubscriptionStatus.expired,
+        or_(User.subscription_end.is_(None), User.subscription_end > now),
+    )
+
+
+async def get_subscribed_active_filters(db: AsyncSession) -> List[FilterSet]:
+    """Активные фильтры пользователей с действующей подпиской."""
+    result = await db.scalars(
+        select(FilterSet)
+        .join(User, User.telegram_id == FilterSet.user_id)
+        .where(_subscribed_filter_clause())
+    )
+    return result.all()
+
+
+async def expire_trial_subscriptions(db: AsyncSession) -> int:
+    """Переводит в expired пробные подписки с прошедшим subscription_end."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    try:
+        result = await db.execute(
+            update(User)
+            .where(
+                User.subscription_status == SubscriptionStatus.trial,
+                User.subscription_end <= now,
+            )
+            .values(subscription_status=SubscriptionStatus.expired)
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return result.rowcount
+
+
+async def backfill_filter_canonical_brands(db: AsyncSession) -> int:
+    """Заполняет canonical_brand у старых фильтров и убирает из filters_json
+    дописанный туда раньше ключ canonical_brand."""
+    result = await db.scalars(
+        select(FilterSet).where(
+            or_(
+                and_(FilterSet.brand.is_not(None), FilterSet.canonical_brand.is_(None)),
+                FilterSet.filters_json.has_key("canonical_brand"),
+            )
+        )
+    )
+    filter_sets = result.all()
+    if not filter_sets:
+        return 0
+
+    rows = []
+    for fs in filter_sets:
+        filters_json = {k: v for k, v in fs.filters_json.items() if k != "canonical_brand"}
+        rows.append(
+            {
+                "id": fs.id,
+                "filters_json": filters_json,
+                "canonical_brand": filter_canonical_brand(filters_json),
+                # Без изменений: по updated_at unblock_user решает, что включить обратно
+                "updated_at": fs.updated_at,
+            }
+        )
+
+    try:
+        await db.execute(update(FilterSet), rows)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Не удалось заполнить канонические бренды фильтров: {e}")
+        return 0
+    return len(rows)
+
+
+async def get_active_filters_version(db: AsyncSession) -> tuple:
+    """Отпечаток набора фильтров из get_subscribed_active_filters: меняется
+    при создании, удалении и любом изменении фильтра (updated_at обновляется
+    автоматически), а также когда подписка владельца истекает или
+    продлевается — фильтр входит в набор или выпадает из него."""
+    result = await db.execute(
+        select(
+            func.count(FilterSet.id),
+            func.sum(FilterSet.id),
+            func.max(func.coalesce(FilterSet.updated_at, FilterSet.created_at)),
+        )
+        .select_from(FilterSet)
+        .join(User, User.telegram_id == FilterSet.user_id)
+        .where(_subscribed_filter_clause())
+    )
+    return tuple(result.one())
+
+
 async def update_filter_set(
     db: AsyncSession,
     filter_id: int,
@@ -92,6 +311,7 @@ async def update_filter_set(
         fs.name = name
     if filters_json is not None:
         fs.filters_json = filters_json
+        fs.canonical_brand = filter_canonical_brand(filters_json)
     if is_active is not None:
         fs.is_active = is_active
 
@@ -112,6 +332,104 @@ async def get_ad_by_source_external(
     return result.scalar_one_or_none()
 
 
+async def get_existing_external_ids(
+    db: AsyncSession, source: str, external_ids: Iterable[str]
+) -> Set[str]:
+    external_ids = list(external_ids)
+    if not external_ids:
+        return set()
+
+    stmt = select(Ad.external_id).where(
+        Ad.source == source, Ad.external_id.in_(external_ids)
+    )
+    result = await db.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def get_crawl_state(db: AsyncSession, source: str) -> Optional[CrawlState]:
+    return await db.get(CrawlState, source)
+
+
+async def save_crawl_state(
+    db: AsyncSession,
+    source: str,
+    high_water_id: Optional[int],
+    recent_external_ids: List[str],
+) -> None:
+    stmt = insert(CrawlState).values(
+        source=source,
+        high_water_id=high_water_id,
+        recent_external_ids=recent_external_ids,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CrawlState.source],
+        set_={
+            "high_water_id": stmt.excluded.high_water_id,
+            "recent_external_ids": stmt.excluded.recent_external_ids,
+            "updated_at": func.now(),
+        },
+    )
+    try:
+        await db.execute(stmt)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Не удалось сохранить состояние обхода {source}: {e}")
+
+
+def ad_brand_clause(brand: str):
+    """Условие «объявление бренда brand»; объявления без canonical_brand
+    сравниваются по lower(brand) со всеми написаниями бренда."""
+    canonical_brand = normalize_brand(brand) or brand.lower().strip()
+    spellings = BRAND_SYNONYMS.get(canonical_brand) or [canonical_brand]
+    return or_(
+        Ad.canonical_brand == canonical_brand,
+        and_(
+            Ad.canonical_brand.is_(None),
+            func.lower(func.btrim(Ad.brand)).in_(spellings),
+        ),
+    )
+
+
+async def backfill_ad_canonical_brands(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Заполняет canonical_brand у старых объявлений пачками по id, фиксируя
+    каждую пачку, чтобы не держать долгую транзакцию на таблице ads."""
+    updated, last_id = 0, 0
+    while True:
+        rows = (
+            await db.execute(
+                select(Ad.id, Ad.brand)
+                .where(
+                    Ad.id > last_id,
+                    Ad.canonical_brand.is_(None),
+                    Ad.brand.is_not(None),
+                )
+                .order_by(Ad.id)
+                .limit(batch_size)
+            )
+        ).all()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+
+        brands = []
+        for ad_id, brand in rows:
+            canonical_brand = normalize_brand(brand)
+            if canonical_brand:
+                brands.append({"id": ad_id, "canonical_brand": canonical_brand})
+        if not brands:
+            continue
+
+        try:
+            await db.execute(update(Ad), brands)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Не удалось заполнить канонические бренды объявлений: {e}")
+            return updated
+        updated += len(brands)
+
+
 async def create_ad(db: AsyncSession, ad_data: dict) -> Ad:
     ad = Ad(**ad_data)
     db.add(ad)
@@ -124,6 +442,58 @@ async def create_ad(db: AsyncSession, ad_data: dict) -> Ad:
     return ad
 
 
+async def insert_new_ads(db: AsyncSession, ads_data: List[dict], commit: bool = True) -> List[Ad]:
+    """Вставляет объявления пачками INSERT ... ON CONFLICT DO NOTHING и возвращает
+    только новые строки; с commit=False транзакцию фиксирует вызывающий код."""
+    unique_ads = {}
+    for ad_data in ads_data:
+        unique_ads.setdefault((ad_data["source"], ad_data["external_id"]), ad_data)
+    rows = list(unique_ads.values())
+
+    new_ads: List[Ad] = []
+    try:
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            stmt = (
+                insert(Ad)
+                .values(rows[i : i + INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(constraint="unique_ad_source_external")
+                .returning(Ad)
+            )
+            result = await db.scalars(stmt)
+            new_ads.extend(result.all())
+        if commit:
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return new_ads
+
+
+async def get_ads_by_ids(db: AsyncSession, ad_ids: Iterable[int]) -> Dict[int, Ad]:
+    ad_ids = list(set(ad_ids))
+    if not ad_ids:
+        return {}
+    result = await db.scalars(select(Ad).where(Ad.id.in_(ad_ids)))
+    return {ad.id: ad for ad in result.all()}
+
+
+async def save_photo_file_ids(db: AsyncSession, file_ids: Dict[int, str]) -> None:
+    """Сохраняет file_id фото объявлений одним UPDATE."""
+    if not file_ids:
+        return
+
+    try:
+        await db.execute(
+            update(Ad)
+            .where(Ad.id.in_(list(file_ids)))
+            .values(photo_file_id=case(file_ids, value=Ad.id))
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Не удалось сохранить file_id фото: {e}")
+
+
 async def get_new_ads(db: AsyncSession, since: Optional[datetime] = None) -> List[Ad]:
     if since is None:
         since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=1)
@@ -159,6 +529,332 @@ async def mark_notification_sent(
     except Exception as e:
         await db.rollback()
         logger.warning(f"Не удалось отметить уведомление как отправленное: {e}")
+
+
+async def get_unsent_notifications(
+    db: AsyncSession, candidates: Iterable[NotificationKey]
+) -> List[NotificationKey]:
+    """Из тройек (user_id, ad_id, filter_id) оставляет те, которых нет в
+    sent_notifications. Один запрос на пачку: VALUES с кандидатами и
+    anti-join по unique_user_ad_filter. Порядок кандидатов сохраняется."""
+    candidates = list(dict.fromkeys(candidates))
+    if not candidates:
+        return []
+
+    sent: Set[NotificationKey] = set()
+    for i in range(0, len(candidates), INSERT_BATCH_SIZE):
+        chunk = values(
+            column("user_id", BigInteger),
+            column("ad_id", Integer),
+            column("filter_id", Integer),
+            name="candidates",
+        ).data(candidates[i : i + INSERT_BATCH_SIZE])
+        stmt = select(chunk.c.user_id, chunk.c.ad_id, chunk.c.filter_id).join(
+            SentNotification,
+            and_(
+                SentNotification.user_id == chunk.c.user_id,
+                SentNotification.ad_id == chunk.c.ad_id,
+                SentNotification.filter_id == chunk.c.filter_id,
+            ),
+        )
+        result = await db.execute(stmt)
+        sent.update(tuple(row) for row in result.all())
+
+    return [key for key in candidates if key not in sent]
+
+
+async def mark_notifications_sent(
+    db: AsyncSession, keys: Iterable[NotificationKey], commit: bool = True
+) -> None:
+    """Записывает пачку (user_id, ad_id, filter_id) в sent_notifications
+    одним INSERT ... ON CONFLICT DO NOTHING на каждые INSERT_BATCH_SIZE строк."""
+    rows = [
+        {"user_id": user_id, "ad_id": ad_id, "filter_id": filter_id}
+        for user_id, ad_id, filter_id in dict.fromkeys(keys)
+    ]
+    if not rows:
+        return
+
+    try:
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            await db.execute(
+                insert(SentNotification)
+                .values(rows[i : i + INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(constraint="unique_user_ad_filter")
+            )
+        if commit:
+            await db.commit()
+    except Exception as e:
+        await db.rollback()
+        if not commit:
+            raise
+        logger.warning(f"Не удалось отметить {len(rows)} уведомлений как отправленные: {e}")
+
+
+async def match_ads_to_filters(db: AsyncSession, ad_ids: Iterable[int]) -> List[dict]:
+    """Строки для enqueue_notifications по условиям matches_filter, одним запросом.
+    lower() следует LC_CTYPE базы: при C/POSIX кириллица не приводится, нужна UTF-8."""
+    ad_ids = list(set(ad_ids))
+    if not ad_ids:
+        return []
+
+    ad_region = func.lower(func.btrim(Ad.region))
+    ad_region = case(CITY_TO_REGION, value=ad_region, else_=ad_region)
+
+    def in_range(value, low, high):
+        return or_(
+            value.is_(None),
+            and_(
+                or_(low.is_(None), value >= low),
+                or_(high.is_(None), value <= high),
+            ),
+        )
+
+    already_sent = (
+        select(SentNotification.id)
+        .where(
+            SentNotification.user_id == FilterSet.user_id,
+            SentNotification.ad_id == Ad.id,
+            SentNotification.filter_id == FilterSet.id,
+        )
+        .exists()
+    )
+
+    stmt = (
+        select(FilterSet.user_id, Ad.id, FilterSet.id, FilterSet.name)
+        .select_from(Ad)
+        .join(
+            FilterSet,
+            and_(
+                or_(FilterSet.brand.is_(None), FilterSet.canonical_brand == Ad.canonical_brand),
+                or_(
+                    FilterSet.model.is_(None),
+                    func.strpos(func.lower(func.btrim(Ad.model)), FilterSet.model) > 0,
+                ),
+                in_range(Ad.year, FilterSet.min_year, FilterSet.max_year),
+                in_range(Ad.price, FilterSet.min_price, FilterSet.max_price),
+                or_(
+                    Ad.mileage.is_(None),
+                    FilterSet.max_mileage.is_(None),
+                    Ad.mileage <= FilterSet.max_mileage,
+                ),
+                or_(
+                    FilterSet.region.is_(None),
+                    func.strpos(ad_region, FilterSet.region) > 0,
+                    func.strpos(FilterSet.region, ad_region) > 0,
+                ),
+            ),
+        )
+        .join(User, User.telegram_id == FilterSet.user_id)
+        .where(Ad.id.in_(ad_ids), _subscribed_filter_clause(), ~already_sent)
+        .order_by(Ad.id, FilterSet.id)
+    )
+    result = await db.execute(stmt)
+    return [
+        {"user_id": user_id, "ad_id": ad_id, "filter_id": filter_id, "filter_name": name}
+        for user_id, ad_id, filter_id, name in result.all()
+    ]
+
+
+async def enqueue_notifications(
+    db: AsyncSession, rows: List[dict], digest_window: float = 0
+) -> int:
+    """Добавляет строки (user_id, ad_id, filter_id, filter_name) в outbox без
+    коммита, пропуская повторы; дайджест ждёт границы окна digest_window."""
+    if not rows:
+        return 0
+
+    result = await db.scalars(
+        select(User.telegram_id).where(
+            User.telegram_id.in_({row["user_id"] for row in rows}),
+            User.digest_enabled.is_(True),
+        )
+    )
+    digest_users = set(result.all())
+
+    window_end = func.now()
+    if digest_window > 0:
+        window_end = func.to_timestamp(
+            func.ceil(func.extract("epoch", func.now()) / digest_window) * digest_window
+        )
+
+    rows = [
+        {
+            **row,
+            "digest": row["user_id"] in digest_users,
+            "available_at": window_end if row["user_id"] in digest_users else func.now(),
+        }
+        for row in rows
+    ]
+
+    queued = 0
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        stmt = (
+            insert(NotificationOutbox)
+            .values(rows[i : i + INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(constraint="unique_outbox_user_ad_filter")
+            .returning(NotificationOutbox.id)
+        )
+        result = await db.scalars(stmt)
+        queued += len(result.all())
+    return queued
+
+
+async def claim_outbox_batch(
+    db: AsyncSession, limit: int, lease_seconds: float
+) -> List[NotificationOutbox]:
+    """Захватывает готовые строки outbox (sending до available_at) целиком по
+    пользователям, пока строк меньше limit: дайджест не делится между пачками."""
+    # Отметку о недоступном чате видят все реплики
+    blocked_user = (
+        select(User.telegram_id)
+        .where(User.telegram_id == NotificationOutbox.user_id, User.blocked_at.is_not(None))
+        .exists()
+    )
+    ready = and_(
+        NotificationOutbox.status.in_([OutboxStatus.pending, OutboxStatus.sending]),
+        NotificationOutbox.available_at <= func.now(),
+        ~blocked_user,
+    )
+    per_user = (
+        select(
+            NotificationOutbox.user_id,
+            func.min(NotificationOutbox.id).label("first_id"),
+            func.count().label("row_count"),
+        )
+        .where(ready)
+        .group_by(NotificationOutbox.user_id)
+        .subquery()
+    )
+    # Сколько строк набрано пользователями до этого
+    rows_before = (
+        func.sum(per_user.c.row_count).over(order_by=per_user.c.first_id) - per_user.c.row_count
+    )
+    ranked = select(per_user.c.user_id, rows_before.label("rows_before")).subquery()
+    users = select(ranked.c.user_id).where(ranked.c.rows_before < limit)
+    claimable = (
+        select(NotificationOutbox.id)
+        .where(ready, NotificationOutbox.user_id.in_(users))
+        # Параллельные воркеры получают разные строки
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(claimable))
+        .values(
+            status=OutboxStatus.sending,
+            # attempts — токен захвата: остальные функции outbox меняют строку,
+            # только пока он совпадает
+            attempts=NotificationOutbox.attempts + 1,
+            available_at=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(NotificationOutbox)
+    )
+    try:
+        result = await db.scalars(stmt)
+        rows = result.all()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return sorted(rows, key=lambda row: row.id)
+
+
+def _claimed_by_us(rows: List[NotificationOutbox]):
+    """Строки всё ещё в нашем захвате: attempts, увеличенный при захвате,
+    служит токеном — после повторного захвата другим воркером он другой."""
+    return and_(
+        NotificationOutbox.status == OutboxStatus.sending,
+        tuple_(NotificationOutbox.id, NotificationOutbox.attempts).in_(
+            [(row.id, row.attempts) for row in rows]
+        ),
+    )
+
+
+async def renew_outbox_lease(
+    db: AsyncSession, rows: List[NotificationOutbox], lease_seconds: float
+) -> int:
+    """Продлевает захват строк, пока пачка отправляется; возвращает число
+    строк, которые всё ещё за нами."""
+    if not rows:
+        return 0
+
+    try:
+        result = await db.execute(
+            update(NotificationOutbox)
+            .where(_claimed_by_us(rows))
+            .values(available_at=func.now() + timedelta(seconds=lease_seconds))
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Не удалось продлить захват {len(rows)} уведомлений: {e}")
+        return 0
+    return result.rowcount
+
+
+async def complete_outbox_delivery(db: AsyncSession, rows: List[NotificationOutbox]) -> int:
+    """Отмечает доставленными строки outbox, не перехваченные другим воркером,
+    и пишет их в sent_notifications; возвращает число отмеченных."""
+    if not rows:
+        return 0
+
+    try:
+        result = await db.execute(
+            update(NotificationOutbox)
+            .where(_claimed_by_us(rows))
+            .values(status=OutboxStatus.delivered, delivered_at=func.now())
+            .returning(NotificationOutbox.id)
+        )
+        completed = set(result.scalars().all())
+        await mark_notifications_sent(
+            db,
+            [(row.user_id, row.ad_id, row.filter_id) for row in rows if row.id in completed],
+            commit=False,
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Не удалось отметить доставку {len(rows)} уведомлений: {e}")
+        return 0
+    if len(completed) < len(rows):
+        logger.warning(
+            f"Захват {len(rows) - len(completed)} уведомлений истёк до отметки о доставке"
+        )
+    return len(completed)
+
+
+async def release_outbox_failures(
+    db: AsyncSession,
+    rows: List[NotificationOutbox],
+    max_attempts: int,
+    retry_delay: float,
+) -> None:
+    """Возвращает неотправленные строки в очередь с задержкой; исчерпавшие
+    попытки помечаются failed. Строки, захваченные с тех пор другим
+    воркером, не трогаются."""
+    if not rows:
+        return
+
+    try:
+        await db.execute(
+            update(NotificationOutbox)
+            .where(_claimed_by_us(rows))
+            .values(
+                status=case(
+                    (
+                        NotificationOutbox.attempts >= max_attempts,
+                        literal(OutboxStatus.failed, NotificationOutbox.status.type),
+                    ),
+                    else_=literal(OutboxStatus.pending, NotificationOutbox.status.type),
+                ),
+                available_at=func.now() + timedelta(seconds=retry_delay),
+            )
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Не удалось вернуть {len(rows)} уведомлений в очередь: {e}")
         
         
 # app/db/crud.py (добавить)
@@ -169,14 +865,16 @@ async def get_ads_by_filters(
     max_price: Optional[int] = None,
     min_year: Optional[int] = None,
     max_year: Optional[int] = None,
-    limit: int = 50
+    limit: int = 50,
+    source: str = "berkat.ru",
 ) -> List[Ad]:
     from sqlalchemy import select
     
-    query = select(Ad).where(Ad.source == "berkat.ru")
+    # Запрос идёт по ix_ads_source_parsed_at
+    query = select(Ad).where(Ad.source == source)
     
     if brand:
-        query = query.where(Ad.brand.ilike(f"%{brand}%"))
+        query = query.where(ad_brand_clause(brand))
     if min_price is not None:
         query = query.where(Ad.price >= min_price)
     if max_price is not None:
@@ -0,0 +1,92 @@
+"""Применение SQL-миграций из каталога migrations/.
+
+Таблицы базовой схемы создаёт init_db; изменения схемы после неё лежат
+в migrations/ файлами NNN_описание.sql и применяются по порядку номеров.
+Применённые миграции записываются в schema_migrations, каждая миграция
+выполняется в своей транзакции. Сами файлы идемпотентны (IF NOT EXISTS),
+поэтому их можно применять и к базе, созданной по текущим моделям.
+
+Запуск вручную: python -m app.db.migrate
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.session import engine as default_engine
+
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Ключ advisory lock: реплики, стартующие одновременно, применяют миграции по очереди
+MIGRATION_LOCK_KEY = 4_210_002
+
+
+def split_statements(sql: str) -> List[str]:
+    """Делит файл миграции на операторы по «;» в конце строки.
+
+    Тела $$ ... $$ (DO-блоки) не делятся; комментарии-строки отбрасываются.
+    """
+    statements, current, in_body = [], [], False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        current.append(line)
+        if stripped.count("$$") % 2:
+            in_body = not in_body
+        if not in_body and stripped.endswith(";"):
+            statements.append("\n".join(current).strip().rstrip(";"))
+            current = []
+    if current:
+        statements.append("\n".join(current).strip().rstrip(";"))
+    return statements
+
+
+def pending_migrations(applied: Set[str]) -> List[Path]:
+    return [path for path in sorted(MIGRATIONS_DIR.glob("*.sql")) if path.stem not in applied]
+
+
+async def apply_migrations(engine: AsyncEngine = default_engine) -> List[str]:
+    """Применяет ещё не применённые миграции, возвращает их имена."""
+    done = []
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            await conn.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "version varchar(255) PRIMARY KEY, "
+                    "applied_at timestamp NOT NULL DEFAULT now())"
+                )
+            )
+            await conn.commit()
+
+            applied = set((await conn.execute(text("SELECT version FROM schema_migrations"))).scalars())
+            for path in pending_migrations(applied):
+                for statement in split_statements(path.read_text(encoding="utf-8")):
+                    await conn.exec_driver_sql(statement)
+                await conn.execute(
+                    text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                    {"version": path.stem},
+                )
+                await conn.commit()
+                done.append(path.stem)
+                logger.info(f"Применена миграция {path.stem}")
+        except Exception:
+            await conn.rollback()
+            raise
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            await conn.commit()
+    return done
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(apply_migrations())
@@ -4,14 +4,17 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     Column,
+    Computed,
     DateTime,
     Enum as SQLAlchemyEnum,
     ForeignKey,
     Index,
     Integer,
+    Numeric,
     String,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
@@ -21,6 +24,26 @@ from sqlalchemy.orm import relationship
 Base = declarative_base()
 
 
+def _filter_text(key: str, lower: bool = True) -> Computed:
+    value = f"btrim(filters_json->>'{key}')"
+    if lower:
+        value = f"lower({value})"
+    return Computed(
+        f"CASE WHEN jsonb_typeof(filters_json->'{key}') = 'string' "
+        f"THEN NULLIF({value}, '') END",
+        persisted=True,
+    )
+
+
+def _filter_bound(key: str) -> Computed:
+    # 0 в filters_json, как и отсутствие ключа, означает «без границы»
+    return Computed(
+        f"CASE WHEN jsonb_typeof(filters_json->'{key}') = 'number' "
+        f"THEN NULLIF((filters_json->>'{key}')::numeric, 0) END",
+        persisted=True,
+    )
+
+
 class SubscriptionStatus(PyEnum):
     trial = "trial"
     active = "active"
@@ -38,12 +61,20 @@ class User(Base):
         nullable=False,
     )
     subscription_end = Column(DateTime, nullable=True)
+    # Присылать совпадения одним сообщением за окно DIGEST_WINDOW
+    digest_enabled = Column(Boolean, default=False, server_default="false", nullable=False)
+    # Когда Telegram сообщил, что чат недоступен (бот заблокирован, аккаунт удалён)
+    blocked_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
     filter_sets = relationship(
         "FilterSet", back_populates="user", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("ix_users_subscription", "subscription_status", "subscription_end"),
+    )
+
 
 class FilterSet(Base):
     __tablename__ = "filter_sets"
@@ -56,8 +87,34 @@ class FilterSet(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+    # Поля filters_json в виде колонок для сопоставления объявлений в SQL
+    brand = Column(String, _filter_text("brand", lower=False))
+    # normalize_brand(brand) — вычисляется в Python при записи фильтра (crud)
+    canonical_brand = Column(String(50), nullable=True)
+    model = Column(String, _filter_text("model"))
+    min_year = Column(Numeric, _filter_bound("min_year"))
+    max_year = Column(Numeric, _filter_bound("max_year"))
+    min_price = Column(Numeric, _filter_bound("min_price"))
+    max_price = Column(Numeric, _filter_bound("max_price"))
+    max_mileage = Column(Numeric, _filter_bound("max_mileage"))
+    region = Column(String, _filter_text("region"))
+
     user = relationship("User", back_populates="filter_sets")
 
+    __table_args__ = (
+        Index("ix_filter_sets_active_user", "user_id", postgresql_where=text("is_active")),
+        Index(
+            "ix_filter_sets_active_brand_price",
+            "canonical_brand", "min_price", "max_price",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_filter_sets_active_any_brand_price",
+            "min_price", "max_price",
+            postgresql_where=text("is_active AND brand IS NULL"),
+        ),
+    )
+
 
 class Ad(Base):
     __tablename__ = "ads"
@@ -68,12 +125,15 @@ class Ad(Base):
     title = Column(String(255), nullable=False)
     price = Column(Integer, nullable=True, index=True)
     brand = Column(String(100), nullable=True, index=True)
+    canonical_brand = Column(String(50), nullable=True, index=True)
     model = Column(String(100), nullable=True, index=True)
     year = Column(Integer, nullable=True, index=True)
     mileage = Column(Integer, nullable=True, index=True)
     region = Column(String(100), nullable=True, index=True)
     url = Column(String(512), nullable=False)
     photo_url = Column(String(512), nullable=True)
+    # file_id фото в Telegram после первой отправки — для повторной отправки без скачивания
+    photo_file_id = Column(String(255), nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     parsed_at = Column(DateTime, server_default=func.now(), nullable=False)
 
@@ -81,6 +141,7 @@ class Ad(Base):
         UniqueConstraint("source", "external_id", name="unique_ad_source_external"),
         Index("ix_ads_brand_model_year", "brand", "model", "year"),
         Index("ix_ads_price_region", "price", "region"),
+        Index("ix_ads_source_parsed_at", "source", "parsed_at"),
     )
 
 
@@ -111,4 +172,61 @@ class SentNotification(Base):
         UniqueConstraint(
             "user_id", "ad_id", "filter_id", name="unique_user_ad_filter"
         ),
-    )
\ No newline at end of file
+    )
+
+
+class OutboxStatus(PyEnum):
+    pending = "pending"
+    sending = "sending"
+    delivered = "delivered"
+    failed = "failed"
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        BigInteger,
+        ForeignKey("users.telegram_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    ad_id = Column(
+        Integer,
+        ForeignKey("ads.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    filter_id = Column(
+        Integer,
+        ForeignKey("filter_sets.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    filter_name = Column(String(100), nullable=False)
+    status = Column(
+        SQLAlchemyEnum(OutboxStatus),
+        default=OutboxStatus.pending,
+        server_default=OutboxStatus.pending.value,
+        nullable=False,
+    )
+    digest = Column(Boolean, default=False, server_default="false", nullable=False)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    # Для pending — когда можно отправлять, для sending — когда истекает захват
+    available_at = Column(DateTime, server_default=func.now(), nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "ad_id", "filter_id", name="unique_outbox_user_ad_filter"
+        ),
+        Index("ix_notification_outbox_status_available", "status", "available_at"),
+    )
+
+
+class CrawlState(Base):
+    __tablename__ = "crawl_state"
+
+    source = Column(String(50), primary_key=True)
+    high_water_id = Column(BigInteger, nullable=True)
+    recent_external_ids = Column(JSONB, nullable=False, default=list)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
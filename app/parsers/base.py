@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+import aiohttp
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
+)
+
+
+class AdSource(ABC):
+    """Источник объявлений: адреса страниц выдачи и разбор страницы в словари
+    с ключами колонок Ad; экземпляр уходит в пул процессов и должен pickle'иться."""
+
+    name: str = ""
+    base_url: str = ""
+
+    def __init__(self, max_pages: int = 50, concurrency: int = 5, request_delay: float = 0.5) -> None:
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.request_delay = request_delay
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "User-Agent": USER_AGENT,
+            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+            "Referer": f"{self.base_url}/",
+        }
+
+    @abstractmethod
+    def page_url(self, page: int) -> str:
+        """Адрес страницы выдачи, страницы нумеруются с 1."""
+
+    @abstractmethod
+    def parse_page(self, html: str) -> Tuple[List[Dict], int]:
+        """Объявления со страницы и число найденных карточек (в том числе
+        отброшенных — по нему видно, что разметка сайта не сломалась)."""
+
+    async def enrich(self, session: aiohttp.ClientSession, page_ads: List[Dict]) -> List[Dict]:
+        """Дополняет объявления страницы данными из карточек объявлений.
+
+        Вызывается перед сохранением страницы; по умолчанию ничего не делает.
+        """
+        return page_ads
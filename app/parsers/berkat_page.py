@@ -0,0 +1,329 @@
+import hashlib
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import lxml.html
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+from lxml import etree
+
+from app.parsers.base import AdSource
+from app.parsers.title_classifier import classify_title
+from app.utils.brands import normalize_brand
+
+
+# Модуль не трогает БД и бота, чтобы его можно было импортировать
+# в процессах пула парсинга.
+logger = logging.getLogger(__name__)
+
+
+SOURCE = "berkat.ru"
+BASE_URL = "https://berkat.ru"
+SEARCH_URL = f"{BASE_URL}/avto"
+
+PRICE_TEXT_RE = re.compile(r"₽|руб|тыс", re.I)
+PRICE_NUMBER_RE = re.compile(r"(\d[\d\s]*)")
+MILEAGE_TEXT_RE = re.compile(r"пробег|км|тыс\.?", re.I)
+MILEAGE_VALUE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:тыс\.?|т\.?|км)", re.I)
+REGION_TEXT_RE = re.compile(
+    r"Москва|СПб|Санкт-Петербург|Новосибирск|Екатеринбург|Казань|Нижн(?:ий|его)|Челябинск|"
+    r"Омск|Самара|Ростов|Уфа|Красноярск|Воронеж|Пермь|Волгоград|Назрань|Магас|"
+    r"Ингушетия|Чечня|Дагестан|Грозный|Дербент|Махачкала|Владикавказ|Краснодар|"
+    r"Сочи|Владивосток|Иркутск|Ярославль|Тюмень|Барнаул|Томск|Оренбург",
+    re.I,
+)
+YEAR_RE = re.compile(r"\b(19[89]\d|20[012]\d)\b")
+TITLE_CLASS = "board_list_item_title"
+
+
+PARSER_BACKENDS = ("bs4", "strainer", "lxml")
+
+_FOUND_KEYS = (
+    "title_h3", "title_link", "content_link", "any_link", "first_a",
+    "img", "price", "mileage", "region",
+)
+
+# Строки внутри этих тегов get_text() у BeautifulSoup не учитывает
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+# Во время разбора class ещё не разбит на список, поэтому сравниваем по словам
+_BLOCK_STRAINER = SoupStrainer(
+    "div", class_=lambda value: value is not None and "board_list_item" in value.split()
+)
+_BLOCK_XPATH = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' board_list_item ')]"
+)
+
+
+def _scan_text(found: Dict, text: str, parent) -> None:
+    # Для текстовых полей запоминаем родителя: из него берётся get_text
+    if found["price"] is None and PRICE_TEXT_RE.search(text):
+        found["price"] = parent
+    if found["mileage"] is None and MILEAGE_TEXT_RE.search(text):
+        found["mileage"] = parent
+    if found["region"] is None and REGION_TEXT_RE.search(text):
+        found["region"] = parent
+
+
+def _scan_tag(found: Dict, node, name: str, classes: List[str], is_in_title) -> None:
+    if name == "a":
+        if found["first_a"] is None:
+            found["first_a"] = node
+        href = node.get("href")
+        if href is None:
+            return
+        if found["any_link"] is None:
+            found["any_link"] = node
+        if found["content_link"] is None and "/content/" in href:
+            found["content_link"] = node
+        if found["title_link"] is None and found["title_h3"] is not None and is_in_title():
+            found["title_link"] = node
+    elif name == "h3":
+        if found["title_h3"] is None and TITLE_CLASS in classes:
+            found["title_h3"] = node
+    elif name == "img":
+        if found["img"] is None and node.get("src") is not None:
+            found["img"] = node
+
+
+def scan_block(block) -> Dict:
+    """За один обход поддерева карточки находит то, что раньше искалось
+    отдельными block.find: первые подходящие теги и текстовые узлы
+    (в том же порядке документа, что и find)."""
+    found = dict.fromkeys(_FOUND_KEYS)
+
+    for node in block.descendants:
+        if isinstance(node, NavigableString):
+            _scan_text(found, node, node.parent)
+            continue
+
+        _scan_tag(
+            found, node, node.name, node.get("class") or [],
+            lambda: any(parent is found["title_h3"] for parent in node.parents),
+        )
+
+    return found
+
+
+def scan_element(block) -> Dict:
+    """То же, что scan_block, для элемента lxml: текст узла и хвосты
+    дочерних элементов обходятся в порядке документа."""
+    found = dict.fromkeys(_FOUND_KEYS)
+
+    def walk(element) -> None:
+        for child in element:
+            if isinstance(child.tag, str):
+                _scan_tag(
+                    found, child, child.tag, (child.get("class") or "").split(),
+                    lambda: any(parent is found["title_h3"] for parent in child.iterancestors()),
+                )
+                if child.text:
+                    _scan_text(found, child.text, child)
+                walk(child)
+            elif child.text:
+                # Комментарий: его текст — строка внутри родителя
+                _scan_text(found, child.text, element)
+            if child.tail:
+                _scan_text(found, child.tail, element)
+
+    if block.text:
+        _scan_text(found, block.text, block)
+    walk(block)
+    return found
+
+
+def _element_strings(element):
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in _NON_TEXT_TAGS:
+            yield from _element_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _tag_text(tag) -> str:
+    return tag.get_text(strip=True)
+
+
+def _element_text(element) -> str:
+    """Аналог get_text(strip=True) для элемента lxml."""
+    return "".join(text.strip() for text in _element_strings(element))
+
+
+def parse_ad_block(block) -> Optional[Dict]:
+    return _build_ad(block, scan_block, _tag_text)
+
+
+def parse_ad_element(block) -> Optional[Dict]:
+    return _build_ad(block, scan_element, _element_text)
+
+
+def _build_ad(block, scan, text_of) -> Optional[Dict]:
+    try:
+        found = scan(block)
+
+        link_tag = found["title_link"]
+        if link_tag is None or not link_tag.get("href"):
+            link_tag = found["content_link"]
+
+        if link_tag is None or not link_tag.get("href"):
+            link_tag = found["any_link"]
+
+        if link_tag is None or not link_tag.get("href"):
+            return None
+
+        href = link_tag.get("href").strip()
+        url = urljoin(BASE_URL, href).strip()
+
+        external_id = url.rstrip("/").split("/")[-1].strip()
+        if not external_id.isdigit() or len(external_id) < 4:
+            external_id = hashlib.md5(url.encode('utf-8')).hexdigest()[:20]
+
+        title_tag = found["title_h3"] if found["title_h3"] is not None else found["first_a"]
+        title = text_of(title_tag) if title_tag is not None else ""
+
+        title_lower = title.lower()
+        
+        classification = classify_title(title_lower)
+        if classification.is_non_car:
+            logger.debug(f"Пропущено (не авто): {title[:50]}")
+            return None
+
+        brand = ""
+        model = ""
+
+        if classification.brand:
+            brand = classification.brand.capitalize()
+            model = title_lower[classification.brand_end:].strip().title()
+
+        if not brand:
+            logger.debug(f"Пропущено (бренд не определён): {title[:50]}")
+            return None
+
+        year_match = YEAR_RE.search(title)
+        year = int(year_match.group(1)) if year_match else None
+
+        price = None
+        price_tag = found["price"]
+        if price_tag is not None:
+            price_str = text_of(price_tag)
+            price_match = PRICE_NUMBER_RE.search(price_str.replace("\xa0", " "))
+            if price_match:
+                price_text = price_match.group(1).replace(" ", "").replace("\xa0", "")
+                try:
+                    price = int(price_text)
+                    if price < 100000 and ("тыс" in price_str.lower() or "т.р" in price_str.lower() or "т р" in price_str.lower()):
+                        price *= 1000
+                    if price < 5000 or price > 50000000:
+                        price = None
+                except (ValueError, OverflowError):
+                    price = None
+
+        mileage = None
+        mileage_tag = found["mileage"]
+        if mileage_tag is not None:
+            parent_text = text_of(mileage_tag)
+            mileage_match = MILEAGE_VALUE_RE.search(parent_text)
+            if mileage_match:
+                try:
+                    mileage_val_str = mileage_match.group(1).replace(",", ".").strip()
+                    mileage_val = float(mileage_val_str)
+                    
+                    unit = mileage_match.group(0).lower()
+                    if "тыс" in unit or "т." in unit or "т " in unit:
+                        mileage = int(mileage_val * 1000)
+                    else:
+                        mileage = int(mileage_val)
+                        
+                    if mileage < 1000 or mileage > 1000000:
+                        mileage = None
+                except (ValueError, TypeError, OverflowError):
+                    mileage = None
+
+        region = ""
+        region_tag = found["region"]
+        if region_tag is not None:
+            region = text_of(region_tag)[:50]
+
+        img_tag = found["img"]
+        photo_url = None
+        if img_tag is not None and img_tag.get("src"):
+            src = img_tag.get("src").strip()
+            if not src.startswith(("http://", "https://")):
+                photo_url = urljoin(BASE_URL, src)
+            else:
+                photo_url = src
+
+        parsed_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        return {
+            "source": SOURCE,
+            "external_id": external_id,
+            "title": title,
+            "price": price,
+            "brand": brand,
+            "canonical_brand": normalize_brand(brand),
+            "model": model[:100],
+            "year": year,
+            "mileage": mileage,
+            "region": region,
+            "url": url,
+            "photo_url": photo_url,
+            "parsed_at": parsed_at,
+        }
+
+    except Exception as e:
+        logger.error(f"Ошибка парсинга блока: {e}", exc_info=True)
+        return None
+
+
+def parse_page(html: str, backend: str = "bs4") -> Tuple[List[Dict], int]:
+    """Разбирает страницу выдачи: возвращает объявления-словари и число
+    найденных карточек.
+
+    backend: "bs4" — полное дерево BeautifulSoup; "strainer" — BeautifulSoup
+    строит только карточки объявлений; "lxml" — XPath по lxml.html без
+    BeautifulSoup. Результат у всех трёх одинаковый.
+    """
+    if backend == "lxml":
+        ad_blocks = _BLOCK_XPATH(lxml.html.fromstring(html))
+        parse_block = parse_ad_element
+    elif backend == "strainer":
+        soup = BeautifulSoup(html, "lxml", parse_only=_BLOCK_STRAINER)
+        ad_blocks = soup.select("div.board_list_item")
+        parse_block = parse_ad_block
+    elif backend == "bs4":
+        soup = BeautifulSoup(html, "lxml")
+        ad_blocks = soup.select("div.board_list_item")
+        parse_block = parse_ad_block
+    else:
+        raise ValueError(f"Неизвестный backend парсера: {backend}")
+
+    page_ads = []
+    for block in ad_blocks:
+        ad_data = parse_block(block)
+        if ad_data:
+            page_ads.append(ad_data)
+
+    return page_ads, len(ad_blocks)
+
+
+class BerkatSource(AdSource):
+    """Раздел «Авто» на berkat.ru."""
+
+    name = SOURCE
+    base_url = BASE_URL
+
+    def __init__(self, backend: str = "lxml", search_url: str = SEARCH_URL, **limits) -> None:
+        super().__init__(**limits)
+        self.backend = backend
+        self.search_url = search_url
+
+    def page_url(self, page: int) -> str:
+        return f"{self.search_url}?page={page}" if page > 1 else self.search_url
+
+    def parse_page(self, html: str) -> Tuple[List[Dict], int]:
+        return parse_page(html, self.backend)
@@ -1,487 +1,60 @@
+"""Прежняя точка входа парсера berkat.ru.
+
+Обход источников перенесён в app.parsers.crawler; модуль оставлен, чтобы
+ручной запуск `python -m app.parsers.berkat_parser` и прежние функции
+модуля продолжали работать.
+"""
 import asyncio
-import logging
-import os
-import re
-import hashlib
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List
 
 import aiohttp
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
 
-from app.bot.telegram_bot import send_ad_notification
-from app.db.crud import (
-    get_ad_by_source_external,
-    get_all_active_filters,
-    has_sent_notification,
-    mark_notification_sent,
-)
-from app.db.models import Ad, FilterSet
+from app.db.crud import insert_new_ads
+from app.db.models import Ad
 from app.db.session import async_session
+# parse_ad_block — для прежних импортов из этого модуля
+from app.parsers.berkat_page import parse_ad_block
+from app.parsers.crawler import crawl_source, enqueue_matches, logger, parse_pages, run_once
+from app.parsers.sources import SOURCES
+from app.tasks.outbox import outbox_worker
 
 
-os.makedirs("logs", exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("logs/berkat_parser.log", encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
-logger = logging.getLogger(__name__)
-
-
-BASE_URL = "https://berkat.ru"
-SEARCH_URL = "https://berkat.ru/avto"
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-    "(KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
-    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-    "Referer": f"{BASE_URL}/",
-}
-
-
-async def fetch(session: aiohttp.ClientSession, url: str) -> Optional[str]:
-    url = url.strip()
-    
-    try:
-        async with session.get(url, headers=HEADERS, timeout=15) as resp:
-            if resp.status == 200:
-                logger.info(f"Успешно загружена страница: {url}")
-                return await resp.text()
-            logger.warning(f"[{resp.status}] {url}")
-            return None
-    except asyncio.TimeoutError:
-        logger.error(f"Таймаут при загрузке {url}")
-        return None
-    except Exception as e:
-        logger.error(f"Ошибка загрузки {url}: {e}")
-        return None
-
-
-def matches_filter(ad: Dict, filter_set: FilterSet) -> bool:
-    try:
-        filters = filter_set.filters_json
-        ad_title = ad.get("title", "")[:40]
-        filter_name = filter_set.name
-
-        logger.info(f"Проверка: '{ad_title}...' vs фильтр '{filter_name}'")
-
-        brand = filters.get("brand")
-        if brand:
-            ad_brand = ad.get("brand", "").lower().strip()
-            filter_brand = brand.lower().strip()
-
-            BRAND_SYNONYMS = {
-                "lada": [
-                    "lada", "лада", "ваз", "ваза", "вазик", "жигули", "жигуль",
-                    "классика", "копейка", "шестерка", "семерка", "восьмерка",
-                    "девятка", "десятка", "приора", "приору", "гранта", "гранту",
-                    "калина", "калину", "веста", "весту",
-                ],
-                "renault": ["renault", "рено", "реноль", "ренуо", "ренаулт"],
-                "kia": ["kia", "киа", "кья", "киас", "киашка"],
-                "hyundai": ["hyundai", "хендай", "хюндай", "хендэ"],
-                "nissan": ["nissan", "ниссан", "нисан"],
-                "toyota": ["toyota", "тойота", "тоета"],
-                "mazda": ["mazda", "мазда", "мазды"],
-                "volkswagen": ["volkswagen", "фольксваген", "ваген", "жук"],
-                "skoda": ["skoda", "шкода", "шкодовский"],
-                "ford": ["ford", "форд", "форды"],
-                "chevrolet": ["chevrolet", "шевроле", "шевроль"],
-                "bmw": ["bmw", "бмв", "бэха", "беха", "беху"],
-                "mercedes": ["mercedes", "мерседес", "мерс"],
-                "audi": ["audi", "ауди", "аудик"],
-                "volvo": ["volvo", "вольво", "волво"],
-                "subaru": ["subaru", "субару", "субарус"],
-                "honda": ["honda", "хонда", "хондуля"],
-                "suzuki": ["suzuki", "сузуки", "сузукис"],
-                "mitsubishi": ["mitsubishi", "мицубиси", "мицубиша"],
-                "opel": ["opel", "опель", "опелек"],
-                "daewoo": ["daewoo", "дэу", "даеву"],
-                "gaz": ["gaz", "газ", "газель", "газик"],
-                "uaz": ["uaz", "уаз", "уазик", "буханка"],
-                "moskvich": ["moskvich", "москвич", "москвичи"],
-            }
-
-            ad_brand_clean = "".join(c for c in ad_brand if c.isalnum() or c in " -_")
-            matched_brand = False
-
-            for canonical, synonyms in BRAND_SYNONYMS.items():
-                if filter_brand in synonyms or filter_brand == canonical:
-                    for syn in synonyms:
-                        if syn in ad_brand_clean or ad_brand_clean in syn:
-                            matched_brand = True
-                            break
-                    if matched_brand:
-                        break
-
-            if not matched_brand:
-                return False
-
-        model = filters.get("model")
-        if model:
-            ad_model = ad.get("model", "").lower().strip()
-            filter_model = model.lower().strip()
-            if filter_model not in ad_model:
-                return False
-
-        ad_year = ad.get("year")
-        if ad_year is not None:
-            min_year = filters.get("min_year")
-            max_year = filters.get("max_year")
-            if min_year and ad_year < min_year:
-                return False
-            if max_year and ad_year > max_year:
-                return False
-
-        ad_price = ad.get("price")
-        if ad_price is not None:
-            min_price = filters.get("min_price")
-            max_price = filters.get("max_price")
-            if min_price and ad_price < min_price:
-                return False
-            if max_price and ad_price > max_price:
-                return False
-
-        ad_mileage = ad.get("mileage")
-        if ad_mileage is not None:
-            max_mileage = filters.get("max_mileage")
-            if max_mileage and ad_mileage > max_mileage:
-                return False
-
-        region = filters.get("region")
-        if region:
-            ad_region = ad.get("region", "").lower().strip()
-            filter_region = region.lower().strip()
-
-            CITY_TO_REGION = {
-                "назрань": "ингушетия",
-                "магас": "ингушетия",
-                "карабулак": "ингушетия",
-                "грозный": "чечня",
-                "шали": "чечня",
-                "махачкала": "дагестан",
-                "дербент": "дагестан",
-                "москва": "москва",
-                "мск": "москва",
-                "санкт-петербург": "санкт-петербург",
-                "спб": "санкт-петербург",
-                "питер": "санкт-петербург",
-            }
-
-            ad_region_norm = CITY_TO_REGION.get(ad_region, ad_region)
-            if filter_region not in ad_region_norm and ad_region_norm not in filter_region:
-                return False
-
-        return True
-
-    except Exception as e:
-        logger.error(f"Ошибка в матчинге: {e}", exc_info=True)
-        return False
-
-
-def parse_ad_block(block) -> Optional[Dict]:
-    try:
-        link_tag = block.find("h3", class_="board_list_item_title")
-        if link_tag:
-            link_tag = link_tag.find("a", href=True)
-
-        if not link_tag or not link_tag.get("href"):
-            link_tag = block.find("a", href=lambda href: href and "/content/" in href)
-
-        if not link_tag or not link_tag.get("href"):
-            link_tag = block.find("a", href=True)
-
-        if not link_tag or not link_tag.get("href"):
-            return None
-
-        href = link_tag["href"].strip()
-        url = urljoin(BASE_URL, href).strip()
-
-        external_id = url.rstrip("/").split("/")[-1].strip()
-        if not external_id.isdigit() or len(external_id) < 4:
-            external_id = hashlib.md5(url.encode('utf-8')).hexdigest()[:20]
-
-        title_tag = block.find("h3", class_="board_list_item_title") or block.find("a")
-        title = title_tag.get_text(strip=True) if title_tag else ""
-
-        title_lower = title.lower()
-        
-        non_car_patterns = [
-            r'\bэвакуатор\b', r'\bустановка гбо\b', r'\bремонт\b', r'\bпокраска\b', 
-            r'\bдиагностика\b', r'\bшиномонтаж\b', r'\bзапчасти?\b', r'\bдетали?\b',
-            r'\bаренда авто\b', r'\bпрокат авто\b', r'\bгрузовой\b', r'\bгрузовик\b',
-            r'\bкамаз\b', r'\bавтобус\b', r'\bприцеп\b', r'\bмотоцикл\b',
-            r'\bскутер\b', r'\bквадроцикл\b', r'\bвыкуп авто\b', r'\bзалог\b',
-            r'\bна запчасти?\b', r'\bбиты[йя]\b', r'\bаварийн[ыао]\b', r'\bколпаки?\b',
-            r'\bголовка\b', r'\bдвигател\b', r'\bкузовн(ые)?\b', r'\bсалонн(ые)?\b',
-            r'\bстекло\b', r'\bфара\b', r'\bбампер\b', r'\bдверь\b', r'\bкрыло\b',
-            r'\bкапот\b', r'\bбагажник\b', r'\bсиденья?\b', r'\bрулев(ой|ая)\b',
-        ]
-        
-        if any(re.search(pattern, title_lower) for pattern in non_car_patterns):
-            logger.debug(f"Пропущено (не авто): {title[:50]}")
-            return None
-
-        known_brands = [
-            "гранта", "гранту", "гранте", "гранты", "грантой",
-            "лада", "ладу", "ладе", "лады", "ладой",
-            "ваз", "вазу", "вазе", "вазы", "вазой",
-            "приора", "приору", "приоре", "приоры", "приорой",
-            "калина", "калину", "калине", "калины", "калиной",
-            "веста", "весту", "весте", "весты", "вестой",
-            "ренуо", "renault", "рено",
-            "киа", "kia", "хендай", "hyundai", "тойота", "toyota", "ниссан",
-            "nissan", "мазда", "mazda", "мицубиси", "mitsubishi", "шкода",
-            "skoda", "фольксваген", "волкцваген", "volkswagen", "vw", "опель",
-            "opel", "форд", "ford", "шевроле", "шевролет", "chevrolet", "мерседес",
-            "мерс", "бмв", "бэха", "беха", "беху", "bmw", "ауди", "audi", "вольво",
-            "volvo", "субару", "subaru", "хонда", "хунда", "хонду", "honda",
-            "сузуки", "suzuki", "дэу", "даеву", "daewoo", "газель", "газ", "уаз",
-            "уазик", "moskvich", "москвич", "элантра", "elantra", "solaris",
-            "соларис", "рио", "rio", "creta", "крета", "джип", "jeep", "chery",
-            "черри", "лифан", "lifan", "geely", "джили", "газель", "gazel",
-        ]
-
-        brand = ""
-        model = ""
-        
-        for brand_candidate in known_brands:
-            if re.search(rf'\b{re.escape(brand_candidate)}\b', title_lower):
-                brand = brand_candidate.capitalize()
-                parts = re.split(rf'\b{re.escape(brand_candidate)}\b', title_lower, maxsplit=1)
-                if len(parts) > 1:
-                    model = parts[1].strip().title()
-                break
-
-        if not brand:
-            logger.debug(f"Пропущено (бренд не определён): {title[:50]}")
-            return None
-
-        year_match = re.search(r"\b(19[89]\d|20[012]\d)\b", title)
-        year = int(year_match.group(1)) if year_match else None
-
-        price = None
-        price_tag = block.find(string=re.compile(r"₽|руб|тыс", re.I))
-        if price_tag:
-            price_str = price_tag.find_parent().get_text(strip=True)
-            price_match = re.search(r"(\d[\d\s]*)", price_str.replace("\xa0", " "))
-            if price_match:
-                price_text = price_match.group(1).replace(" ", "").replace("\xa0", "")
-                try:
-                    price = int(price_text)
-                    if price < 100000 and ("тыс" in price_str.lower() or "т.р" in price_str.lower() or "т р" in price_str.lower()):
-                        price *= 1000
-                    if price < 5000 or price > 50000000:
-                        price = None
-                except (ValueError, OverflowError):
-                    price = None
-
-        mileage = None
-        mileage_text = block.find(string=re.compile(r"пробег|км|тыс\.?", re.I))
-        if mileage_text:
-            parent_text = mileage_text.find_parent().get_text(strip=True)
-            mileage_match = re.search(
-                r"(\d+(?:[.,]\d+)?)\s*(?:тыс\.?|т\.?|км)", parent_text, re.I
-            )
-            if mileage_match:
-                try:
-                    mileage_val_str = mileage_match.group(1).replace(",", ".").strip()
-                    mileage_val = float(mileage_val_str)
-                    
-                    unit = mileage_match.group(0).lower()
-                    if "тыс" in unit or "т." in unit or "т " in unit:
-                        mileage = int(mileage_val * 1000)
-                    else:
-                        mileage = int(mileage_val)
-                        
-                    if mileage < 1000 or mileage > 1000000:
-                        mileage = None
-                except (ValueError, TypeError, OverflowError):
-                    mileage = None
-
-        region = ""
-        region_tag = block.find(
-            string=re.compile(
-                r"Москва|СПб|Санкт-Петербург|Новосибирск|Екатеринбург|Казань|Нижн(?:ий|его)|Челябинск|"
-                r"Омск|Самара|Ростов|Уфа|Красноярск|Воронеж|Пермь|Волгоград|Назрань|Магас|"
-                r"Ингушетия|Чечня|Дагестан|Грозный|Дербент|Махачкала|Владикавказ|Краснодар|"
-                r"Сочи|Владивосток|Иркутск|Ярославль|Тюмень|Барнаул|Томск|Оренбург",
-                re.I,
-            )
-        )
-        if region_tag:
-            region = region_tag.find_parent().get_text(strip=True)[:50]
-
-        img_tag = block.find("img", src=True)
-        photo_url = None
-        if img_tag and img_tag.get("src"):
-            src = img_tag["src"].strip()
-            if not src.startswith(("http://", "https://")):
-                photo_url = urljoin(BASE_URL, src)
-            else:
-                photo_url = src
-
-        parsed_at = datetime.now(timezone.utc).replace(tzinfo=None)
-
-        return {
-            "source": "berkat.ru",
-            "external_id": external_id,
-            "title": title,
-            "price": price,
-            "brand": brand,
-            "model": model[:100],
-            "year": year,
-            "mileage": mileage,
-            "region": region,
-            "url": url,
-            "photo_url": photo_url,
-            "parsed_at": parsed_at,
-        }
-
-    except Exception as e:
-        logger.error(f"Ошибка парсинга блока: {e}", exc_info=True)
-        return None
-
-
-async def parse_berkat_pages(
-    session: aiohttp.ClientSession, max_pages: int = 5
-) -> List[Dict]:
-    all_ads = []
-    logger.info(f"Начало парсинга {max_pages} страниц berkat.ru")
-
-    for page in range(1, max_pages + 1):
-        url = f"{SEARCH_URL}?page={page}" if page > 1 else SEARCH_URL
-        html = await fetch(session, url)
-        if not html:
-            logger.warning(f"Страница {page} не загружена")
-            continue
-
-        soup = BeautifulSoup(html, "lxml")
-        ad_blocks = soup.select("div.board_list_item")
-
-        if not ad_blocks:
-            logger.warning(f"Страница {page}: карточки не найдены.")
-            continue
-
-        page_ads = []
-        for block in ad_blocks:
-            ad_data = parse_ad_block(block)
-            if ad_data:
-                page_ads.append(ad_data)
-
-        logger.info(
-            f"Страница {page}: найдено {len(ad_blocks)} блоков, "
-            f"спарсено {len(page_ads)} авто-объявлений (отфильтровано не-авто: {len(ad_blocks) - len(page_ads)})"
-        )
-        all_ads.extend(page_ads)
-
-    logger.info(f"Всего спарсено объявлений: {len(all_ads)}")
-    return all_ads
+async def parse_berkat_pages(session: aiohttp.ClientSession, **kwargs) -> List[Dict]:
+    """Объявления со страниц berkat.ru в порядке страниц."""
+    return await parse_pages(session, SOURCES["berkat.ru"], **kwargs)
 
 
 async def save_new_ads(ads: List[Dict]) -> List[Ad]:
-    saved_ads = []
-    saved_count = 0
-
+    """Сохраняет новые объявления без проверки фильтров, как раньше."""
     async with async_session() as db:
-        for ad_data in ads:
-            try:
-                existing = await get_ad_by_source_external(
-                    db, ad_data["source"], ad_data["external_id"]
-                )
-                if not existing:
-                    ad = Ad(**ad_data)
-                    db.add(ad)
-                    saved_ads.append(ad)
-                    saved_count += 1
-            except Exception as e:
-                logger.error(
-                    f"Ошибка сохранения объявления '{ad_data.get('title', 'N/A')}': {e}"
-                )
-
-        if saved_ads:
-            await db.commit()
-            for ad in saved_ads:
-                await db.refresh(ad)
-
-        logger.info(f"Сохранено новых объявлений: {saved_count} (из {len(ads)} спарсенных)")
-
+        saved_ads = await insert_new_ads(db, ads)
+    logger.info(f"Сохранено новых объявлений: {len(saved_ads)} (из {len(ads)} спарсенных)")
     return saved_ads
 
 
 async def check_filters_and_notify(saved_ads: List[Ad]) -> None:
-    if not saved_ads:
-        logger.info("Нет новых объявлений для проверки фильтров")
-        return
-
-    logger.info(f"Проверка {len(saved_ads)} новых объявлений по фильтрам пользователей...")
-
+    """Ставит уведомления по совпавшим фильтрам в outbox и доставляет их."""
     async with async_session() as db:
-        active_filters = await get_all_active_filters(db)
-        logger.info(f"Найдено активных фильтров: {len(active_filters)}")
-
-        notifications_sent = 0
-        for ad in saved_ads:
-            for filter_set in active_filters:
-                if matches_filter(ad.__dict__, filter_set):
-                    if await has_sent_notification(db, filter_set.user_id, ad.id, filter_set.id):
-                        logger.debug(
-                            f"Уведомление пропущено (уже отправлялось): "
-                            f"пользователь={filter_set.user_id}, объявление={ad.id}, фильтр={filter_set.id}"
-                        )
-                        continue
-
-                    try:
-                        await send_ad_notification(
-                            telegram_id=filter_set.user_id,
-                            ad=ad,
-                            filter_name=filter_set.name,
-                        )
-                        await mark_notification_sent(db, filter_set.user_id, ad.id, filter_set.id)
-                        notifications_sent += 1
-                        logger.info(
-                            f"✅ Уведомление отправлено пользователю {filter_set.user_id} "
-                            f"по фильтру '{filter_set.name}': {ad.title[:40]}..."
-                        )
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления пользователю {filter_set.user_id}: {e}")
-
-        logger.info(f"Всего отправлено уведомлений: {notifications_sent}")
-
-
-async def berkat_parse_task_async() -> None:
-    start_time = datetime.now()
-    logger.info("=" * 60)
-    logger.info(f"[{start_time}] Запуск парсинга berkat.ru...")
+        try:
+            queued = await enqueue_matches(db, saved_ads)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            ads = await parse_berkat_pages(session, max_pages=5)
-            if ads:
-                saved_ads = await save_new_ads(ads)
-                if saved_ads:
-                    await check_filters_and_notify(saved_ads)
-                else:
-                    logger.info("Новые объявления не найдены (все уже в БД).")
-            else:
-                logger.warning("Авто-объявления не найдены на сайте.")
+    logger.info(f"Поставлено в outbox уведомлений: {queued}")
+    if queued:
+        await outbox_worker.drain()
 
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
-        logger.info(f"[{end_time}] Парсинг завершён. Время выполнения: {duration:.2f} сек")
-        logger.info("=" * 60)
 
-    except Exception as e:
-        logger.error(f"Критическая ошибка при парсинге: {e}", exc_info=True)
-        raise
+async def berkat_parse_task_async() -> int:
+    """Один обход berkat.ru с доставкой уведомлений; возвращает число новых
+    объявлений."""
+    saved = await crawl_source(SOURCES["berkat.ru"])
+    await outbox_worker.drain()
+    return saved
 
 
 if __name__ == "__main__":
     logger.info("Ручной запуск парсера berkat.ru")
-    asyncio.run(berkat_parse_task_async())
\ No newline at end of file
+    asyncio.run(run_once([SOURCES["berkat.ru"]]))
@@ -0,0 +1,511 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import aiohttp
+from sqlalchemy.ext.asyncio import AsyncSession
+from urllib.parse import urlparse
+
+from app.bot.notifier import notification_dispatcher
+from app.core.config import settings
+from app.db.crud import (
+    enqueue_notifications,
+    get_crawl_state,
+    get_existing_external_ids,
+    get_unsent_notifications,
+    insert_new_ads,
+    match_ads_to_filters,
+    save_crawl_state,
+)
+from app.db.models import Ad, CrawlState
+from app.db.session import async_session
+from app.parsers.base import AdSource
+from app.parsers.matching import get_filter_index
+from app.parsers.page_cache import PageCache
+from app.parsers.sources import enabled_sources
+from app.tasks.outbox import outbox_worker
+
+
+os.makedirs("logs", exist_ok=True)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        # Прежнее имя файла: на него настроены ротация и просмотр логов
+        logging.FileHandler("logs/berkat_parser.log", encoding="utf-8"),
+        logging.StreamHandler(),
+    ],
+)
+logger = logging.getLogger(__name__)
+
+
+class HostThrottle:
+    """Выдерживает минимальную паузу между запросами к одному хосту."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_request: Dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        if self.delay <= 0:
+            return
+
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            last = self._last_request.get(host)
+            if last is not None:
+                pause = self.delay - (loop.time() - last)
+                if pause > 0:
+                    await asyncio.sleep(pause)
+            self._last_request[host] = loop.time()
+
+
+async def fetch(
+    session: aiohttp.ClientSession,
+    url: str,
+    throttle: Optional[HostThrottle] = None,
+    cache: Optional[PageCache] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[str]:
+    """Загружает страницу. С cache отправляет условный запрос и на 304
+    возвращает сохранённую ранее версию."""
+    url = url.strip()
+
+    if throttle is not None:
+        await throttle.wait(url)
+
+    headers = headers or {}
+    if cache is not None:
+        headers = {**headers, **cache.conditional_headers(url)}
+
+    try:
+        async with session.get(url, headers=headers, timeout=15) as resp:
+            if resp.status == 200:
+                logger.info(f"Успешно загружена страница: {url}")
+                html = await resp.text()
+                if cache is not None:
+                    cache.remember_response(
+                        url, html, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+                    )
+                return html
+            if resp.status == 304 and cache is not None:
+                html = cache.not_modified_html(url)
+                if html is not None:
+                    logger.info(f"Страница не изменилась (304): {url}")
+                    return html
+            logger.warning(f"[{resp.status}] {url}")
+            return None
+    except asyncio.TimeoutError:
+        logger.error(f"Таймаут при загрузке {url}")
+        return None
+    except Exception as e:
+        logger.error(f"Ошибка загрузки {url}: {e}")
+        return None
+
+
+# Живёт между циклами парсинга: валидаторы и результаты разбора по URL
+page_cache = PageCache()
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Пул процессов для разбора HTML; None, если PARSER_WORKERS = 0."""
+    global _parse_pool
+    if _parse_pool is None and settings.PARSER_WORKERS > 0:
+        _parse_pool = ProcessPoolExecutor(max_workers=settings.PARSER_WORKERS)
+        logger.info(f"Запущен пул парсинга: {settings.PARSER_WORKERS} процесс(ов)")
+    return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+        logger.info("Пул парсинга остановлен")
+
+
+async def parse_page_async(source: AdSource, html: str, page: int) -> List[Dict]:
+    """Разбирает страницу в пуле процессов, не занимая event loop бота."""
+    pool = get_parse_pool()
+    if pool is None:
+        page_ads, blocks_count = source.parse_page(html)
+    else:
+        loop = asyncio.get_running_loop()
+        try:
+            page_ads, blocks_count = await loop.run_in_executor(pool, source.parse_page, html)
+        except BrokenProcessPool:
+            logger.error(f"Пул парсинга упал на странице {page} ({source.name}), пересоздаём")
+            shutdown_parse_pool()
+            page_ads, blocks_count = await loop.run_in_executor(get_parse_pool(), source.parse_page, html)
+
+    if not blocks_count:
+        logger.warning(f"{source.name}, страница {page}: карточки не найдены.")
+        return []
+
+    logger.info(
+        f"{source.name}, страница {page}: найдено {blocks_count} блоков, "
+        f"спарсено {len(page_ads)} авто-объявлений (отфильтровано не-авто: {blocks_count - len(page_ads)})"
+    )
+    return page_ads
+
+
+# Сколько последних external_id хранить как отметку предыдущего обхода
+RECENT_IDS_LIMIT = 200
+
+# high_water_id — BigInteger; более длинные числовые id отметкой не считаются
+MAX_HIGH_WATER_DIGITS = 18
+
+
+def _numeric_id(external_id: str) -> Optional[int]:
+    if external_id.isascii() and external_id.isdigit() and len(external_id) <= MAX_HIGH_WATER_DIGITS:
+        return int(external_id)
+    return None
+
+
+class IncrementalCrawl:
+    """Останавливает обход на первой странице, где все объявления не новее
+    отметки прошлого обхода или уже есть в БД."""
+
+    def __init__(self, source: str, state: Optional[CrawlState] = None) -> None:
+        self.source = source
+        self.high_water_id: Optional[int] = state.high_water_id if state else None
+        self.recent_ids: Set[str] = set(state.recent_external_ids or []) if state else set()
+        self.seen_ids: List[str] = []
+        # Впервые увиденные в этом обходе: их могли уже сохранить с предыдущих страниц
+        self.new_ids: Set[str] = set()
+        self.failed_pages: List[int] = []
+
+    def _is_behind_high_water(self, external_id: str) -> bool:
+        if external_id in self.recent_ids:
+            return True
+        numeric_id = _numeric_id(external_id)
+        if self.high_water_id is not None and numeric_id is not None:
+            return numeric_id <= self.high_water_id
+        return False
+
+    def page_failed(self, page: int) -> None:
+        self.failed_pages.append(page)
+
+    async def __call__(self, page: int, page_ads: List[Dict]) -> bool:
+        page_ids = [ad["external_id"] for ad in page_ads]
+        self.seen_ids.extend(page_ids)
+        if not page_ids:
+            return False
+
+        unknown = {ext_id for ext_id in page_ids if not self._is_behind_high_water(ext_id)}
+        if unknown:
+            async with async_session() as db:
+                existing = await get_existing_external_ids(db, self.source, unknown)
+            fresh = (unknown - existing) | (unknown & self.new_ids)
+            self.new_ids |= fresh
+            if fresh:
+                return False
+
+        logger.info(f"Страница {page} целиком из известных объявлений — обход остановлен")
+        return True
+
+    async def save(self) -> None:
+        if not self.seen_ids:
+            return
+        # Иначе объявления с незагруженной страницы оказались бы за отметкой
+        if self.failed_pages:
+            logger.warning(
+                f"{self.source}: не загружены страницы {self.failed_pages}, "
+                f"отметка обхода не сдвигается"
+            )
+            return
+
+        numeric_ids = [_numeric_id(ext_id) for ext_id in self.seen_ids]
+        numeric_ids = [ext_id for ext_id in numeric_ids if ext_id is not None]
+        if self.high_water_id is not None:
+            numeric_ids.append(self.high_water_id)
+        high_water_id = max(numeric_ids) if numeric_ids else None
+
+        recent = list(dict.fromkeys(self.seen_ids))[:RECENT_IDS_LIMIT]
+
+        async with async_session() as db:
+            await save_crawl_state(db, self.source, high_water_id, recent)
+
+
+async def crawl_pages(
+    session: aiohttp.ClientSession,
+    source: AdSource,
+    on_page: Callable[[int, List[Dict]], Awaitable[None]],
+    max_pages: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    request_delay: Optional[float] = None,
+    should_stop: Optional[Callable[[int, List[Dict]], Awaitable[bool]]] = None,
+    on_failed: Optional[Callable[[int], None]] = None,
+    cache: Optional[PageCache] = None,
+    parse_workers: Optional[int] = None,
+    save_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+) -> int:
+    """Обходит страницы 1..max_pages конвейером загрузка → разбор → enrich →
+    on_page на ограниченных очередях; возвращает число обработанных страниц."""
+    if cache is None:
+        cache = page_cache
+    max_pages = max_pages or source.max_pages
+    concurrency = max(1, concurrency or source.concurrency)
+    if request_delay is None:
+        request_delay = source.request_delay
+    parse_workers = max(1, parse_workers or settings.PARSER_WORKERS)
+    save_workers = max(1, save_workers or settings.PARSER_SAVE_WORKERS)
+    queue_size = max(1, queue_size or settings.PARSER_QUEUE_SIZE)
+
+    logger.info(
+        f"Начало парсинга до {max_pages} страниц {source.name} "
+        f"(загрузка: {concurrency}, разбор: {parse_workers}, сохранение: {save_workers}, "
+        f"пауза: {request_delay} сек)"
+    )
+
+    throttle = HostThrottle(request_delay)
+    fetched: asyncio.Queue = asyncio.Queue(queue_size)
+    parsed: asyncio.Queue = asyncio.Queue(queue_size)
+    ready: asyncio.Queue = asyncio.Queue(queue_size)
+    # Страниц в работе не больше окна: медленная страница, которую ждёт
+    # упорядочивание, не даёт загрузке уйти далеко вперёд
+    window = asyncio.Semaphore(concurrency + 2 * queue_size)
+    pages = iter(range(1, max_pages + 1))
+    stop = asyncio.Event()
+    processed = 0
+
+    async def fetch_stage() -> None:
+        while True:
+            await window.acquire()
+            page = next(pages, None)
+            if page is None or stop.is_set():
+                return
+            url = source.page_url(page)
+            html = await fetch(session, url, throttle, cache, source.headers)
+            await fetched.put((page, url, html))
+
+    async def parse_stage() -> None:
+        while True:
+            page, url, html = await fetched.get()
+            if not html:
+                logger.warning(f"{source.name}, страница {page} не загружена")
+                page_ads = None
+            else:
+                page_ads = cache.cached_ads(url, html)
+                if page_ads is not None:
+                    logger.info(f"{source.name}, страница {page} не изменилась, разбор пропущен")
+                else:
+                    page_ads = await parse_page_async(source, html, page)
+                    cache.store_ads(url, html, page_ads)
+            await parsed.put((page, page_ads))
+
+    async def order_stage() -> None:
+        # Разбор завершается не по порядку, а should_stop нужен по порядку страниц
+        done: Dict[int, List[Dict]] = {}
+        for page in range(1, max_pages + 1):
+            while page not in done:
+                parsed_page, page_ads = await parsed.get()
+                done[parsed_page] = page_ads
+            page_ads = done.pop(page)
+            window.release()
+            if page_ads is None:
+                # Незагруженная страница идёт дальше пустой
+                if on_failed is not None:
+                    on_failed(page)
+                page_ads = []
+
+            # Страница, на которой обход остановлен, ещё сохраняется
+            finished = should_stop is not None and await should_stop(page, page_ads)
+            await ready.put((page, page_ads))
+            if finished:
+                stop.set()
+                break
+        for _ in range(save_workers):
+            await ready.put(None)
+
+    async def save_stage() -> None:
+        nonlocal processed
+        while True:
+            item = await ready.get()
+            if item is None:
+                return
+            page, page_ads = item
+            if page_ads:
+                page_ads = await source.enrich(session, page_ads)
+            await on_page(page, page_ads)
+            processed += 1
+
+    workers = [asyncio.create_task(fetch_stage()) for _ in range(concurrency)]
+    workers += [asyncio.create_task(parse_stage()) for _ in range(parse_workers)]
+    pipeline = [asyncio.create_task(order_stage())]
+    pipeline += [asyncio.create_task(save_stage()) for _ in range(save_workers)]
+
+    try:
+        pending = set(workers + pipeline)
+        while not all(task.done() for task in pipeline):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+    finally:
+        for task in workers + pipeline:
+            task.cancel()
+        await asyncio.gather(*workers, *pipeline, return_exceptions=True)
+
+    logger.info(f"{source.name}: обработано страниц: {processed}")
+    logger.info(f"Кэш страниц: {cache.stats()}")
+    return processed
+
+
+async def parse_pages(session: aiohttp.ClientSession, source: AdSource, **kwargs) -> List[Dict]:
+    """Обходит страницы как crawl_pages и возвращает все объявления в
+    порядке страниц."""
+    pages: Dict[int, List[Dict]] = {}
+
+    async def collect(page: int, page_ads: List[Dict]) -> None:
+        pages[page] = page_ads
+
+    await crawl_pages(session, source, collect, **kwargs)
+    all_ads = [ad for page in sorted(pages) for ad in pages[page]]
+    logger.info(f"Всего спарсено объявлений: {len(all_ads)}")
+    return all_ads
+
+
+async def save_new_ads(ads: List[Dict]) -> List[Ad]:
+    """Сохраняет новые объявления и в той же транзакции ставит уведомления
+    по совпавшим фильтрам в outbox."""
+    async with async_session() as db:
+        try:
+            saved_ads = await insert_new_ads(db, ads, commit=False)
+            queued = await enqueue_matches(db, saved_ads)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    logger.info(f"Сохранено новых объявлений: {len(saved_ads)} (из {len(ads)} спарсенных)")
+    logger.info(f"Поставлено в outbox уведомлений: {queued}")
+    if queued:
+        outbox_worker.wake()
+    return saved_ads
+
+
+async def enqueue_matches(db: AsyncSession, saved_ads: List[Ad]) -> int:
+    if not saved_ads:
+        logger.info("Нет новых объявлений для проверки фильтров")
+        return 0
+
+    logger.info(f"Проверка {len(saved_ads)} новых объявлений по фильтрам пользователей...")
+
+    if settings.MATCH_IN_DB:
+        rows = await match_ads_to_filters(db, [ad.id for ad in saved_ads])
+        return await enqueue_notifications(db, rows, settings.DIGEST_WINDOW)
+
+    filter_index = await get_filter_index(db)
+    logger.info(f"Найдено активных фильтров: {len(filter_index)}")
+
+    matches = filter_index.match_batch([ad.__dict__ for ad in saved_ads])
+
+    candidates = [
+        (filter_index.filter_sets[filter_id].user_id, ad.id, filter_id)
+        for ad, filter_ids in zip(saved_ads, matches)
+        for filter_id in filter_ids
+    ]
+    unsent = await get_unsent_notifications(db, candidates)
+    if len(unsent) < len(candidates):
+        logger.debug(f"Пропущено уже отправленных уведомлений: {len(candidates) - len(unsent)}")
+
+    rows = [
+        {
+            "user_id": user_id,
+            "ad_id": ad_id,
+            "filter_id": filter_id,
+            "filter_name": filter_index.filter_sets[filter_id].name,
+        }
+        for user_id, ad_id, filter_id in unsent
+    ]
+    return await enqueue_notifications(db, rows, settings.DIGEST_WINDOW)
+
+
+async def crawl_source(source: AdSource) -> int:
+    """Один обход источника; возвращает число новых сохранённых объявлений."""
+    start_time = datetime.now()
+    logger.info("=" * 60)
+    logger.info(f"[{start_time}] Запуск парсинга {source.name}...")
+
+    try:
+        connector = aiohttp.TCPConnector(limit_per_host=source.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            crawl = None
+            if settings.PARSER_INCREMENTAL:
+                async with async_session() as db:
+                    crawl = IncrementalCrawl(source.name, await get_crawl_state(db, source.name))
+
+            parsed = saved = 0
+
+            async def save_page(page: int, page_ads: List[Dict]) -> None:
+                # Новые объявления страницы сразу уходят в outbox, не дожидаясь остальных
+                nonlocal parsed, saved
+                parsed += len(page_ads)
+                if page_ads:
+                    saved += len(await save_new_ads(page_ads))
+
+            await crawl_pages(
+                session,
+                source,
+                save_page,
+                should_stop=crawl,
+                on_failed=crawl.page_failed if crawl is not None else None,
+            )
+            if parsed:
+                if crawl is not None:
+                    await crawl.save()
+                if not saved:
+                    logger.info(f"{source.name}: новые объявления не найдены (все уже в БД).")
+                else:
+                    logger.info(
+                        f"{source.name}: всего сохранено новых объявлений: {saved} (из {parsed} спарсенных)"
+                    )
+            else:
+                logger.warning(f"{source.name}: авто-объявления не найдены на сайте.")
+
+        end_time = datetime.now()
+        duration = (end_time - start_time).total_seconds()
+        logger.info(f"[{end_time}] Парсинг {source.name} завершён. Время выполнения: {duration:.2f} сек")
+        logger.info("=" * 60)
+        return saved
+
+    except Exception as e:
+        logger.error(f"Критическая ошибка при парсинге {source.name}: {e}", exc_info=True)
+        raise
+
+
+async def crawl_all_sources(sources: Optional[List[AdSource]] = None) -> int:
+    """Обходит источники (по умолчанию все включённые) одновременно; ошибка
+    одного не мешает остальным. Возвращает общее число новых объявлений."""
+    if sources is None:
+        sources = enabled_sources()
+    results = await asyncio.gather(*(crawl_source(source) for source in sources), return_exceptions=True)
+    return sum(result for result in results if isinstance(result, int))
+
+
+async def run_once(sources: Optional[List[AdSource]] = None) -> int:
+    """Ручной запуск: один обход источников и доставка уведомлений из outbox."""
+    try:
+        saved = await crawl_all_sources(sources)
+        await outbox_worker.drain()
+        return saved
+    finally:
+        await notification_dispatcher.stop()
+        shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    logger.info("Ручной запуск парсера")
+    asyncio.run(run_once())
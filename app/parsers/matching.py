@@ -0,0 +1,332 @@
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud import get_active_filters_version, get_subscribed_active_filters
+from app.db.models import FilterSet
+from app.utils.brands import normalize_brand
+from app.utils.regions import CITY_TO_REGION
+
+
+logger = logging.getLogger(__name__)
+
+
+def ad_canonical_brand(ad: Dict) -> Optional[str]:
+    # Для объявлений, сохранённых до появления canonical_brand
+    return ad.get("canonical_brand") or normalize_brand(ad.get("brand"))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Условия фильтра читаются так же, как их читают сгенерированные колонки
+# filter_sets в match_ads_to_filters: что не подходит по типу — условия нет.
+
+def filter_text(value) -> Optional[str]:
+    """Текстовое условие: непустая строка, иначе None."""
+    if isinstance(value, str) and value.strip():
+        return value
+    return None
+
+
+def filter_bound(value):
+    """Граница диапазона: число, кроме 0; иначе (нет ключа, 0, строка,
+    true/false) None."""
+    if _is_number(value) and value != 0:
+        return value
+    return None
+
+
+def matches_filter(ad: Dict, filter_set: FilterSet) -> bool:
+    try:
+        filters = filter_set.filters_json
+        ad_title = ad.get("title", "")[:40]
+        filter_name = filter_set.name
+
+        logger.info(f"Проверка: '{ad_title}...' vs фильтр '{filter_name}'")
+
+        brand = filter_text(filters.get("brand"))
+        if brand:
+            filter_brand = normalize_brand(brand)
+            if filter_brand is None or filter_brand != ad_canonical_brand(ad):
+                return False
+
+        model = filter_text(filters.get("model"))
+        if model:
+            ad_model = ad.get("model", "").lower().strip()
+            filter_model = model.lower().strip()
+            if filter_model not in ad_model:
+                return False
+
+        ad_year = ad.get("year")
+        if ad_year is not None:
+            min_year = filter_bound(filters.get("min_year"))
+            max_year = filter_bound(filters.get("max_year"))
+            if min_year is not None and ad_year < min_year:
+                return False
+            if max_year is not None and ad_year > max_year:
+                return False
+
+        ad_price = ad.get("price")
+        if ad_price is not None:
+            min_price = filter_bound(filters.get("min_price"))
+            max_price = filter_bound(filters.get("max_price"))
+            if min_price is not None and ad_price < min_price:
+                return False
+            if max_price is not None and ad_price > max_price:
+                return False
+
+        ad_mileage = ad.get("mileage")
+        if ad_mileage is not None:
+            max_mileage = filter_bound(filters.get("max_mileage"))
+            if max_mileage is not None and ad_mileage > max_mileage:
+                return False
+
+        region = filter_text(filters.get("region"))
+        if region:
+            ad_region = ad.get("region", "").lower().strip()
+            filter_region = region.lower().strip()
+
+            ad_region_norm = CITY_TO_REGION.get(ad_region, ad_region)
+            if filter_region not in ad_region_norm and ad_region_norm not in filter_region:
+                return False
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Ошибка в матчинге: {e}", exc_info=True)
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Индекс фильтров
+# ---------------------------------------------------------------------------
+
+INF = float("inf")
+
+# Ключ корзины для фильтров с брендом, которого нет в BRAND_SYNONYMS
+UNKNOWN_BRAND = ""
+
+
+class CompiledFilter:
+    """Фильтр с разобранными полями filters_json: границы диапазонов
+    приведены к [lo, hi], пустые значения заменены на бесконечность."""
+
+    __slots__ = (
+        "id", "brand", "model", "region",
+        "min_year", "max_year", "min_price", "max_price", "max_mileage",
+    )
+
+    def __init__(self, filter_set: FilterSet) -> None:
+        filters = filter_set.filters_json
+        self.id = filter_set.id
+
+        brand = filter_text(filters.get("brand"))
+        self.brand: Optional[str] = None
+        if brand:
+            self.brand = normalize_brand(brand) or UNKNOWN_BRAND
+
+        model = filter_text(filters.get("model"))
+        self.model = model.lower().strip() if model else None
+
+        region = filter_text(filters.get("region"))
+        self.region = region.lower().strip() if region else None
+
+        self.min_year = self._bound(filters.get("min_year"), -INF)
+        self.max_year = self._bound(filters.get("max_year"), INF)
+        self.min_price = self._bound(filters.get("min_price"), -INF)
+        self.max_price = self._bound(filters.get("max_price"), INF)
+        self.max_mileage = self._bound(filters.get("max_mileage"), INF)
+
+    @staticmethod
+    def _bound(value, default: float) -> float:
+        bound = filter_bound(value)
+        return default if bound is None else bound
+
+    @staticmethod
+    def is_compilable(filter_set: FilterSet) -> bool:
+        return isinstance(filter_set.filters_json, dict)
+
+
+class AdFields:
+    """Поля объявления в том виде, в котором их сравнивает matches_filter."""
+
+    __slots__ = ("exotic", "brand", "model", "region", "year", "price", "mileage")
+
+    def __init__(self, ad: Dict) -> None:
+        self.year = ad.get("year")
+        self.price = ad.get("price")
+        self.mileage = ad.get("mileage")
+
+        # Нестандартные типы полей проверяются через matches_filter как есть
+        self.exotic = (
+            not isinstance(ad.get("title", ""), str)
+            or not isinstance(ad.get("brand") or "", str)
+            or not isinstance(ad.get("canonical_brand") or "", str)
+            or any(
+                value is not None and not _is_number(value)
+                for value in (self.year, self.price, self.mileage)
+            )
+        )
+        self.brand = None if self.exotic else ad_canonical_brand(ad)
+
+        model = ad.get("model", "")
+        self.model = model.lower().strip() if isinstance(model, str) else None
+
+        region = ad.get("region", "")
+        if isinstance(region, str):
+            region = region.lower().strip()
+            self.region = CITY_TO_REGION.get(region, region)
+        else:
+            self.region = None
+
+    def matches(self, cf: CompiledFilter) -> bool:
+        if cf.brand is not None and cf.brand != self.brand:
+            return False
+        if cf.model is not None and (self.model is None or cf.model not in self.model):
+            return False
+        if self.year is not None and not (cf.min_year <= self.year <= cf.max_year):
+            return False
+        if self.price is not None and not (cf.min_price <= self.price <= cf.max_price):
+            return False
+        if self.mileage is not None and self.mileage > cf.max_mileage:
+            return False
+        if cf.region is not None:
+            if self.region is None:
+                return False
+            if cf.region not in self.region and self.region not in cf.region:
+                return False
+        return True
+
+
+class _RangeIndex:
+    """Интервалы фильтров по одному полю, отсортированные по нижней и
+    по верхней границе. Для значения x бинарным поиском находятся фильтры
+    с lo <= x (префикс) и с hi >= x (суффикс)."""
+
+    def __init__(self, bounds: List[Tuple[float, float, int]]) -> None:
+        by_lo = sorted(bounds, key=lambda b: b[0])
+        self.lo_keys = [b[0] for b in by_lo]
+        self.lo_ids = [b[2] for b in by_lo]
+
+        by_hi = sorted(bounds, key=lambda b: b[1])
+        self.hi_keys = [b[1] for b in by_hi]
+        self.hi_ids = [b[2] for b in by_hi]
+
+    def narrowest(self, value) -> Tuple[List[int], int, int]:
+        """Меньшее из двух множеств как границы ids[start:end], без копирования."""
+        lo_end = bisect_right(self.lo_keys, value)
+        hi_start = bisect_left(self.hi_keys, value)
+        if lo_end <= len(self.hi_ids) - hi_start:
+            return self.lo_ids, 0, lo_end
+        return self.hi_ids, hi_start, len(self.hi_ids)
+
+
+class _Bucket:
+    def __init__(self, filters: List[CompiledFilter]) -> None:
+        self.filters = {cf.id: cf for cf in filters}
+        self.ids = list(self.filters)
+        self.year = _RangeIndex([(cf.min_year, cf.max_year, cf.id) for cf in filters])
+        self.price = _RangeIndex([(cf.min_price, cf.max_price, cf.id) for cf in filters])
+        self.mileage = _RangeIndex([(-INF, cf.max_mileage, cf.id) for cf in filters])
+
+    def candidates(self, fields: AdFields) -> Sequence[int]:
+        """Наименьшее из множеств, отсечённых по одной границе."""
+        best, start, end = self.ids, 0, len(self.ids)
+        for index, value in (
+            (self.year, fields.year),
+            (self.price, fields.price),
+            (self.mileage, fields.mileage),
+        ):
+            if value is None or start == end:
+                continue
+            ids, lo, hi = index.narrowest(value)
+            if hi - lo < end - start:
+                best, start, end = ids, lo, hi
+        # Копируется только победивший срез
+        if start == 0 and end == len(best):
+            return best
+        return best[start:end]
+
+
+class FilterIndex:
+    """Скомпилированный индекс активных фильтров.
+
+    Фильтры раскладываются по каноническому бренду (фильтры без бренда — в
+    общую корзину), внутри корзины — по отсортированным границам года, цены и
+    пробега. Для объявления проверяются только кандидаты из подходящих
+    корзин. Результат совпадает с попарным вызовом matches_filter; фильтры,
+    которые нельзя скомпилировать, проверяются через matches_filter.
+    """
+
+    def __init__(self, filter_sets: List[FilterSet]) -> None:
+        self.filter_sets: Dict[int, FilterSet] = {fs.id: fs for fs in filter_sets}
+        self._fallback: List[FilterSet] = []
+
+        by_brand: Dict[Optional[str], List[CompiledFilter]] = {}
+        for fs in filter_sets:
+            if not CompiledFilter.is_compilable(fs):
+                self._fallback.append(fs)
+                continue
+            cf = CompiledFilter(fs)
+            # Бренд, которого нет в BRAND_SYNONYMS, не совпадает ни с чем
+            if cf.brand != UNKNOWN_BRAND:
+                by_brand.setdefault(cf.brand, []).append(cf)
+
+        self._buckets = {brand: _Bucket(cfs) for brand, cfs in by_brand.items()}
+
+    def __len__(self) -> int:
+        return len(self.filter_sets)
+
+    def match(self, ad: Dict) -> List[int]:
+        fields = AdFields(ad)
+        if fields.exotic:
+            return sorted(
+                filter_id
+                for filter_id, fs in self.filter_sets.items()
+                if matches_filter(ad, fs)
+            )
+
+        matched: Set[int] = set()
+        for brand in (None, fields.brand):
+            bucket = self._buckets.get(brand)
+            if bucket is None:
+                continue
+            for filter_id in bucket.candidates(fields):
+                if fields.matches(bucket.filters[filter_id]):
+                    matched.add(filter_id)
+            if fields.brand is None:
+                break
+
+        for fs in self._fallback:
+            if matches_filter(ad, fs):
+                matched.add(fs.id)
+
+        return sorted(matched)
+
+    def match_batch(self, ads: List[Dict]) -> List[List[int]]:
+        """Id подходящих фильтров для каждого объявления (в порядке ads)."""
+        return [self.match(ad) for ad in ads]
+
+
+_filter_index: Optional[FilterIndex] = None
+_filter_index_version: Optional[tuple] = None
+
+
+async def get_filter_index(db: AsyncSession) -> FilterIndex:
+    """Возвращает индекс активных фильтров пользователей с действующей
+    подпиской, пересобирая его только если этот набор изменился с прошлого
+    вызова."""
+    global _filter_index, _filter_index_version
+
+    version = await get_active_filters_version(db)
+    if _filter_index is None or version != _filter_index_version:
+        active_filters = await get_subscribed_active_filters(db)
+        _filter_index = FilterIndex(active_filters)
+        _filter_index_version = version
+        logger.info(f"Индекс фильтров пересобран: {len(_filter_index)} активных фильтров")
+
+    return _filter_index
@@ -0,0 +1,93 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class PageCacheEntry:
+    __slots__ = ("etag", "last_modified", "html", "content_hash", "ads")
+
+    def __init__(self) -> None:
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.html: Optional[str] = None
+        self.content_hash: Optional[str] = None
+        self.ads: Optional[List[Dict]] = None
+
+
+class PageCache:
+    """Кэш страниц выдачи по URL.
+
+    Хранит HTTP-валидаторы (ETag, Last-Modified) для условных запросов,
+    последнюю загруженную версию страницы, её хэш и результат разбора.
+    Если сервер ответил 304 или содержимое не изменилось, страницу не нужно
+    разбирать заново — объявления берутся из кэша.
+    """
+
+    def __init__(self, max_entries: int = 200) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, PageCacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _entry(self, url: str) -> PageCacheEntry:
+        entry = self._entries.get(url)
+        if entry is None:
+            entry = self._entries[url] = PageCacheEntry()
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(url)
+        return entry
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self._entries.get(url)
+        if entry is None or entry.html is None:
+            return {}
+
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def remember_response(self, url: str, html: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        entry = self._entry(url)
+        entry.html = html
+        entry.etag = etag
+        entry.last_modified = last_modified
+
+    def not_modified_html(self, url: str) -> Optional[str]:
+        """Тело страницы для ответа 304."""
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        self.not_modified += 1
+        return entry.html
+
+    def cached_ads(self, url: str, html: str) -> Optional[List[Dict]]:
+        """Объявления прошлого разбора, если содержимое страницы не изменилось."""
+        entry = self._entries.get(url)
+        if entry is not None and entry.ads is not None and entry.content_hash == _content_hash(html):
+            self.hits += 1
+            return entry.ads
+        self.misses += 1
+        return None
+
+    def store_ads(self, url: str, html: str, ads: List[Dict]) -> None:
+        entry = self._entry(url)
+        entry.content_hash = _content_hash(html)
+        entry.ads = ads
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "entries": len(self._entries),
+        }
+
+
+def _content_hash(html: str) -> str:
+    return hashlib.md5(html.encode("utf-8")).hexdigest()
@@ -0,0 +1,45 @@
+import logging
+from typing import Dict, List
+
+from app.core.config import settings
+from app.parsers.base import AdSource
+from app.parsers.berkat_page import BerkatSource
+
+
+logger = logging.getLogger(__name__)
+
+
+# Все известные источники по Ad.source
+SOURCES: Dict[str, AdSource] = {}
+
+
+def register_source(source: AdSource) -> AdSource:
+    if source.name in SOURCES:
+        raise ValueError(f"Источник {source.name} уже зарегистрирован")
+    SOURCES[source.name] = source
+    return source
+
+
+def enabled_sources() -> List[AdSource]:
+    """Источники из PARSER_SOURCES (через запятую) в указанном порядке."""
+    sources = []
+    for name in settings.PARSER_SOURCES.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        source = SOURCES.get(name)
+        if source is None:
+            logger.warning(f"Неизвестный источник в PARSER_SOURCES: {name}")
+            continue
+        sources.append(source)
+    return sources
+
+
+register_source(
+    BerkatSource(
+        backend=settings.PARSER_BACKEND,
+        max_pages=settings.PARSER_MAX_PAGES,
+        concurrency=settings.PARSER_CONCURRENCY,
+        request_delay=settings.PARSER_REQUEST_DELAY,
+    )
+)
@@ -0,0 +1,76 @@
+import re
+from typing import NamedTuple, Optional
+
+
+NON_CAR_PATTERNS = [
+    r'\bэвакуатор\b', r'\bустановка гбо\b', r'\bремонт\b', r'\bпокраска\b',
+    r'\bдиагностика\b', r'\bшиномонтаж\b', r'\bзапчасти?\b', r'\bдетали?\b',
+    r'\bаренда авто\b', r'\bпрокат авто\b', r'\bгрузовой\b', r'\bгрузовик\b',
+    r'\bкамаз\b', r'\bавтобус\b', r'\bприцеп\b', r'\bмотоцикл\b',
+    r'\bскутер\b', r'\bквадроцикл\b', r'\bвыкуп авто\b', r'\bзалог\b',
+    r'\bна запчасти?\b', r'\bбиты[йя]\b', r'\bаварийн[ыао]\b', r'\bколпаки?\b',
+    r'\bголовка\b', r'\bдвигател\b', r'\bкузовн(ые)?\b', r'\bсалонн(ые)?\b',
+    r'\bстекло\b', r'\bфара\b', r'\bбампер\b', r'\bдверь\b', r'\bкрыло\b',
+    r'\bкапот\b', r'\bбагажник\b', r'\bсиденья?\b', r'\bрулев(ой|ая)\b',
+]
+
+# Порядок важен: при нескольких брендах в заголовке побеждает тот, что раньше в списке
+KNOWN_BRANDS = [
+    "гранта", "гранту", "гранте", "гранты", "грантой",
+    "лада", "ладу", "ладе", "лады", "ладой",
+    "ваз", "вазу", "вазе", "вазы", "вазой",
+    "приора", "приору", "приоре", "приоры", "приорой",
+    "калина", "калину", "калине", "калины", "калиной",
+    "веста", "весту", "весте", "весты", "вестой",
+    "ренуо", "renault", "рено",
+    "киа", "kia", "хендай", "hyundai", "тойота", "toyota", "ниссан",
+    "nissan", "мазда", "mazda", "мицубиси", "mitsubishi", "шкода",
+    "skoda", "фольксваген", "волкцваген", "volkswagen", "vw", "опель",
+    "opel", "форд", "ford", "шевроле", "шевролет", "chevrolet", "мерседес",
+    "мерс", "бмв", "бэха", "беха", "беху", "bmw", "ауди", "audi", "вольво",
+    "volvo", "субару", "subaru", "хонда", "хунда", "хонду", "honda",
+    "сузуки", "suzuki", "дэу", "даеву", "daewoo", "газель", "газ", "уаз",
+    "уазик", "moskvich", "москвич", "элантра", "elantra", "solaris",
+    "соларис", "рио", "rio", "creta", "крета", "джип", "jeep", "chery",
+    "черри", "лифан", "lifan", "geely", "джили", "газель", "gazel",
+]
+
+_BRAND_PRIORITY = {}
+for _priority, _brand in enumerate(KNOWN_BRANDS):
+    _BRAND_PRIORITY.setdefault(_brand, _priority)
+
+# Одно регулярное выражение на все шаблоны: сначала «не авто», затем бренды.
+# Бренды — целые слова из букв, поэтому их совпадения не пересекаются.
+_TITLE_RE = re.compile(
+    "(?P<non_car>" + "|".join(NON_CAR_PATTERNS) + ")"
+    r"|\b(?P<brand>"
+    + "|".join(re.escape(b) for b in sorted(_BRAND_PRIORITY, key=len, reverse=True))
+    + r")\b"
+)
+
+
+class TitleClassification(NamedTuple):
+    is_non_car: bool
+    brand: Optional[str] = None
+    brand_start: int = -1
+    brand_end: int = -1
+
+
+def classify_title(title_lower: str) -> TitleClassification:
+    """За один проход по заголовку определяет, не «не авто» ли это, и какой
+    бренд из KNOWN_BRANDS в нём упомянут (с позицией первого вхождения)."""
+    best = None
+    best_priority = len(KNOWN_BRANDS)
+
+    for match in _TITLE_RE.finditer(title_lower):
+        brand = match.group("brand")
+        if brand is None:
+            return TitleClassification(is_non_car=True)
+
+        priority = _BRAND_PRIORITY[brand]
+        if priority < best_priority:
+            best, best_priority = match, priority
+
+    if best is None:
+        return TitleClassification(is_non_car=False)
+    return TitleClassification(False, best.group("brand"), best.start(), best.end())
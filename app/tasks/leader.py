@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.db.session import engine as default_engine
+
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """Выбор ведущей реплики через advisory lock Postgres.
+
+    Блокировка сеансовая и держится на отдельном соединении, пока реплика
+    ведущая. Если процесс умирает, Postgres закрывает соединение и снимает
+    блокировку — её забирает следующая реплика при очередной попытке.
+    Соединение проверяется раз в LEADER_CHECK_INTERVAL; если оно оборвалось,
+    реплика считает лидерство потерянным и останавливает задачу.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key: int,
+        engine: AsyncEngine = default_engine,
+        check_interval: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.key = key
+        self.engine = engine
+        self.check_interval = check_interval or settings.LEADER_CHECK_INTERVAL
+        self.is_leader = False
+
+    async def run(self, task: Callable[[], Awaitable[None]]) -> None:
+        """Бесконечно пытается стать ведущей репликой и, пока ею является,
+        выполняет task."""
+        while True:
+            try:
+                await self._run_once(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка блокировки ведущей реплики «{self.name}»: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    async def _run_once(self, task: Callable[[], Awaitable[None]]) -> None:
+        conn = await self.engine.connect()
+        try:
+            if not await self._try_lock(conn):
+                return
+
+            self.is_leader = True
+            logger.info(f"Реплика стала ведущей для «{self.name}»")
+            running = asyncio.create_task(task())
+            try:
+                await self._hold(conn, running)
+            finally:
+                self.is_leader = False
+                running.cancel()
+                await asyncio.gather(running, return_exceptions=True)
+
+            await self._unlock(conn)
+            logger.info(f"Реплика больше не ведущая для «{self.name}»")
+        except BaseException:
+            # Соединение могло оборваться: не возвращаем его в пул с блокировкой
+            await conn.invalidate()
+            raise
+        finally:
+            await conn.close()
+
+    async def _try_lock(self, conn: AsyncConnection) -> bool:
+        acquired = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+        # Блокировка сеансовая, транзакцию держать незачем
+        await conn.commit()
+        return bool(acquired)
+
+    async def _unlock(self, conn: AsyncConnection) -> None:
+        await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        await conn.commit()
+
+    async def _hold(self, conn: AsyncConnection, running: asyncio.Task) -> None:
+        """Ждёт завершения задачи, проверяя соединение с блокировкой."""
+        while not running.done():
+            await asyncio.wait({running}, timeout=self.check_interval)
+            if running.done():
+                break
+            await conn.execute(text("SELECT 1"))
+            await conn.commit()
+
+        if not running.cancelled() and running.exception() is not None:
+            raise running.exception()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.bot.messages import ad_messages
+from app.bot.notifier import Notification, NotificationDispatcher, notification_dispatcher
+from app.bot.telegram_bot import photo_file_ids
+from app.core.config import settings
+from app.db.crud import (
+    claim_outbox_batch,
+    complete_outbox_delivery,
+    deactivate_blocked_users,
+    get_ads_by_ids,
+    release_outbox_failures,
+    renew_outbox_lease,
+    save_photo_file_ids,
+)
+from app.db.models import Ad, NotificationOutbox
+from app.db.session import async_session
+
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """Захватывает пачки строк notification_outbox, отправляет их и отмечает
+    итог; воркеров может быть несколько, в том числе в разных процессах."""
+
+    def __init__(
+        self,
+        dispatcher: NotificationDispatcher = notification_dispatcher,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.max_batches = max_batches or settings.OUTBOX_MAX_BATCHES
+        self.poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL
+
+        self._task: Optional[asyncio.Task] = None
+        self._batches: "set[asyncio.Task]" = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        tasks = list(self._batches)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def wake(self) -> None:
+        """Сообщает, что в outbox появились строки, — не ждать poll_interval."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        slots = asyncio.Semaphore(self.max_batches)
+        while True:
+            await slots.acquire()
+            try:
+                rows = await self._claim()
+            except Exception as e:
+                logger.error(f"Ошибка при захвате уведомлений из outbox: {e}")
+                rows = []
+
+            if not rows:
+                slots.release()
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._deliver(rows))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def drain(self) -> int:
+        """Доставляет всё, что готово к отправке; возвращает число строк."""
+        total = 0
+        while True:
+            rows = await self._claim()
+            if not rows:
+                return total
+            await self._deliver(rows)
+            total += len(rows)
+
+    async def _claim(self) -> List[NotificationOutbox]:
+        async with async_session() as db:
+            return await claim_outbox_batch(db, self.batch_size, settings.OUTBOX_LEASE)
+
+    async def _renew_lease(self, rows: List[NotificationOutbox]) -> None:
+        # Отправка пачки упирается в лимиты Telegram и может идти дольше захвата
+        while True:
+            await asyncio.sleep(settings.OUTBOX_LEASE / 3)
+            async with async_session() as db:
+                await renew_outbox_lease(db, rows, settings.OUTBOX_LEASE)
+
+    async def _deliver(self, rows: List[NotificationOutbox]) -> None:
+        renewal = asyncio.create_task(self._renew_lease(rows))
+        try:
+            await self._deliver_batch(rows)
+        finally:
+            renewal.cancel()
+            await asyncio.gather(renewal, return_exceptions=True)
+
+    async def _deliver_batch(self, rows: List[NotificationOutbox]) -> None:
+        async with async_session() as db:
+            ads = await get_ads_by_ids(db, [row.ad_id for row in rows])
+
+        singles = []
+        digests: Dict[int, List[Tuple[NotificationOutbox, Ad]]] = {}
+        missing = []
+        for row in rows:
+            ad = ads.get(row.ad_id)
+            if ad is None:
+                missing.append(row)
+            elif row.digest:
+                digests.setdefault(row.user_id, []).append((row, ad))
+            else:
+                singles.append((row, ad))
+
+        # Дайджест из одного объявления отправляется обычным уведомлением
+        groups = [[item] for item in singles]
+        for items in digests.values():
+            for i in range(0, len(items), settings.DIGEST_MAX_BATCH):
+                groups.append(items[i : i + settings.DIGEST_MAX_BATCH])
+
+        pending = []
+        for group in groups:
+            row, ad = group[0]
+            result = await self.dispatcher.submit(
+                Notification(
+                    chat_id=row.user_id,
+                    ad=ad,
+                    filter_id=row.filter_id,
+                    filter_name=row.filter_name,
+                    digest=[(ad, row.filter_name) for row, ad in group] if len(group) > 1 else None,
+                )
+            )
+            pending.append(([row for row, _ in group], result))
+
+        delivered = []
+        failed = missing
+        dead_users = set()
+        for group_rows, result in pending:
+            if await result:
+                delivered.extend(group_rows)
+            elif group_rows[0].user_id in self.dispatcher.dead_chats:
+                # Повторять бессмысленно: строки закроет deactivate_blocked_users
+                dead_users.add(group_rows[0].user_id)
+            else:
+                failed.extend(group_rows)
+
+        # file_id фото, полученные при отправке, пригодятся другим воркерам и после рестарта
+        new_file_ids = {}
+        for ad in ads.values():
+            file_id = photo_file_ids.get(ad)
+            if file_id and file_id != ad.photo_file_id:
+                new_file_ids[ad.id] = file_id
+
+        async with async_session() as db:
+            await complete_outbox_delivery(db, delivered)
+            await release_outbox_failures(
+                db, failed, settings.OUTBOX_MAX_ATTEMPTS, settings.OUTBOX_RETRY_DELAY
+            )
+            await save_photo_file_ids(db, new_file_ids)
+            await deactivate_blocked_users(db, dead_users)
+        # Дальше чаты отсекает users.blocked_at; держать их в dead_chats
+        # дольше нельзя — /start на другой реплике не уберёт их отсюда
+        self.dispatcher.forget_dead(dead_users)
+
+        # Рассылка пачки закончена — отрисованные тексты больше не нужны
+        ad_messages.evict(ads)
+
+        logger.info(
+            f"Outbox: доставлено {len(delivered)}, не доставлено {len(failed)}, "
+            f"недоступных чатов {len(dead_users)}"
+        )
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,59 @@
+import random
+from typing import Optional
+
+from app.core.config import settings
+
+
+class AdaptiveCrawlSchedule:
+    """Интервал между обходами сайта по наблюдаемой частоте новых объявлений.
+
+    Частота (объявлений в секунду) сглаживается экспоненциально по циклам.
+    Интервал подбирается так, чтобы за цикл появлялось около target_new_ads
+    объявлений, и ограничен [min_interval, max_interval]: в часы пик сайт
+    обходится чаще и уведомления приходят быстрее, ночью — реже. Jitter
+    разносит обходы нескольких инсталляций и не даёт попадать в такт сайта.
+    """
+
+    def __init__(
+        self,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        target_new_ads: Optional[float] = None,
+        jitter: Optional[float] = None,
+        smoothing: Optional[float] = None,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.min_interval = settings.CRAWL_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = settings.CRAWL_MAX_INTERVAL if max_interval is None else max_interval
+        self.target_new_ads = (
+            settings.CRAWL_TARGET_NEW_ADS if target_new_ads is None else target_new_ads
+        )
+        self.jitter = settings.CRAWL_JITTER if jitter is None else jitter
+        self.smoothing = settings.CRAWL_SMOOTHING if smoothing is None else smoothing
+        self._rng = rng or random.Random()
+
+        # Пока частота неизвестна — прежний фиксированный интервал
+        self.interval = min(max(600.0, self.min_interval), self.max_interval)
+        self.rate: Optional[float] = None
+
+    def record(self, new_ads: int, elapsed: float) -> None:
+        """Учитывает цикл: new_ads новых объявлений за elapsed секунд с
+        предыдущего обхода."""
+        if elapsed <= 0:
+            return
+        observed = new_ads / elapsed
+        if self.rate is None:
+            self.rate = observed
+        else:
+            self.rate += self.smoothing * (observed - self.rate)
+
+        if self.rate > 0:
+            interval = self.target_new_ads / self.rate
+        else:
+            interval = self.max_interval
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+
+    def next_delay(self) -> float:
+        """Пауза до следующего обхода с учётом jitter."""
+        delay = self.interval * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(max(delay, self.min_interval), self.max_interval)
@@ -0,0 +1,27 @@
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.crud import expire_trial_subscriptions
+from app.db.session import async_session
+
+
+logger = logging.getLogger(__name__)
+
+
+async def expire_subscriptions_task() -> int:
+    async with async_session() as db:
+        expired = await expire_trial_subscriptions(db)
+    if expired:
+        logger.info(f"Пробный период истёк у пользователей: {expired}")
+    return expired
+
+
+async def periodic_subscription_expiry() -> None:
+    while True:
+        try:
+            await expire_subscriptions_task()
+        except Exception as e:
+            logger.error(f"Ошибка при закрытии истёкших подписок: {e}")
+
+        await asyncio.sleep(settings.SUBSCRIPTION_CHECK_INTERVAL)
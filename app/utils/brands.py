@@ -0,0 +1,75 @@
+import re
+from typing import Dict, Optional
+
+
+# Канонический id бренда -> все написания, сленг и падежные формы
+BRAND_SYNONYMS = {
+    "lada": [
+        "lada", "лада", "ладу", "ладе", "лады", "ладой",
+        "ваз", "ваза", "вазу", "вазе", "вазы", "вазой", "вазик",
+        "жигули", "жигуль", "классика", "копейка", "шестерка", "семерка",
+        "восьмерка", "девятка", "десятка",
+        "приора", "приору", "приоре", "приоры", "приорой",
+        "гранта", "гранту", "гранте", "гранты", "грантой",
+        "калина", "калину", "калине", "калины", "калиной",
+        "веста", "весту", "весте", "весты", "вестой",
+    ],
+    "renault": ["renault", "рено", "реноль", "ренуо", "ренаулт"],
+    "kia": ["kia", "киа", "кья", "киас", "киашка", "рио", "rio"],
+    "hyundai": [
+        "hyundai", "хендай", "хюндай", "хендэ",
+        "элантра", "elantra", "solaris", "соларис", "creta", "крета",
+    ],
+    "nissan": ["nissan", "ниссан", "нисан"],
+    "toyota": ["toyota", "тойота", "тоета"],
+    "mazda": ["mazda", "мазда", "мазды"],
+    "volkswagen": ["volkswagen", "vw", "фольксваген", "волкцваген", "ваген", "жук"],
+    "skoda": ["skoda", "шкода", "шкодовский"],
+    "ford": ["ford", "форд", "форды"],
+    "chevrolet": ["chevrolet", "шевроле", "шевролет", "шевроль"],
+    "bmw": ["bmw", "бмв", "бэха", "беха", "беху"],
+    "mercedes": ["mercedes", "мерседес", "мерс"],
+    "audi": ["audi", "ауди", "аудик"],
+    "volvo": ["volvo", "вольво", "волво"],
+    "subaru": ["subaru", "субару", "субарус"],
+    "honda": ["honda", "хонда", "хонду", "хунда", "хондуля"],
+    "suzuki": ["suzuki", "сузуки", "сузукис"],
+    "mitsubishi": ["mitsubishi", "мицубиси", "мицубиша"],
+    "opel": ["opel", "опель", "опелек"],
+    "daewoo": ["daewoo", "дэу", "даеву"],
+    "gaz": ["gaz", "газ", "газель", "gazel", "газик"],
+    "uaz": ["uaz", "уаз", "уазик", "буханка"],
+    "moskvich": ["moskvich", "москвич", "москвичи"],
+    "jeep": ["jeep", "джип"],
+    "chery": ["chery", "черри"],
+    "lifan": ["lifan", "лифан"],
+    "geely": ["geely", "джили"],
+    "lexus": ["lexus", "лексус"],
+    "porsche": ["porsche", "порше"],
+}
+
+SYNONYM_TO_BRAND: Dict[str, str] = {
+    synonym: canonical
+    for canonical, synonyms in BRAND_SYNONYMS.items()
+    for synonym in [canonical, *synonyms]
+}
+
+_TOKEN_RE = re.compile(r"[a-zа-яё0-9]+")
+
+
+def normalize_brand(text: Optional[str]) -> Optional[str]:
+    """Канонический id бренда для написания вроде «Гранту», «ВАЗ-2107»
+    или «Mercedes-Benz»; None, если бренд неизвестен."""
+    if not text:
+        return None
+
+    text = text.lower().strip()
+    canonical = SYNONYM_TO_BRAND.get(text)
+    if canonical:
+        return canonical
+
+    for token in _TOKEN_RE.findall(text):
+        canonical = SYNONYM_TO_BRAND.get(token)
+        if canonical:
+            return canonical
+    return None
@@ -0,0 +1,15 @@
+# Города, которые в объявлениях указываются вместо региона
+CITY_TO_REGION = {
+    "назрань": "ингушетия",
+    "магас": "ингушетия",
+    "карабулак": "ингушетия",
+    "грозный": "чечня",
+    "шали": "чечня",
+    "махачкала": "дагестан",
+    "дербент": "дагестан",
+    "москва": "москва",
+    "мск": "москва",
+    "санкт-петербург": "санкт-петербург",
+    "спб": "санкт-петербург",
+    "питер": "санкт-петербург",
+}
@@ -0,0 +1,95 @@
+"""Обход по фазам (все страницы → сохранение всего) против потокового
+конвейера crawl_pages: время до первого сохранения (а значит,
+до первого уведомления), общее время и пиковая память.
+
+Страницы отдаёт локальный aiohttp-сервер с задержкой, сохранение
+имитируется паузой на страницу — сеть и Postgres не нужны.
+
+Запуск: python -m benchmarks.bench_crawl_pipeline [страниц]
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import aiohttp
+from aiohttp import web
+
+# Разбор в том же процессе, чтобы tracemalloc видел его память
+os.environ.setdefault("PARSER_WORKERS", "0")
+
+from app.parsers import crawler  # noqa: E402
+from app.parsers.berkat_page import BerkatSource  # noqa: E402
+from app.parsers.page_cache import PageCache  # noqa: E402
+from benchmarks.bench_parser_backends import synthetic_page  # noqa: E402
+
+
+logging.disable(logging.CRITICAL)
+
+PORT = 8095
+PAGE_LATENCY = 0.2
+SAVE_LATENCY = 0.05
+
+
+async def start_site(pages: int) -> web.AppRunner:
+    rng = random.Random(42)
+    html = {page: synthetic_page(rng, 100000 + page * 100) for page in range(1, pages + 1)}
+
+    async def handle(request: web.Request) -> web.Response:
+        await asyncio.sleep(PAGE_LATENCY * random.uniform(0.5, 2))
+        page = int(request.query.get("page", 1))
+        return web.Response(text=html[page], content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/avto", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+    return runner
+
+
+async def measure(name: str, crawl) -> None:
+    start = time.perf_counter()
+    first = []
+
+    async def save(page: int, page_ads) -> None:
+        await asyncio.sleep(SAVE_LATENCY)
+        if not first:
+            first.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    async with aiohttp.ClientSession() as session:
+        await crawl(session, save)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = time.perf_counter() - start
+    print(
+        f"{name:<10} первое сохранение: {first[0]:>5.2f} сек  всего: {total:>5.2f} сек  "
+        f"пик памяти: {peak / 1024 / 1024:>5.1f} МБ"
+    )
+
+
+async def main(pages: int) -> None:
+    runner = await start_site(pages)
+    source = BerkatSource(search_url=f"http://127.0.0.1:{PORT}/avto", max_pages=pages, request_delay=0)
+
+    async def phased(session, save) -> None:
+        ads = await crawler.parse_pages(session, source, cache=PageCache())
+        for i in range(0, len(ads), 30):
+            await save(i // 30 + 1, ads[i : i + 30])
+
+    async def streaming(session, save) -> None:
+        await crawler.crawl_pages(session, source, save, cache=PageCache())
+
+    print(f"страниц: {pages}, задержка страницы ~{PAGE_LATENCY} сек, сохранения {SAVE_LATENCY} сек")
+    await measure("по фазам", phased)
+    await measure("конвейер", streaming)
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
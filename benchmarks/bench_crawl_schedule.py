@@ -0,0 +1,82 @@
+"""Симуляция суток обходов berkat.ru: фиксированные 600 сек против
+AdaptiveCrawlSchedule.
+
+Объявления появляются пуассоновским потоком с суточным профилем (ночью
+почти нет, днём пик). Для каждого режима считается число обходов и
+задержка от публикации объявления до обхода, который его находит.
+
+Запуск: python -m benchmarks.bench_crawl_schedule
+"""
+import math
+import random
+import statistics
+from typing import Callable, List, Tuple
+
+from app.tasks.scheduler import AdaptiveCrawlSchedule
+
+
+DAY = 24 * 3600
+
+
+def ads_per_hour(t: float) -> float:
+    """Суточный профиль: около 1 объявления в час ночью, до 60 в пик."""
+    hour = (t % DAY) / 3600
+    return 1 + 59 * max(0.0, math.sin(math.pi * (hour - 7) / 15)) ** 2
+
+
+def simulate_ads(rng: random.Random, days: int) -> List[float]:
+    peak = 60 / 3600
+    times, t = [], 0.0
+    while t < days * DAY:
+        t += rng.expovariate(peak)
+        if rng.random() < ads_per_hour(t) / 60:
+            times.append(t)
+    return times
+
+
+def run(
+    ads: List[float], days: int, next_delay: Callable[[int, float], float]
+) -> Tuple[int, List[float], List[float]]:
+    """Возвращает число обходов и задержки для всех объявлений и для часов пик."""
+    crawls, latencies, peak_latencies = 0, [], []
+    t, last, i = 0.0, 0.0, 0
+    while t < days * DAY:
+        found = 0
+        while i < len(ads) and ads[i] <= t:
+            latencies.append(t - ads[i])
+            if ads_per_hour(ads[i]) >= 30:
+                peak_latencies.append(t - ads[i])
+            found += 1
+            i += 1
+        crawls += 1
+        delay = next_delay(found, t - last)
+        last = t
+        t += delay
+    return crawls, latencies, peak_latencies
+
+
+def main() -> None:
+    days = 7
+    ads = simulate_ads(random.Random(42), days)
+
+    schedule = AdaptiveCrawlSchedule(
+        min_interval=120, max_interval=1800, target_new_ads=3, jitter=0.1, smoothing=0.5,
+        rng=random.Random(1),
+    )
+
+    def adaptive(found: int, elapsed: float) -> float:
+        schedule.record(found, elapsed)
+        return schedule.next_delay()
+
+    print(f"объявлений за {days} сут.: {len(ads)}")
+    for name, next_delay in [("каждые 600 сек", lambda found, elapsed: 600.0), ("адаптивно", adaptive)]:
+        crawls, latencies, peak_latencies = run(ads, days, next_delay)
+        print(
+            f"{name:<15} обходов в сутки: {crawls / days:>4.0f}  "
+            f"задержка: средняя {statistics.mean(latencies):>4.0f} сек, "
+            f"в часы пик {statistics.mean(peak_latencies):>4.0f} сек"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Сравнение FilterIndex с попарным matches_filter.
+
+Запуск: python -m benchmarks.bench_filter_index
+"""
+import logging
+import random
+import time
+
+from app.db.models import FilterSet
+from app.parsers.matching import FilterIndex, matches_filter
+from app.utils.brands import BRAND_SYNONYMS
+
+
+logging.disable(logging.CRITICAL)
+
+BRAND_NAMES = [name for synonyms in BRAND_SYNONYMS.values() for name in synonyms] + ["Haval", "Tesla"]
+MODELS = ["Granta", "Vesta", "Rio", "Solaris", "Camry", "X5", "Focus", "Polo"]
+REGIONS = ["Назрань", "Магас", "Грозный", "Махачкала", "Москва", "Ингушетия"]
+
+
+def random_filter(rng: random.Random, filter_id: int) -> FilterSet:
+    filters = {
+        "brand": rng.choice(BRAND_NAMES) if rng.random() < 0.9 else None,
+        "model": rng.choice(MODELS) if rng.random() < 0.2 else None,
+        "min_year": rng.randint(1995, 2020) if rng.random() < 0.5 else None,
+        "max_year": rng.randint(2005, 2025) if rng.random() < 0.3 else None,
+        "min_price": rng.randint(1, 10) * 100_000 if rng.random() < 0.3 else None,
+        "max_price": rng.randint(2, 40) * 100_000 if rng.random() < 0.7 else None,
+        "min_mileage": None,
+        "max_mileage": rng.randint(5, 30) * 10_000 if rng.random() < 0.3 else None,
+        "region": rng.choice(REGIONS) if rng.random() < 0.1 else None,
+    }
+    return FilterSet(id=filter_id, user_id=filter_id, name=f"f{filter_id}", filters_json=filters)
+
+
+def random_ad(rng: random.Random) -> dict:
+    return {
+        "title": "Продаю авто",
+        "brand": rng.choice(BRAND_NAMES).capitalize(),
+        "model": rng.choice(MODELS) + " " + rng.choice(["", "Sport", "Cross"]),
+        "year": rng.choice([None, rng.randint(1995, 2025)]),
+        "price": rng.choice([None, rng.randint(50, 5000) * 1000]),
+        "mileage": rng.choice([None, rng.randint(1, 400) * 1000]),
+        "region": rng.choice(REGIONS),
+    }
+
+
+def main() -> None:
+    rng = random.Random(42)
+    ads = [random_ad(rng) for _ in range(200)]
+
+    print(f"{'фильтров':>10} {'сборка, с':>10} {'индекс, мкс/объявл.':>20} {'перебор, мкс/объявл.':>21}")
+    for n_filters in (1_000, 10_000, 100_000):
+        filter_sets = [random_filter(rng, i) for i in range(1, n_filters + 1)]
+
+        start = time.perf_counter()
+        index = FilterIndex(filter_sets)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = index.match_batch(ads)
+        index_time = (time.perf_counter() - start) / len(ads)
+
+        sample = ads[:20]
+        start = time.perf_counter()
+        naive = [[fs.id for fs in filter_sets if matches_filter(ad, fs)] for ad in sample]
+        naive_time = (time.perf_counter() - start) / len(sample)
+
+        assert indexed[: len(sample)] == naive, "FilterIndex расходится с matches_filter"
+
+        print(
+            f"{n_filters:>10} {build_time:>10.2f} {index_time * 1e6:>20.0f} {naive_time * 1e6:>21.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Мастер фильтров на нескольких репликах бота с общим Redis.
+
+Каждый пользователь проходит первые шаги мастера, и каждый следующий шаг
+обрабатывает другая реплика (свой Dispatcher со своим хранилищем из
+app.bot.storage). В конце проверяется, что состояние и данные мастера
+собраны целиком. Redis и Bot API — локальные фейки, сеть и Postgres не нужны.
+
+Запуск: python -m benchmarks.bench_fsm_replicas [пользователей] [реплик]
+"""
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import time
+
+from benchmarks.fake_redis import FakeRedisServer
+from benchmarks.fake_telegram import FakeTelegramServer
+
+
+logging.disable(logging.CRITICAL)
+
+STEPS = ["✨ Создать фильтр", "Kia", "Rio", "2015", "2020"]
+
+
+async def main(users: int, replicas: int) -> None:
+    redis_server = FakeRedisServer()
+    telegram = FakeTelegramServer()
+    os.environ["REDIS_URL"] = await redis_server.start()
+    os.environ["TELEGRAM_API_URL"] = await telegram.start()
+
+    # Настройки читаются при импорте — после того, как подняты фейки
+    from aiogram import Dispatcher
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.types import Update
+
+    from app.bot.handlers import router
+    from app.bot.states import FilterForm
+    from app.bot.storage import create_event_isolation, create_fsm_storage
+    from app.bot.telegram_bot import bot
+
+    dispatchers = []
+    for _ in range(replicas):
+        storage = create_fsm_storage()
+        dp = Dispatcher(storage=storage, events_isolation=create_event_isolation(storage))
+        dp.include_router(_replica_router(router))
+        dispatchers.append(dp)
+
+    update_ids = itertools.count(1)
+
+    def make_update(user_id: int, text: str) -> Update:
+        update_id = next(update_ids)
+        user = {"id": user_id, "is_bot": False, "first_name": "Тест"}
+        return Update.model_validate(
+            {
+                "update_id": update_id,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": user,
+                    "text": text,
+                },
+            },
+            context={"bot": bot},
+        )
+
+    async def wizard(user_id: int) -> None:
+        for step, text in enumerate(STEPS):
+            dp = dispatchers[(user_id + step) % replicas]
+            await dp.feed_update(bot, make_update(user_id, text))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(wizard(user_id) for user_id in range(1, users + 1)))
+    elapsed = time.perf_counter() - start
+
+    check = dispatchers[0].storage
+    for user_id in range(1, users + 1):
+        key = StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id)
+        assert await check.get_state(key) == FilterForm.price_from.state, user_id
+        data = await check.get_data(key)
+        assert (data["brand"], data["model"], data["year_from"], data["year_to"]) == ("Kia", "Rio", 2015, 2020)
+        assert len(data["message_ids"]) == 2 * len(STEPS) - 1
+
+    for dp in dispatchers:
+        await dp.fsm.close()
+    await bot.session.close()
+    await telegram.stop()
+    await redis_server.stop()
+
+    total = users * len(STEPS)
+    print(f"пользователей: {users}, реплик: {replicas}, обновлений: {total}")
+    print("состояние мастера сохранено у всех пользователей")
+    print(f"обработка: {total / elapsed:.0f} обновл./с, команд Redis: {redis_server.commands}")
+
+
+def _replica_router(router):
+    """Копия роутера с теми же обработчиками: роутер можно подключить только
+    к одному Dispatcher, а реплик в процессе несколько."""
+    from aiogram import Router
+
+    replica = Router(name=router.name)
+    for name, observer in router.observers.items():
+        replica.observers[name].handlers.extend(observer.handlers)
+    return replica
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*(args + [200, 3][len(args):])))
@@ -0,0 +1,86 @@
+"""Сравнение отрисовки уведомления заново на каждого получателя и через
+AdMessageCache (текст объявления один раз, заголовок фильтра при отправке).
+
+Запуск: python -m benchmarks.bench_message_render
+"""
+import random
+import time
+from types import SimpleNamespace
+
+from app.bot.messages import AdMessageCache
+
+
+def legacy_render(ad, filter_name: str) -> str:
+    """Сборка текста, как в send_ad_notification до AdMessageCache."""
+    message = f"🚗 <b>Новое объявление по вашему фильтру: {filter_name}</b>\n\n"
+
+    if ad.brand and ad.model:
+        message += f"🔹 <b>{ad.brand} {ad.model}</b>\n"
+    elif ad.title:
+        message += f"🔹 <b>{ad.title}</b>\n"
+
+    if ad.year:
+        message += f"📅 Год: {ad.year}\n"
+
+    if ad.price:
+        price_str = f"{ad.price:,}".replace(",", " ")
+        message += f"💰 Цена: {price_str} ₽\n"
+
+    if ad.mileage:
+        mileage_str = f"{ad.mileage:,}".replace(",", " ")
+        message += f"🛣️ Пробег: {mileage_str} км\n"
+
+    if ad.region:
+        message += f"📍 Регион: {ad.region}\n"
+
+    message += f"\n🔗 <a href='{ad.url}'>Посмотреть объявление</a>"
+    return message
+
+
+def random_ad(rng: random.Random, ad_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=ad_id,
+        title=f"Продаю авто {ad_id}",
+        brand=rng.choice(["Kia", "Lada", "", None]),
+        model=rng.choice(["Rio", "Granta", ""]),
+        year=rng.choice([None, rng.randint(1995, 2024)]),
+        price=rng.choice([None, rng.randint(50, 5000) * 1000]),
+        mileage=rng.choice([None, rng.randint(1, 400) * 1000]),
+        region=rng.choice(["Назрань", "Грозный", None]),
+        url=f"https://berkat.ru/board/{ad_id}",
+    )
+
+
+def main() -> None:
+    rng = random.Random(42)
+    ads = [random_ad(rng, ad_id) for ad_id in range(200)]
+    recipients = [f"Фильтр {i}" for i in range(500)]
+
+    cache = AdMessageCache()
+    for ad in ads:
+        for filter_name in recipients[:5]:
+            assert cache.render(ad, filter_name) == legacy_render(ad, filter_name)
+    cache.evict(ad.id for ad in ads)
+
+    start = time.perf_counter()
+    for ad in ads:
+        for filter_name in recipients:
+            legacy_render(ad, filter_name)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ad in ads:
+        for filter_name in recipients:
+            cache.render(ad, filter_name)
+        cache.evict([ad.id])
+    cached_time = time.perf_counter() - start
+
+    total = len(ads) * len(recipients)
+    print(f"объявлений: {len(ads)}, получателей на объявление: {len(recipients)}")
+    print(f"сборка на каждого получателя: {total / legacy_time:>10.0f} сообщ./с")
+    print(f"AdMessageCache:               {total / cached_time:>10.0f} сообщ./с")
+    print(f"ускорение: {legacy_time / cached_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
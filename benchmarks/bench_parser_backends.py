@@ -0,0 +1,90 @@
+"""Время и пиковая память разбора страницы для каждого backend парсера.
+
+Запуск: python -m benchmarks.bench_parser_backends [страница.html ...]
+
+Без аргументов используются синтетические страницы выдачи. Для реальных
+замеров сохраните несколько страниц https://berkat.ru/avto и передайте пути.
+Память считается через tracemalloc, то есть без внутренних буферов libxml2.
+"""
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from app.parsers.berkat_page import PARSER_BACKENDS, parse_page
+
+
+logging.disable(logging.CRITICAL)
+
+TITLES = [
+    "Продаю Лада Гранта 2015", "Киа Рио 2018 в отличном состоянии", "Hyundai Solaris 2020",
+    "Ремонт двигателей", "BMW X5 2012", "Приора 2010 хэтчбек", "Тойота Камри 2019",
+]
+REGIONS = ["Назрань", "Грозный", "Махачкала", "Магас"]
+
+
+def synthetic_page(rng: random.Random, start: int, blocks: int = 30) -> str:
+    cards = []
+    for i in range(blocks):
+        cards.append(
+            f'<div class="board_list_item"><div class="pic"><img src="/img/{start + i}.jpg"></div>'
+            f'<h3 class="board_list_item_title"><a href="/content/{start + i}">{rng.choice(TITLES)}</a></h3>'
+            f'<div class="price"><span>{rng.randint(2, 30) * 50} 000 ₽</span></div>'
+            f'<div class="info"><span>Пробег {rng.randint(10, 300)} тыс. км</span></div>'
+            f'<div class="city"><span>{rng.choice(REGIONS)}</span></div></div>'
+        )
+    chrome = "".join(f'<li><a href="/cat/{i}">Раздел {i}</a></li>' for i in range(300))
+    return (
+        "<html><head><script>var config = {};</script></head><body>"
+        f"<nav><ul>{chrome}</ul></nav><div class='board_list'>{''.join(cards)}</div>"
+        f"<footer>{chrome}</footer></body></html>"
+    )
+
+
+def load_pages(paths: List[str]) -> List[str]:
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                pages.append(f.read())
+        return pages
+
+    rng = random.Random(42)
+    return [synthetic_page(rng, 100000 + page * 100) for page in range(10)]
+
+
+def strip_timestamps(ads: List[dict]) -> List[dict]:
+    return [{k: v for k, v in ad.items() if k != "parsed_at"} for ad in ads]
+
+
+def main() -> None:
+    pages = load_pages(sys.argv[1:])
+    reference = [strip_timestamps(parse_page(html, "bs4")[0]) for html in pages]
+
+    print(f"страниц: {len(pages)}")
+    print(f"{'backend':>10} {'мс/страница':>12} {'пик памяти, КБ':>15}")
+    for backend in PARSER_BACKENDS:
+        for html, expected in zip(pages, reference):
+            ads, _ = parse_page(html, backend)
+            assert strip_timestamps(ads) == expected, f"{backend} расходится с bs4"
+
+        start = time.perf_counter()
+        for _ in range(3):
+            for html in pages:
+                parse_page(html, backend)
+        per_page = (time.perf_counter() - start) / (3 * len(pages))
+
+        peak = 0
+        for html in pages:
+            tracemalloc.start()
+            parse_page(html, backend)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        print(f"{backend:>10} {per_page * 1000:>12.2f} {peak / 1024:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
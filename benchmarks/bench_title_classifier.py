@@ -0,0 +1,76 @@
+"""Сравнение classify_title с прежними циклами re.search по шаблонам.
+
+Запуск: python -m benchmarks.bench_title_classifier
+"""
+import random
+import re
+import time
+from typing import Optional, Tuple
+
+from app.parsers.title_classifier import KNOWN_BRANDS, NON_CAR_PATTERNS, classify_title
+
+
+def legacy_classify(title_lower: str) -> Optional[Tuple[str, str]]:
+    """Логика parse_ad_block до перехода на classify_title."""
+    if any(re.search(pattern, title_lower) for pattern in NON_CAR_PATTERNS):
+        return None
+
+    for brand_candidate in KNOWN_BRANDS:
+        if re.search(rf'\b{re.escape(brand_candidate)}\b', title_lower):
+            parts = re.split(rf'\b{re.escape(brand_candidate)}\b', title_lower, maxsplit=1)
+            model = parts[1].strip().title() if len(parts) > 1 else ""
+            return brand_candidate, model
+    return "", ""
+
+
+def new_classify(title_lower: str) -> Optional[Tuple[str, str]]:
+    classification = classify_title(title_lower)
+    if classification.is_non_car:
+        return None
+    if not classification.brand:
+        return "", ""
+    return classification.brand, title_lower[classification.brand_end:].strip().title()
+
+
+WORDS = [
+    "продаю", "срочно", "в", "отличном", "состоянии", "торг", "обмен", "2012", "г.в.",
+    "хэтчбек", "седан", "один", "хозяин", "на", "запчасти", "ремонт", "бампер",
+    "ваз-2107", "мерседес-бенц", "x5", "camry", "sport",
+]
+
+
+def random_title(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(2, 8))
+    for _ in range(rng.choice([0, 1, 1, 1, 2])):
+        words.insert(rng.randint(0, len(words)), rng.choice(KNOWN_BRANDS))
+    return " ".join(words)
+
+
+def bench(func, titles, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for title in titles:
+            func(title)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    rng = random.Random(42)
+    titles = [random_title(rng) for _ in range(5_000)]
+
+    for title in titles:
+        assert legacy_classify(title) == new_classify(title), title
+
+    legacy_time = bench(legacy_classify, titles)
+    new_time = bench(new_classify, titles)
+
+    print(f"заголовков: {len(titles)}")
+    print(f"прежние циклы re.search: {len(titles) / legacy_time:>10.0f} блоков/с")
+    print(f"classify_title:          {len(titles) / new_time:>10.0f} блоков/с")
+    print(f"ускорение: {legacy_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Нагрузочный тест webhook: обновления отправляются в приложение из
+app.bot.webhook, ответы бота уходят в фейковый Bot API (fake_telegram).
+
+Используются настоящие обработчики бота; обновление — кнопка «Помощь»,
+которая не обращается к БД, так что тест работает без сети и Postgres.
+
+Запуск: python -m benchmarks.bench_webhook [обновлений] [одновременных запросов]
+"""
+import asyncio
+import logging
+import sys
+import time
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from app.bot.handlers import router
+from app.bot.webhook import create_webhook_app
+from app.core.config import settings
+from benchmarks.fake_telegram import FakeTelegramServer
+
+
+logging.disable(logging.CRITICAL)
+
+WEBHOOK_PORT = 8090
+
+
+def make_update(update_id: int) -> dict:
+    user = {"id": 100000 + update_id % 1000, "is_bot": False, "first_name": "Тест"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user["id"], "type": "private"},
+            "from": user,
+            "text": "ℹ️ Помощь",
+        },
+    }
+
+
+async def main(total: int, concurrency: int) -> None:
+    telegram = FakeTelegramServer(latency=0.005)
+    api_url = await telegram.start()
+
+    bot = Bot(
+        token=settings.BOT_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)),
+    )
+    dp = Dispatcher()
+    dp.include_router(router)
+
+    runner = web.AppRunner(create_webhook_app(dp, bot))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", WEBHOOK_PORT).start()
+
+    url = f"http://127.0.0.1:{WEBHOOK_PORT}{settings.WEBHOOK_PATH}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": settings.WEBHOOK_SECRET}
+    slots = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession() as client:
+
+        async def post(update_id: int) -> None:
+            async with slots:
+                async with client.post(url, json=make_update(update_id), headers=headers) as response:
+                    assert response.status == 200, response.status
+
+        start = time.perf_counter()
+        await asyncio.gather(*(post(i) for i in range(1, total + 1)))
+        accepted = time.perf_counter() - start
+        await telegram.wait_for("sendmessage", total)
+        handled = time.perf_counter() - start
+
+    await runner.cleanup()
+    await telegram.stop()
+
+    print(f"обновлений: {total}, одновременных запросов: {concurrency}")
+    print(f"приём webhook:    {total / accepted:>8.0f} обновл./с")
+    print(f"обработка+ответ:  {total / handled:>8.0f} обновл./с")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*(args + [2000, 50][len(args):])))
@@ -0,0 +1,143 @@
+"""Локальная замена Redis для проверок без настоящего сервера.
+
+Говорит по протоколу RESP2 и понимает только команды, которые использует
+FSM-хранилище aiogram: GET/SET (EX, PX, NX)/DEL/EXISTS и снятие блокировки
+redis-py (EVALSHA скрипта Lock.release). Данные живут в памяти процесса.
+Бота можно направить на неё через REDIS_URL=redis://127.0.0.1:6390/0.
+
+Запуск отдельно: python -m benchmarks.fake_redis [порт]
+"""
+import asyncio
+import hashlib
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from redis.asyncio.lock import Lock
+
+
+RELEASE_SHA = hashlib.sha1(Lock.LUA_RELEASE_SCRIPT.encode()).hexdigest()
+
+
+class FakeRedisServer:
+    def __init__(self) -> None:
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 6390) -> str:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return f"redis://{host}:{port}/0"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                command = await self._read_command(reader)
+                if command is None:
+                    break
+                self.commands += 1
+                writer.write(self._execute(command))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expire_at = item
+        if expire_at is not None and expire_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _execute(self, command: List[bytes]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name in (b"CLIENT", b"SELECT", b"FLUSHDB"):
+            if name == b"FLUSHDB":
+                self.data.clear()
+            return b"+OK\r\n"
+        if name == b"GET":
+            return _bulk(self._get(args[0]))
+        if name == b"SET":
+            return self._set(args)
+        if name == b"DEL":
+            deleted = sum(self._get(key) is not None and self.data.pop(key) is not None for key in args)
+            return _integer(deleted)
+        if name == b"EXISTS":
+            return _integer(sum(self._get(key) is not None for key in args))
+        if name == b"SCRIPT" and args[0].upper() == b"LOAD":
+            return _bulk(hashlib.sha1(args[1]).hexdigest().encode())
+        if name == b"EVALSHA" and args[0].decode() == RELEASE_SHA:
+            key, token = args[2], args[3]
+            if self._get(key) != token:
+                return _integer(0)
+            del self.data[key]
+            return _integer(1)
+        if name == b"EVALSHA":
+            return b"-NOSCRIPT No matching script\r\n"
+        return b"-ERR unknown command '" + name + b"'\r\n"
+
+    def _set(self, args: List[bytes]) -> bytes:
+        key, value = args[0], args[1]
+        expire_at = None
+        only_new = False
+        options = [arg.upper() for arg in args[2:]]
+        for i, option in enumerate(options):
+            if option == b"EX":
+                expire_at = time.monotonic() + int(args[3 + i])
+            elif option == b"PX":
+                expire_at = time.monotonic() + int(args[3 + i]) / 1000
+            elif option == b"NX":
+                only_new = True
+
+        if only_new and self._get(key) is not None:
+            return _bulk(None)
+        self.data[key] = (value, expire_at)
+        return b"+OK\r\n"
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _integer(value: int) -> bytes:
+    return b":%d\r\n" % value
+
+
+async def _serve(port: int) -> None:
+    server = FakeRedisServer()
+    url = await server.start(port=port)
+    print(f"Фейковый Redis: {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve(int(sys.argv[1]) if len(sys.argv) > 1 else 6390))
@@ -0,0 +1,85 @@
+"""Локальный фейковый сервер Bot API для нагрузочных тестов без сети.
+
+Отвечает на вызовы /bot<token>/<method> успешным результатом, считает
+вызовы по методам и может имитировать задержку Telegram. Бота можно
+направить на него через TELEGRAM_API_URL=http://127.0.0.1:8081.
+
+Запуск отдельно: python -m benchmarks.fake_telegram [порт]
+"""
+import asyncio
+import itertools
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+
+class FakeTelegramServer:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_route("*", "/bot{token}/{method}", self._handle)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def wait_for(self, method: str, count: int, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        while self.calls[method] < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{method}: {self.calls[method]} из {count}")
+            await asyncio.sleep(0.01)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = dict(await request.post())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls[method] += 1
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "getme":
+            return {"id": 1, "is_bot": True, "first_name": "CarBot", "username": "car_bot"}
+        if method in ("sendmessage", "sendphoto"):
+            message = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+            }
+            if method == "sendphoto":
+                message["photo"] = [
+                    {"file_id": f"fake-{message['message_id']}", "file_unique_id": "u", "width": 1, "height": 1}
+                ]
+            else:
+                message["text"] = params.get("text", "")
+            return message
+        return True
+
+
+async def _serve(port: int) -> None:
+    server = FakeTelegramServer()
+    url = await server.start(port=port)
+    print(f"Фейковый Bot API: {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8081))
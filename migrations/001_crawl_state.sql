@@ -0,0 +1,7 @@
+-- Состояние инкрементального обхода по источникам
+CREATE TABLE IF NOT EXISTS crawl_state (
+    source varchar(50) PRIMARY KEY,
+    high_water_id bigint,
+    recent_external_ids jsonb NOT NULL DEFAULT '[]'::jsonb,
+    updated_at timestamp DEFAULT now()
+);
@@ -0,0 +1,3 @@
+-- Канонический бренд объявления; старые строки заполняет backfill_ad_canonical_brands
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS canonical_brand varchar(50);
+CREATE INDEX IF NOT EXISTS ix_ads_canonical_brand ON ads (canonical_brand);
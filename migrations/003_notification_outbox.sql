@@ -0,0 +1,24 @@
+-- Outbox уведомлений
+DO $$
+BEGIN
+    CREATE TYPE outboxstatus AS ENUM ('pending', 'sending', 'delivered', 'failed');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id serial PRIMARY KEY,
+    user_id bigint NOT NULL REFERENCES users (telegram_id) ON DELETE CASCADE,
+    ad_id integer NOT NULL REFERENCES ads (id) ON DELETE CASCADE,
+    filter_id integer NOT NULL REFERENCES filter_sets (id) ON DELETE CASCADE,
+    filter_name varchar(100) NOT NULL,
+    status outboxstatus NOT NULL DEFAULT 'pending',
+    attempts integer NOT NULL DEFAULT 0,
+    available_at timestamp NOT NULL DEFAULT now(),
+    created_at timestamp NOT NULL DEFAULT now(),
+    delivered_at timestamp,
+    CONSTRAINT unique_outbox_user_ad_filter UNIQUE (user_id, ad_id, filter_id)
+);
+CREATE INDEX IF NOT EXISTS ix_notification_outbox_status_available
+    ON notification_outbox (status, available_at);
@@ -0,0 +1,32 @@
+-- Поля filters_json в виде колонок для сопоставления объявлений в SQL
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS brand varchar GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'brand') = 'string' THEN NULLIF(btrim(filters_json->>'brand'), '') END
+) STORED;
+-- canonical_brand — обычная колонка: normalize_brand есть только в Python,
+-- её заполняет приложение при записи фильтра
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS canonical_brand varchar(50);
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS model varchar GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'model') = 'string' THEN NULLIF(lower(btrim(filters_json->>'model')), '') END
+) STORED;
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS region varchar GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'region') = 'string' THEN NULLIF(lower(btrim(filters_json->>'region')), '') END
+) STORED;
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS min_year numeric GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'min_year') = 'number' THEN NULLIF((filters_json->>'min_year')::numeric, 0) END
+) STORED;
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS max_year numeric GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'max_year') = 'number' THEN NULLIF((filters_json->>'max_year')::numeric, 0) END
+) STORED;
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS min_price numeric GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'min_price') = 'number' THEN NULLIF((filters_json->>'min_price')::numeric, 0) END
+) STORED;
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS max_price numeric GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'max_price') = 'number' THEN NULLIF((filters_json->>'max_price')::numeric, 0) END
+) STORED;
+ALTER TABLE filter_sets ADD COLUMN IF NOT EXISTS max_mileage numeric GENERATED ALWAYS AS (
+    CASE WHEN jsonb_typeof(filters_json->'max_mileage') = 'number' THEN NULLIF((filters_json->>'max_mileage')::numeric, 0) END
+) STORED;
+CREATE INDEX IF NOT EXISTS ix_filter_sets_active_brand_price
+    ON filter_sets (canonical_brand, min_price, max_price) WHERE is_active;
+CREATE INDEX IF NOT EXISTS ix_filter_sets_active_any_brand_price
+    ON filter_sets (min_price, max_price) WHERE is_active AND brand IS NULL;
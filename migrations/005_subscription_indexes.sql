@@ -0,0 +1,3 @@
+-- Отбор фильтров пользователей с действующей подпиской
+CREATE INDEX IF NOT EXISTS ix_users_subscription ON users (subscription_status, subscription_end);
+CREATE INDEX IF NOT EXISTS ix_filter_sets_active_user ON filter_sets (user_id) WHERE is_active;
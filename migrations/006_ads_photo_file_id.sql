@@ -0,0 +1,2 @@
+-- file_id фото объявления в Telegram
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS photo_file_id varchar(255);
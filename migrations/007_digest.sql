@@ -0,0 +1,3 @@
+-- Режим дайджеста
+ALTER TABLE users ADD COLUMN IF NOT EXISTS digest_enabled boolean NOT NULL DEFAULT false;
+ALTER TABLE notification_outbox ADD COLUMN IF NOT EXISTS digest boolean NOT NULL DEFAULT false;
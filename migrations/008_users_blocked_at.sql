@@ -0,0 +1,2 @@
+-- Пользователи, у которых чат с ботом недоступен
+ALTER TABLE users ADD COLUMN IF NOT EXISTS blocked_at timestamp;
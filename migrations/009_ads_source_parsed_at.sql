@@ -0,0 +1,2 @@
+-- Выдача /ads по источнику
+CREATE INDEX IF NOT EXISTS ix_ads_source_parsed_at ON ads (source, parsed_at);
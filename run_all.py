@@ -3,11 +3,24 @@ import logging
 import platform
 import sys
 
-from aiogram import Bot, Dispatcher
+from aiogram import Dispatcher
 
 from app.bot.handlers import router
+from app.bot.notifier import notification_dispatcher
+from app.bot.storage import create_event_isolation, create_fsm_storage
+from app.bot.telegram_bot import bot
+from app.bot.webhook import run_webhook
 from app.core.config import settings
-from app.parsers.berkat_parser import berkat_parse_task_async
+from app.db.crud import backfill_ad_canonical_brands, backfill_filter_canonical_brands
+from app.db.migrate import apply_migrations
+from app.db.session import async_session
+from app.parsers.base import AdSource
+from app.parsers.crawler import crawl_source, shutdown_parse_pool
+from app.parsers.sources import enabled_sources
+from app.tasks.leader import LeaderLock
+from app.tasks.scheduler import AdaptiveCrawlSchedule
+from app.tasks.outbox import outbox_worker
+from app.tasks.subscriptions import periodic_subscription_expiry
 
 
 if platform.system() == "Windows":
@@ -20,37 +33,91 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def periodic_parsing() -> None:
+async def periodic_source_parsing(source: AdSource) -> None:
+    schedule = AdaptiveCrawlSchedule()
+    loop = asyncio.get_running_loop()
+    last_started = None
     while True:
-        logger.info("⏰ Starting berkat.ru parsing...")
+        logger.info(f"⏰ Starting {source.name} parsing...")
+        started = loop.time()
         try:
-            await berkat_parse_task_async()
-            logger.info("✅ Parsing completed. Next run in 10 minutes.")
+            new_ads = await crawl_source(source)
+            if last_started is not None:
+                schedule.record(new_ads, started - last_started)
+            last_started = started
+            logger.info(f"✅ {source.name} parsing completed: {new_ads} new ads.")
         except Exception as e:
-            logger.error(f"❌ Parsing error: {e}")
+            logger.error(f"❌ {source.name} parsing error: {e}")
+
+        delay = schedule.next_delay()
+        logger.info(f"⏰ Next {source.name} run in {delay:.0f} s")
+        await asyncio.sleep(delay)
+
+
+async def periodic_parsing() -> None:
+    # У каждого источника свой темп и свои ограничения частоты запросов
+    await asyncio.gather(*(periodic_source_parsing(source) for source in enabled_sources()))
+
 
-        await asyncio.sleep(600)
+async def backfill_ads() -> None:
+    # Пока не закончится, /ads сравнивает старые объявления по lower(brand)
+    try:
+        async with async_session() as db:
+            updated = await backfill_ad_canonical_brands(db)
+        if updated:
+            logger.info(f"Canonical brand added to {updated} ads")
+    except Exception as e:
+        logger.error(f"❌ Ad backfill error: {e}")
 
 
 async def main() -> None:
-    bot = Bot(token=settings.BOT_TOKEN)
-    dp = Dispatcher()
+    applied = await apply_migrations()
+    if applied:
+        logger.info(f"Applied migrations: {', '.join(applied)}")
+
+    storage = create_fsm_storage()
+    dp = Dispatcher(storage=storage, events_isolation=create_event_isolation(storage))
     dp.include_router(router)
 
-    asyncio.create_task(periodic_parsing())
+    try:
+        async with async_session() as db:
+            updated = await backfill_filter_canonical_brands(db)
+        if updated:
+            logger.info(f"Canonical brand added to {updated} filters")
+    except Exception as e:
+        logger.error(f"❌ Filter backfill error: {e}")
+    asyncio.create_task(backfill_ads())
+
+    notification_dispatcher.start()
+    outbox_worker.start()
+    # Краулер — только на одной реплике, остальные ждут своей очереди
+    crawler_leader = LeaderLock("periodic_parsing", settings.LEADER_LOCK_KEY)
+    asyncio.create_task(crawler_leader.run(periodic_parsing))
+    asyncio.create_task(periodic_subscription_expiry())
 
     logger.info("=" * 60)
     logger.info("✅ CarBot started!")
-    logger.info("   • Bot is accepting commands")
-    logger.info("   • Parsing berkat.ru every 10 minutes")
+    logger.info(f"   • Bot is accepting commands ({settings.BOT_MODE})")
+    logger.info(
+        f"   • Parsing {', '.join(source.name for source in enabled_sources())} every {settings.CRAWL_MIN_INTERVAL:.0f}-"
+        f"{settings.CRAWL_MAX_INTERVAL:.0f} s (on the leader replica)"
+    )
     logger.info("   • Duplicate-free notifications")
     logger.info("=" * 60)
 
     try:
-        await dp.start_polling(bot)
+        if settings.BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # getUpdates не работает, пока у бота установлен webhook
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except KeyboardInterrupt:
         logger.info("👋 Bot stopped by user")
     finally:
+        await outbox_worker.stop()
+        await notification_dispatcher.stop()
+        shutdown_parse_pool()
         await bot.session.close()
         logger.info("✅ System shut down correctly")
 
@@ -0,0 +1,65 @@
+"""Случайные фильтры и объявления для сверки способов сопоставления,
+включая значения, которые пользователь мог сохранить в filters_json
+вручную: 0, строки и true вместо чисел, пустые строки."""
+import random
+from typing import Dict, List
+
+from app.db.models import FilterSet
+from app.utils.brands import normalize_brand
+
+
+BRANDS = ["Лада", "ВАЗ", "Toyota", "тойота", "BMW", "Kia", "Haval", "", "   "]
+MODELS = ["Granta", "Vesta", "Rio", "Camry", "X5", "", "  "]
+REGIONS = ["Назрань", "магас", "Грозный", "ингушетия", "ЧЕЧНЯ", "москва"]
+ODD_BOUNDS = [0, "2010", "", True, None, 0.0]
+
+
+def _maybe(rng: random.Random, p: float, value):
+    return value if rng.random() < p else None
+
+
+def random_filters(rng: random.Random) -> Dict:
+    def bound(low: int, high: int, step: int = 1):
+        if rng.random() < 0.15:
+            return rng.choice(ODD_BOUNDS)
+        return _maybe(rng, 0.5, rng.randint(low, high) * step)
+
+    filters = {
+        "brand": _maybe(rng, 0.8, rng.choice(BRANDS)),
+        "model": _maybe(rng, 0.3, rng.choice(MODELS)),
+        "min_year": bound(1995, 2020),
+        "max_year": bound(2005, 2025),
+        "min_price": bound(1, 10, 100_000),
+        "max_price": bound(2, 40, 100_000),
+        "max_mileage": bound(5, 30, 10_000),
+        "region": _maybe(rng, 0.2, rng.choice(REGIONS)),
+    }
+    if rng.random() < 0.05:
+        filters["brand"] = 42
+    return {key: value for key, value in filters.items() if value is not None or rng.random() < 0.5}
+
+
+def random_filter_sets(rng: random.Random, count: int) -> List[FilterSet]:
+    return [
+        FilterSet(id=i, user_id=i, name=f"f{i}", filters_json=random_filters(rng))
+        for i in range(1, count + 1)
+    ]
+
+
+def random_ads(rng: random.Random, count: int) -> List[Dict]:
+    ads = []
+    for _ in range(count):
+        brand = rng.choice(BRANDS[:-2])
+        ads.append(
+            {
+                "title": "Продаю авто",
+                "brand": brand,
+                "canonical_brand": normalize_brand(brand),
+                "model": rng.choice(MODELS[:-2]) + rng.choice(["", " Sport", " Cross"]),
+                "year": _maybe(rng, 0.8, rng.randint(1995, 2025)),
+                "price": _maybe(rng, 0.8, rng.randint(50, 5000) * 1000),
+                "mileage": _maybe(rng, 0.8, rng.randint(1, 400) * 1000),
+                "region": rng.choice(REGIONS),
+            }
+        )
+    return ads
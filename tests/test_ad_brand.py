@@ -0,0 +1,73 @@
+import asyncio
+from collections import namedtuple
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.crud import ad_brand_clause, backfill_ad_canonical_brands
+from app.db.models import Ad
+
+
+def compile_where(brand: str) -> str:
+    query = select(Ad.id).where(ad_brand_clause(brand))
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_brand_matches_canonical_column():
+    sql = compile_where("Лада")
+    assert "ads.canonical_brand = 'lada'" in sql
+
+
+def test_ads_without_canonical_brand_fall_back_to_spellings():
+    sql = compile_where("Лада")
+    assert "ads.canonical_brand IS NULL" in sql
+    assert "lower(btrim(ads.brand))" in sql
+    for spelling in ("'lada'", "'ваз'", "'приора'"):
+        assert spelling in sql
+
+
+def test_unknown_brand_falls_back_to_lowered_brand():
+    sql = compile_where("  Zaz ")
+    assert "ads.canonical_brand = 'zaz'" in sql
+    assert "IN ('zaz')" in sql
+
+
+class FakeBackfillSession:
+    """Отдаёт строки ads пачками по условию id > last_id и запоминает обновления."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.updates = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        if params is not None:
+            self.updates.extend(params)
+            return None
+        last_id = statement.whereclause.clauses[0].right.value
+        limit = statement._limit
+        batch = [row for row in self.rows if row[0] > last_id][:limit]
+        return SimpleNamespace(all=lambda: [Row(*row) for row in batch])
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+Row = namedtuple("Row", "id brand")
+
+
+def test_backfill_updates_known_brands_in_batches():
+    db = FakeBackfillSession([(1, "Лада"), (2, "??"), (3, "Toyota"), (5, "бмв"), (8, "хендай")])
+    updated = asyncio.run(backfill_ad_canonical_brands(db, batch_size=2))
+    assert updated == 4
+    assert db.updates == [
+        {"id": 1, "canonical_brand": "lada"},
+        {"id": 3, "canonical_brand": "toyota"},
+        {"id": 5, "canonical_brand": "bmw"},
+        {"id": 8, "canonical_brand": "hyundai"},
+    ]
+    assert db.commits == 3
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from aiogram.exceptions import TelegramForbiddenError
+
+from app.bot.notifier import Notification, NotificationDispatcher
+from app.db import crud
+from app.db.models import NotificationOutbox, User
+from app.tasks import outbox
+from app.tasks.outbox import OutboxWorker
+from tests.conftest import FakeSession, RecordingSession, compiled
+
+
+def test_claim_skips_blocked_users():
+    db = RecordingSession()
+    asyncio.run(crud.claim_outbox_batch(db, limit=10, lease_seconds=300))
+    sql = compiled(db.statements[0])
+    assert "NOT (EXISTS (SELECT users.telegram_id" in sql
+    assert "users.blocked_at IS NOT NULL" in sql
+
+
+def test_deactivate_only_turns_off_filters_of_newly_blocked_users():
+    # Пользователь 2 уже отмечен (или успел нажать /start и отмечен заново не будет)
+    db = RecordingSession(returned=[1])
+    assert asyncio.run(crud.deactivate_blocked_users(db, [1, 2])) == [1]
+
+    users, filters, outbox_rows = (compiled(statement) for statement in db.statements)
+    assert "users.blocked_at IS NULL" in users
+    assert "filter_sets.user_id IN (1)" in filters
+    assert "users.blocked_at IS NOT NULL" in outbox_rows
+
+
+def test_deactivate_without_newly_blocked_users_keeps_filters():
+    db = RecordingSession(returned=[])
+    assert asyncio.run(crud.deactivate_blocked_users(db, [2])) == []
+    assert not any("filter_sets" in compiled(statement) for statement in db.statements)
+
+
+def blocked_error():
+    return TelegramForbiddenError(method=None, message="Forbidden: bot was blocked by the user")
+
+
+def test_dispatcher_stops_sending_to_dead_chat_until_revived():
+    sent = []
+    blocked = {2}
+
+    async def send(telegram_id, ad, filter_name):
+        if telegram_id in blocked:
+            raise blocked_error()
+        sent.append(telegram_id)
+
+    async def run():
+        dispatcher = NotificationDispatcher(send=send, workers=2, rate=1000, chat_interval=0)
+        results = []
+        for chat_id in (1, 2, 2):
+            results.append(await dispatcher.submit(Notification(chat_id, None, 1, "f")))
+        await dispatcher.join()
+        first = [result.result() for result in results]
+        assert dispatcher.dead_chats == {2}
+
+        blocked.clear()
+        dispatcher.revive(2)
+        again = await dispatcher.submit(Notification(2, None, 1, "f"))
+        await dispatcher.join()
+        await dispatcher.stop()
+        return first, again.result(), dispatcher.stats()
+
+    first, again, stats = asyncio.run(run())
+    assert first == [True, False, False]
+    assert again is True
+    assert sent == [1, 2]
+    assert stats["terminal"] == 1 and stats["skipped_dead"] == 1
+
+
+def test_worker_records_dead_chats_in_db_and_drops_them_from_memory(monkeypatch):
+    calls = SimpleNamespace(deactivated=[], completed=[], released=[])
+
+    async def send(telegram_id, ad, filter_name):
+        if telegram_id == 2:
+            raise blocked_error()
+
+    async def get_ads_by_ids(db, ad_ids):
+        return {ad_id: SimpleNamespace(id=ad_id, photo_file_id=None) for ad_id in ad_ids}
+
+    async def deactivate_blocked_users(db, user_ids):
+        calls.deactivated.append(set(user_ids))
+        return list(user_ids)
+
+    async def complete_outbox_delivery(db, rows):
+        calls.completed.extend(row.id for row in rows)
+
+    async def release_outbox_failures(db, rows, max_attempts, retry_delay):
+        calls.released.extend(row.id for row in rows)
+
+    async def noop(*args):
+        return None
+
+    monkeypatch.setattr(outbox, "async_session", FakeSession)
+    monkeypatch.setattr(outbox, "get_ads_by_ids", get_ads_by_ids)
+    monkeypatch.setattr(outbox, "deactivate_blocked_users", deactivate_blocked_users)
+    monkeypatch.setattr(outbox, "complete_outbox_delivery", complete_outbox_delivery)
+    monkeypatch.setattr(outbox, "release_outbox_failures", release_outbox_failures)
+    monkeypatch.setattr(outbox, "save_photo_file_ids", noop)
+    monkeypatch.setattr(outbox, "renew_outbox_lease", noop)
+    monkeypatch.setattr(outbox.photo_file_ids, "get", lambda ad: None)
+    monkeypatch.setattr(outbox.ad_messages, "evict", lambda ads: None)
+
+    rows = [
+        NotificationOutbox(id=i, user_id=user_id, ad_id=i, filter_id=1, filter_name="f",
+                           digest=False, attempts=1)
+        for i, user_id in ((1, 1), (2, 2), (3, 2))
+    ]
+
+    async def run():
+        dispatcher = NotificationDispatcher(send=send, workers=2, rate=1000, chat_interval=0)
+        worker = OutboxWorker(dispatcher=dispatcher)
+        await worker._deliver(rows)
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert calls.completed == [1]
+    assert calls.released == []
+    assert calls.deactivated == [{2}]
+    # Отметка теперь в users.blocked_at — в памяти реплики её нет
+    assert dispatcher.dead_chats == set()
+
+
+def test_unblock_restores_filters_turned_off_by_the_block():
+    user = User(telegram_id=5, blocked_at=datetime(2026, 1, 1))
+    db = RecordingSession()
+    asyncio.run(crud.unblock_user(db, user))
+
+    sql = compiled(db.statements[0])
+    assert "filter_sets.user_id = 5" in sql
+    assert "filter_sets.is_active IS false" in sql
+    assert "filter_sets.updated_at >= '2026-01-01 00:00:00'" in sql
+    assert user.blocked_at is None
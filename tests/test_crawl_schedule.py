@@ -0,0 +1,71 @@
+import random
+
+from app.core.config import settings
+from app.tasks.scheduler import AdaptiveCrawlSchedule
+
+
+def schedule(**kwargs):
+    params = dict(min_interval=120, max_interval=1800, target_new_ads=3, jitter=0, smoothing=0.5)
+    params.update(kwargs)
+    return AdaptiveCrawlSchedule(rng=random.Random(1), **params)
+
+
+def test_explicit_zero_is_not_replaced_by_settings():
+    s = AdaptiveCrawlSchedule(min_interval=0, target_new_ads=0, jitter=0, smoothing=0)
+    assert s.min_interval == 0
+    assert s.target_new_ads == 0
+    assert s.jitter == 0
+    assert s.smoothing == 0
+
+
+def test_defaults_come_from_settings():
+    s = AdaptiveCrawlSchedule()
+    assert s.min_interval == settings.CRAWL_MIN_INTERVAL
+    assert s.max_interval == settings.CRAWL_MAX_INTERVAL
+    assert s.target_new_ads == settings.CRAWL_TARGET_NEW_ADS
+    assert s.jitter == settings.CRAWL_JITTER
+    assert s.smoothing == settings.CRAWL_SMOOTHING
+
+
+def test_starts_with_fixed_interval():
+    assert schedule().next_delay() == 600
+
+
+def test_interval_follows_rate_of_new_ads():
+    s = schedule()
+    # 3 объявления за 300 сек — целевые 3 за цикл дают 300 сек
+    s.record(3, 300)
+    assert s.next_delay() == 300
+
+
+def test_interval_is_clamped():
+    busy = schedule()
+    busy.record(100, 60)
+    assert busy.next_delay() == 120
+
+    quiet = schedule()
+    quiet.record(0, 600)
+    assert quiet.next_delay() == 1800
+
+
+def test_rate_is_smoothed_between_cycles():
+    s = schedule(smoothing=0.5)
+    s.record(6, 600)
+    s.record(0, 600)
+    # Частота 0.01 → 0.005 объявл./сек, интервал 3 / 0.005
+    assert s.rate == 0.005
+    assert s.next_delay() == 600
+
+
+def test_zero_elapsed_is_ignored():
+    s = schedule()
+    s.record(5, 0)
+    assert s.rate is None
+
+
+def test_jitter_stays_within_bounds():
+    s = schedule(jitter=0.1)
+    s.record(3, 300)
+    delays = [s.next_delay() for _ in range(200)]
+    assert all(270 <= delay <= 330 for delay in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from app.db.models import FilterSet
+from app.parsers.matching import FilterIndex, _RangeIndex, matches_filter
+from tests.matching_cases import random_ads, random_filter_sets
+
+
+def filter_set(**filters):
+    return FilterSet(id=1, user_id=1, name="f", filters_json=filters)
+
+
+AD = {"title": "Гранта", "brand": "Лада", "canonical_brand": "lada", "model": "Granta",
+      "year": 2015, "price": 500_000, "mileage": 90_000, "region": "назрань"}
+
+
+@pytest.mark.parametrize("bound", [0, "2020", "", True, False, None, [2020]])
+def test_non_numeric_bound_means_no_bound(bound):
+    # Так же колонки filter_sets: граница есть только у числа, отличного от 0
+    for key in ("min_year", "max_year", "min_price", "max_price", "max_mileage"):
+        fs = filter_set(brand="лада", **{key: bound})
+        assert matches_filter(AD, fs)
+        assert FilterIndex([fs]).match(AD) == [1]
+
+
+@pytest.mark.parametrize("brand", ["", "   ", 42, None])
+def test_blank_or_non_string_brand_means_any_brand(brand):
+    fs = filter_set(brand=brand, max_price=600_000)
+    assert matches_filter(AD, fs)
+    assert FilterIndex([fs]).match(AD) == [1]
+
+
+def test_numeric_bounds_still_apply():
+    assert not matches_filter(AD, filter_set(min_year=2016))
+    assert not matches_filter(AD, filter_set(max_price=499_999.5))
+    assert matches_filter(AD, filter_set(min_year=2015, max_year=2015))
+
+
+def test_filter_index_agrees_with_matches_filter():
+    rng = random.Random(7)
+    filter_sets = random_filter_sets(rng, 500)
+    index = FilterIndex(filter_sets)
+
+    for ad in random_ads(rng, 300):
+        expected = [fs.id for fs in filter_sets if matches_filter(ad, fs)]
+        assert index.match(ad) == expected, ad
+
+
+def test_range_index_returns_bounds_of_the_smaller_side():
+    index = _RangeIndex([(lo, lo + 10, lo) for lo in range(0, 100, 5)])
+
+    # lo <= 12: три фильтра; hi >= 12: девятнадцать
+    ids, start, end = index.narrowest(12)
+    assert ids is index.lo_ids and (start, end) == (0, 3)
+
+    ids, start, end = index.narrowest(95)
+    assert ids is index.hi_ids and ids[start:end] == [85, 90, 95]
@@ -0,0 +1,48 @@
+import asyncio
+import socket
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+
+from app.bot.storage import create_event_isolation, create_fsm_storage
+from app.core.config import settings
+from benchmarks.fake_redis import FakeRedisServer
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_memory_storage_without_redis_url(monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", "")
+    storage = create_fsm_storage()
+
+    assert isinstance(storage, MemoryStorage)
+    assert create_event_isolation(storage) is None
+
+
+def test_state_is_shared_between_replicas(monkeypatch):
+    key = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+    async def run():
+        server = FakeRedisServer()
+        monkeypatch.setattr(settings, "REDIS_URL", await server.start(port=free_port()))
+        # Две реплики бота — два независимых хранилища над одним Redis
+        first, second = create_fsm_storage(), create_fsm_storage()
+        try:
+            await first.set_state(key, "FilterForm:price")
+            await first.set_data(key, {"brand": "Лада"})
+            async with create_event_isolation(second).lock(key):
+                return await second.get_state(key), await second.get_data(key), first
+        finally:
+            await first.close()
+            await second.close()
+            await server.stop()
+
+    state, data, storage = asyncio.run(run())
+    assert isinstance(storage, RedisStorage)
+    assert state == "FilterForm:price"
+    assert data == {"brand": "Лада"}
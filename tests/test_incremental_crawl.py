@@ -0,0 +1,124 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.parsers import crawler
+from app.parsers.crawler import IncrementalCrawl
+from tests.conftest import FakeSession
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Подменяет БД: existing — external_id, которые уже сохранены, saved —
+    записанные состояния обхода."""
+    state = SimpleNamespace(existing=set(), saved=[])
+
+    async def get_existing_external_ids(session, source, external_ids):
+        return set(external_ids) & state.existing
+
+    async def save_crawl_state(session, source, high_water_id, recent):
+        state.saved.append((source, high_water_id, recent))
+
+    monkeypatch.setattr(crawler, "async_session", FakeSession)
+    monkeypatch.setattr(crawler, "get_existing_external_ids", get_existing_external_ids)
+    monkeypatch.setattr(crawler, "save_crawl_state", save_crawl_state)
+    return state
+
+
+def ads(*external_ids):
+    return [{"external_id": external_id} for external_id in external_ids]
+
+
+def crawl_state(high_water_id=None, recent=()):
+    return SimpleNamespace(high_water_id=high_water_id, recent_external_ids=list(recent))
+
+
+def test_stops_on_page_of_known_ads(db):
+    crawl = IncrementalCrawl("berkat.ru", crawl_state(high_water_id=100))
+    db.existing = {"150"}
+
+    assert asyncio.run(crawl(1, ads("200", "150"))) is False
+    assert asyncio.run(crawl(2, ads("150", "90"))) is True
+
+
+def test_ads_saved_from_earlier_page_are_not_known(db):
+    crawl = IncrementalCrawl("berkat.ru", crawl_state(high_water_id=100))
+
+    assert asyncio.run(crawl(1, ads("300", "250"))) is False
+    # Страница 1 уже сохранена конвейером, пока проверялась страница 2
+    db.existing = {"300", "250"}
+    assert asyncio.run(crawl(2, ads("250", "90"))) is False
+
+
+def test_save_advances_high_water(db):
+    crawl = IncrementalCrawl("berkat.ru", crawl_state(high_water_id=100))
+    asyncio.run(crawl(1, ads("300", "abc", "250")))
+    asyncio.run(crawl.save())
+
+    assert db.saved == [("berkat.ru", 300, ["300", "abc", "250"])]
+
+
+def test_failed_page_keeps_high_water(db):
+    crawl = IncrementalCrawl("berkat.ru", crawl_state(high_water_id=100))
+    asyncio.run(crawl(1, ads("300")))
+    crawl.page_failed(2)
+    asyncio.run(crawl(2, []))
+    asyncio.run(crawl(3, ads("200")))
+    asyncio.run(crawl.save())
+
+    assert db.saved == []
+    # Объявление с пропущенной страницы в следующий раз проверяется по БД
+    next_crawl = IncrementalCrawl("berkat.ru", crawl_state(high_water_id=100))
+    assert asyncio.run(next_crawl(1, ads("250"))) is False
+
+
+def test_long_numeric_ids_are_not_high_water(db):
+    long_id = "9" * 30
+    crawl = IncrementalCrawl("berkat.ru", crawl_state(high_water_id=100))
+    asyncio.run(crawl(1, ads(long_id, "120")))
+    asyncio.run(crawl.save())
+
+    assert db.saved[0][1] == 120
+    assert not crawl._is_behind_high_water(long_id)
+
+
+def test_crawl_pages_reports_failed_pages(monkeypatch):
+    async def fetch(session, url, throttle, cache, headers):
+        return None if url.endswith("page=2") else url
+
+    async def parse_page_async(source, html, page):
+        return ads(str(1000 - page))
+
+    class Cache:
+        def cached_ads(self, url, html):
+            return None
+
+        def store_ads(self, url, html, page_ads):
+            pass
+
+        def stats(self):
+            return {}
+
+    monkeypatch.setattr(crawler, "fetch", fetch)
+    monkeypatch.setattr(crawler, "parse_page_async", parse_page_async)
+    source = SimpleNamespace(
+        name="test", max_pages=3, concurrency=2, request_delay=0, headers={},
+        page_url=lambda page: f"http://test/?page={page}",
+    )
+
+    async def enrich(session, page_ads):
+        return page_ads
+
+    source.enrich = enrich
+    failed, pages = [], {}
+
+    async def on_page(page, page_ads):
+        pages[page] = page_ads
+
+    asyncio.run(
+        crawler.crawl_pages(None, source, on_page, on_failed=failed.append, cache=Cache(), parse_workers=1)
+    )
+
+    assert failed == [2]
+    assert pages == {1: ads("999"), 2: [], 3: ads("997")}
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.db import crud
+from app.db.models import Ad
+from tests.conftest import RecordingSession, compiled
+
+
+def ad_data(external_id):
+    return {
+        "source": "berkat.ru",
+        "external_id": external_id,
+        "title": f"Лада {external_id}",
+        "url": f"https://berkat.ru/board/{external_id}",
+    }
+
+
+def test_insert_new_ads_in_batches_with_on_conflict(monkeypatch):
+    monkeypatch.setattr(crud, "INSERT_BATCH_SIZE", 2)
+    inserted = Ad(id=1, source="berkat.ru", external_id="1001")
+    db = RecordingSession(returned=[inserted])
+
+    # 1002 встречается дважды — в INSERT попадает один раз
+    ads = [ad_data(external_id) for external_id in ("1001", "1002", "1003", "1002", "1004")]
+    new_ads = asyncio.run(crud.insert_new_ads(db, ads))
+
+    assert len(db.statements) == 2
+    first, second = (compiled(statement) for statement in db.statements)
+    assert "ON CONFLICT ON CONSTRAINT unique_ad_source_external DO NOTHING" in first
+    assert "RETURNING" in first
+    assert "'1001'" in first and "'1002'" in first and "'1003'" not in first
+    assert "'1003'" in second and "'1004'" in second and "'1002'" not in second
+    # Возвращаются только строки, которые вернул RETURNING
+    assert new_ads == [inserted, inserted]
+    assert db.committed
+
+
+def test_insert_new_ads_without_ads_does_nothing():
+    db = RecordingSession()
+    assert asyncio.run(crud.insert_new_ads(db, [])) == []
+    assert db.statements == []
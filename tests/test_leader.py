@@ -0,0 +1,102 @@
+import asyncio
+
+from app.tasks.leader import LeaderLock
+
+
+class FakePostgres:
+    """Одна advisory-блокировка: держит её соединение, пока не закрыто."""
+
+    def __init__(self):
+        self.holder = None
+
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+        self.db = engine.db
+
+    async def scalar(self, statement, params=None):
+        self._check()
+        if self.db.holder is None:
+            self.db.holder = self
+        return self.db.holder is self
+
+    async def execute(self, statement, params=None):
+        self._check()
+        if "pg_advisory_unlock" in str(statement) and self.db.holder is self:
+            self.db.holder = None
+
+    async def commit(self):
+        pass
+
+    async def invalidate(self):
+        # Postgres снимает сеансовую блокировку, когда соединение рвётся
+        if self.db.holder is self:
+            self.db.holder = None
+
+    async def close(self):
+        pass
+
+    def _check(self):
+        if self.engine.down:
+            raise ConnectionError("connection lost")
+
+
+class FakeEngine:
+    def __init__(self, db):
+        self.db = db
+        self.down = False
+
+    async def connect(self):
+        if self.down:
+            raise ConnectionError("connection refused")
+        return FakeConnection(self)
+
+
+def test_second_replica_takes_over_when_leader_connection_drops():
+    db = FakePostgres()
+    engines = {name: FakeEngine(db) for name in ("a", "b")}
+    locks = {name: LeaderLock("crawler", 1, engine=engine, check_interval=0.01) for name, engine in engines.items()}
+    running = set()
+    cancelled = []
+
+    def task_for(name):
+        async def task():
+            running.add(name)
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                running.discard(name)
+                cancelled.append(name)
+                raise
+
+        return task
+
+    async def wait_for(condition):
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("условие не выполнилось")
+
+    async def run():
+        replicas = [asyncio.create_task(locks[name].run(task_for(name))) for name in ("a", "b")]
+        try:
+            await wait_for(lambda: running)
+            leader = next(iter(running))
+            other = "b" if leader == "a" else "a"
+            await asyncio.sleep(0.05)
+            # Пока ведущая жива, вторая реплика задачу не запускает
+            assert running == {leader}
+
+            engines[leader].down = True
+            await wait_for(lambda: running == {other})
+            return leader, other
+        finally:
+            for replica in replicas:
+                replica.cancel()
+            await asyncio.gather(*replicas, return_exceptions=True)
+
+    leader, other = asyncio.run(run())
+    assert cancelled[0] == leader
+    assert not locks[leader].is_leader
@@ -0,0 +1,44 @@
+import random
+from types import SimpleNamespace
+
+from app.bot.messages import AdMessageCache
+from benchmarks.bench_message_render import legacy_render, random_ad
+
+
+def test_cached_render_matches_legacy_text():
+    rng = random.Random(17)
+    cache = AdMessageCache()
+    for ad_id in range(200):
+        ad = random_ad(rng, ad_id)
+        for filter_name in ("Лада до 300к", "Киа"):
+            assert cache.render(ad, filter_name) == legacy_render(ad, filter_name)
+
+
+def test_body_is_rendered_once_per_ad():
+    cache = AdMessageCache()
+    ad = SimpleNamespace(
+        id=1, title="Продаю Ладу", brand="Lada", model="Granta", year=2019,
+        price=450000, mileage=None, region="Назрань", url="https://berkat.ru/board/1",
+    )
+
+    first = cache.render(ad, "a")
+    second = cache.render(ad, "b")
+
+    assert first.endswith(cache.body(ad)) and second.endswith(cache.body(ad))
+    assert "450 000 ₽" in first
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 1}
+
+    cache.evict([1])
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_keeps_max_entries():
+    rng = random.Random(3)
+    cache = AdMessageCache(max_entries=2)
+    ads = [random_ad(rng, ad_id) for ad_id in range(3)]
+    for ad in ads:
+        cache.body(ad)
+
+    assert cache.stats()["entries"] == 2
+    cache.body(ads[0])
+    assert cache.stats()["misses"] == 4
@@ -0,0 +1,41 @@
+from app.db import migrate
+from app.db.migrate import pending_migrations, split_statements
+
+
+def test_split_statements_keeps_do_blocks_whole():
+    sql = """-- комментарий
+DO $$
+BEGIN
+    CREATE TYPE t AS ENUM ('a');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END
+$$;
+
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS x int;
+CREATE INDEX IF NOT EXISTS ix ON ads (x);
+"""
+    statements = split_statements(sql)
+    assert len(statements) == 3
+    assert statements[0].startswith("DO $$") and statements[0].endswith("$$")
+    assert statements[1] == "ALTER TABLE ads ADD COLUMN IF NOT EXISTS x int"
+
+
+def test_pending_migrations_are_ordered_and_skip_applied(tmp_path, monkeypatch):
+    for name in ("010_c.sql", "002_b.sql", "001_a.sql", "notes.txt"):
+        (tmp_path / name).write_text("SELECT 1;\n", encoding="utf-8")
+    monkeypatch.setattr(migrate, "MIGRATIONS_DIR", tmp_path)
+
+    assert [path.stem for path in pending_migrations(set())] == ["001_a", "002_b", "010_c"]
+    assert [path.stem for path in pending_migrations({"001_a", "010_c"})] == ["002_b"]
+
+
+def test_migration_files_are_numbered_and_parse():
+    paths = pending_migrations(set())
+    numbers = [path.stem.split("_", 1)[0] for path in paths]
+    assert all(number.isdigit() for number in numbers)
+    assert len(set(numbers)) == len(numbers)
+    for path in paths:
+        statements = split_statements(path.read_text(encoding="utf-8"))
+        assert statements and all(statement.strip() for statement in statements)
+        assert not any(statement.rstrip().endswith(";") for statement in statements)
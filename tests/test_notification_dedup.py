@@ -0,0 +1,38 @@
+import asyncio
+
+from app.db import crud
+from tests.conftest import RecordingSession, compiled
+
+
+def test_unsent_notifications_checked_in_batches(monkeypatch):
+    monkeypatch.setattr(crud, "INSERT_BATCH_SIZE", 2)
+    # База отвечает, что (1, 10, 100) уже отправлено
+    db = RecordingSession(returned=[(1, 10, 100)])
+
+    candidates = [(1, 10, 100), (2, 10, 100), (1, 10, 100), (3, 11, 101)]
+    unsent = asyncio.run(crud.get_unsent_notifications(db, candidates))
+
+    # Дубликат кандидата отброшен — три тройки, две пачки
+    assert len(db.statements) == 2
+    first = compiled(db.statements[0])
+    assert "VALUES" in first and "sent_notifications" in first
+    assert unsent == [(2, 10, 100), (3, 11, 101)]
+
+
+def test_mark_notifications_sent_inserts_batch_with_on_conflict():
+    db = RecordingSession()
+
+    asyncio.run(crud.mark_notifications_sent(db, [(1, 10, 100), (2, 10, 100), (1, 10, 100)]))
+
+    assert len(db.statements) == 1
+    statement = compiled(db.statements[0])
+    assert "ON CONFLICT ON CONSTRAINT unique_user_ad_filter DO NOTHING" in statement
+    assert statement.count("(1, 10, 100)") == 1 and "(2, 10, 100)" in statement
+    assert db.committed
+
+
+def test_empty_candidates_skip_the_database():
+    db = RecordingSession()
+    assert asyncio.run(crud.get_unsent_notifications(db, [])) == []
+    asyncio.run(crud.mark_notifications_sent(db, []))
+    assert db.statements == []
@@ -0,0 +1,161 @@
+import asyncio
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.bot import notifier
+from app.bot.notifier import Notification, NotificationDispatcher, TokenBucket
+
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    async def run():
+        loop = asyncio.get_running_loop()
+        bucket = TokenBucket(rate=50, capacity=5)
+        start = loop.time()
+        times = []
+        for _ in range(15):
+            await bucket.acquire()
+            times.append(loop.time() - start)
+        return times
+
+    times = asyncio.run(run())
+    # Запас из 5 токенов сразу, остальные 10 — по 50 в секунду
+    assert times[4] < 0.02
+    assert 0.18 <= times[-1] < 0.35
+
+
+def dispatcher(send, **kwargs):
+    params = dict(workers=4, rate=1000, chat_interval=0, max_retries=2)
+    params.update(kwargs)
+    return NotificationDispatcher(send=send, **params)
+
+
+async def submit_all(d, chat_ids, filter_names=None):
+    results = []
+    for i, chat_id in enumerate(chat_ids):
+        name = filter_names[i] if filter_names else "f"
+        results.append(await d.submit(Notification(chat_id, None, i, name)))
+    await d.join()
+    await d.stop()
+    return [result.result() for result in results]
+
+
+def test_chat_messages_keep_order_and_interval():
+    sent = []
+
+    async def send(telegram_id, ad, filter_name):
+        sent.append((telegram_id, filter_name, asyncio.get_running_loop().time()))
+
+    async def run():
+        d = dispatcher(send, chat_interval=0.05)
+        return await submit_all(d, [1, 1, 1, 2], ["a", "b", "c", "x"])
+
+    assert asyncio.run(run()) == [True] * 4
+    chat_1 = [(name, at) for chat_id, name, at in sent if chat_id == 1]
+    assert [name for name, _ in chat_1] == ["a", "b", "c"]
+    gaps = [b - a for (_, a), (_, b) in zip(chat_1, chat_1[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+    # Другой чат не ждёт интервала первого
+    assert [at for chat_id, _, at in sent if chat_id == 2][0] < chat_1[1][1]
+
+
+def flood(retry_after):
+    return TelegramRetryAfter(method=None, message="Too Many Requests", retry_after=retry_after)
+
+
+def test_retry_after_pauses_chat_and_retries():
+    attempts = []
+
+    async def send(telegram_id, ad, filter_name):
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise flood(0.1)
+
+    async def run():
+        d = dispatcher(send)
+        results = await submit_all(d, [1])
+        return results, d.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [True]
+    assert attempts[1] - attempts[0] >= 0.095
+    assert stats["retried"] == 1 and stats["sent"] == 1
+
+
+def test_retry_after_gives_up_after_max_retries():
+    async def send(telegram_id, ad, filter_name):
+        raise flood(0.01)
+
+    async def run():
+        d = dispatcher(send, max_retries=2)
+        results = await submit_all(d, [1])
+        return results, d.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [False]
+    assert stats["retried"] == 2 and stats["failed"] == 1
+
+
+def test_flood_in_several_chats_pauses_whole_bot():
+    sent = []
+    flooded = set()
+
+    async def send(telegram_id, ad, filter_name):
+        if telegram_id in (1, 2) and telegram_id not in flooded:
+            flooded.add(telegram_id)
+            raise flood(0.1)
+        sent.append((telegram_id, asyncio.get_running_loop().time()))
+
+    async def run():
+        d = dispatcher(send, workers=1)
+        start = asyncio.get_running_loop().time()
+        await submit_all(d, [1, 2, 3])
+        return start
+
+    start = asyncio.run(run())
+    # После флуда во втором чате пауза общая: чат 3 тоже ждёт
+    assert dict(sent)[3] - start >= 0.095
+
+
+def test_other_errors_fail_without_retry():
+    async def send(telegram_id, ad, filter_name):
+        raise RuntimeError("boom")
+
+    async def run():
+        d = dispatcher(send)
+        results = await submit_all(d, [1, 2])
+        return results, d.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [False, False]
+    assert stats["failed"] == 2 and stats["retried"] == 0 and stats["terminal"] == 0
+    assert stats["dead_chats"] == 0
+
+
+async def submit_all_running(d, chat_ids):
+    results = [await d.submit(Notification(chat_id, None, i, "f")) for i, chat_id in enumerate(chat_ids)]
+    await d.join()
+    return [result.result() for result in results]
+
+
+def test_past_chat_pauses_are_pruned(monkeypatch):
+    monkeypatch.setattr(notifier, "PRUNE_MIN_ENTRIES", 10)
+    flooded = set()
+
+    async def send(telegram_id, ad, filter_name):
+        if telegram_id % 10 == 0 and telegram_id not in flooded:
+            flooded.add(telegram_id)
+            raise flood(0.001)
+
+    async def run():
+        d = dispatcher(send, chat_interval=0.001)
+        for batch in range(5):
+            chat_ids = list(range(batch * 20, batch * 20 + 20))
+            assert await submit_all_running(d, chat_ids) == [True] * 20
+            await asyncio.sleep(0.01)
+        await d.stop()
+        return d
+
+    d = asyncio.run(run())
+    # 100 чатов, но в словарях только недавние
+    assert len(d._chat_ready_at) < 40
+    assert len(d._last_flood) < 10
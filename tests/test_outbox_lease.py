@@ -0,0 +1,186 @@
+import asyncio
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db import crud
+from app.db.models import Ad, Base, FilterSet, NotificationOutbox, User
+from app.tasks import outbox
+from app.tasks.outbox import OutboxWorker
+from tests.conftest import FakeSession, RecordingSession, compiled
+
+
+def outbox_row(row_id, attempts, user_id=1, ad_id=None):
+    return NotificationOutbox(
+        id=row_id,
+        user_id=user_id,
+        ad_id=ad_id or row_id,
+        filter_id=7,
+        filter_name="f",
+        digest=False,
+        attempts=attempts,
+    )
+
+
+def test_complete_requires_claim_token(monkeypatch):
+    sent = []
+
+    async def mark_notifications_sent(db, rows, commit=True):
+        sent.extend(rows)
+
+    monkeypatch.setattr(crud, "mark_notifications_sent", mark_notifications_sent)
+    db = RecordingSession(returned=[1])
+    rows = [outbox_row(1, attempts=2, ad_id=10), outbox_row(2, attempts=1, ad_id=20)]
+
+    assert asyncio.run(crud.complete_outbox_delivery(db, rows)) == 1
+
+    sql = compiled(db.statements[0])
+    assert "notification_outbox.status = 'sending'" in sql
+    assert "(notification_outbox.id, notification_outbox.attempts) IN ((1, 2), (2, 1))" in sql
+    # Строку 2 уже перехватил другой воркер — в sent_notifications её нет
+    assert sent == [(1, 10, 7)]
+
+
+def test_claim_takes_whole_users():
+    db = RecordingSession()
+    asyncio.run(crud.claim_outbox_batch(db, limit=10, lease_seconds=300))
+    sql = compiled(db.statements[0])
+    assert "GROUP BY notification_outbox.user_id" in sql
+    assert "OVER (ORDER BY anon_2.first_id)" in sql
+    assert "rows_before < 10" in sql
+    assert "LIMIT" not in sql
+
+
+TEST_DB_URL = os.environ.get("TEST_DB_URL")
+
+
+async def claim_in_postgres(schema: str):
+    engine = create_async_engine(TEST_DB_URL, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"CREATE SCHEMA {schema}"))
+            await conn.run_sync(Base.metadata.create_all)
+
+        session = async_sessionmaker(engine, expire_on_commit=False)
+        async with session() as db:
+            db.add_all(User(telegram_id=user_id) for user_id in (1, 2, 3))
+            db.add(Ad(id=1, source="test", external_id="1", url="https://example.com/1"))
+            await db.flush()
+            db.add_all(FilterSet(id=user_id, user_id=user_id, name="f", filters_json={}) for user_id in (1, 2, 3))
+            await db.flush()
+            # Строки пользователей вперемешку, у каждого по две
+            db.add_all(
+                NotificationOutbox(
+                    id=row_id,
+                    user_id=user_id,
+                    ad_id=1,
+                    filter_id=user_id,
+                    filter_name="f",
+                    digest=True,
+                    available_at=datetime(2000, 1, 1),
+                )
+                for row_id, user_id in enumerate([1, 2, 1, 3, 2, 3], start=1)
+            )
+            await db.commit()
+
+            first = await crud.claim_outbox_batch(db, limit=3, lease_seconds=300)
+            second = await crud.claim_outbox_batch(db, limit=3, lease_seconds=300)
+        return [(row.id, row.user_id) for row in first], [(row.id, row.user_id) for row in second]
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await engine.dispose()
+
+
+@pytest.mark.skipif(not TEST_DB_URL, reason="TEST_DB_URL не задан")
+def test_claim_does_not_split_a_users_rows_in_postgres():
+    first, second = asyncio.run(claim_in_postgres(f"test_outbox_{os.getpid()}"))
+    # Лимит 3 превышен, но строки пользователя 2 не делятся между пачками
+    assert first == [(1, 1), (2, 2), (3, 1), (5, 2)]
+    assert second == [(4, 3), (6, 3)]
+
+
+def test_release_and_renew_require_claim_token():
+    rows = [outbox_row(5, attempts=3)]
+
+    db = RecordingSession()
+    asyncio.run(crud.release_outbox_failures(db, rows, max_attempts=5, retry_delay=60))
+    sql = compiled(db.statements[0])
+    assert "notification_outbox.status = 'sending'" in sql
+    assert "IN ((5, 3))" in sql
+
+    db = RecordingSession(returned=[5])
+    assert asyncio.run(crud.renew_outbox_lease(db, rows, 300)) == 1
+    sql = compiled(db.statements[0])
+    assert "notification_outbox.status = 'sending'" in sql
+    assert "IN ((5, 3))" in sql
+
+
+class SlowDispatcher:
+    """Доставляет каждое уведомление через delay секунд."""
+
+    dead_chats = set()
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def forget_dead(self, chat_ids):
+        self.dead_chats.difference_update(chat_ids)
+
+    async def submit(self, notification):
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+        loop.call_later(self.delay, result.set_result, True)
+        return result
+
+
+def test_lease_is_renewed_while_batch_is_in_flight(monkeypatch):
+    calls = SimpleNamespace(renewed=[], completed=[], released=[])
+
+    async def get_ads_by_ids(db, ad_ids):
+        return {ad_id: SimpleNamespace(id=ad_id, photo_file_id=None) for ad_id in ad_ids}
+
+    async def renew_outbox_lease(db, rows, lease_seconds):
+        calls.renewed.append([row.id for row in rows])
+        return len(rows)
+
+    async def complete_outbox_delivery(db, rows):
+        calls.completed.extend(row.id for row in rows)
+
+    async def release_outbox_failures(db, rows, max_attempts, retry_delay):
+        calls.released.extend(row.id for row in rows)
+
+    async def noop(*args):
+        return None
+
+    monkeypatch.setattr(settings, "OUTBOX_LEASE", 0.06)
+    monkeypatch.setattr(outbox, "async_session", FakeSession)
+    monkeypatch.setattr(outbox, "get_ads_by_ids", get_ads_by_ids)
+    monkeypatch.setattr(outbox, "renew_outbox_lease", renew_outbox_lease)
+    monkeypatch.setattr(outbox, "complete_outbox_delivery", complete_outbox_delivery)
+    monkeypatch.setattr(outbox, "release_outbox_failures", release_outbox_failures)
+    monkeypatch.setattr(outbox, "save_photo_file_ids", noop)
+    monkeypatch.setattr(outbox, "deactivate_blocked_users", noop)
+    monkeypatch.setattr(outbox.photo_file_ids, "get", lambda ad: None)
+    monkeypatch.setattr(outbox.ad_messages, "evict", lambda ads: None)
+
+    async def deliver_and_wait():
+        worker = OutboxWorker(dispatcher=SlowDispatcher(delay=0.15))
+        await worker._deliver([outbox_row(1, attempts=1), outbox_row(2, attempts=1)])
+        renewed = len(calls.renewed)
+        await asyncio.sleep(0.1)
+        return renewed
+
+    renewed = asyncio.run(deliver_and_wait())
+
+    # Отправка шла дольше захвата (0.15 > 0.06) — захват продлевался
+    assert renewed >= 2
+    assert all(ids == [1, 2] for ids in calls.renewed)
+    # После записи итогов продление остановлено
+    assert len(calls.renewed) == renewed
+    assert calls.completed == [1, 2] and calls.released == []
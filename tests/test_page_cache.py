@@ -0,0 +1,77 @@
+import asyncio
+
+from app.parsers.crawler import fetch
+from app.parsers.page_cache import PageCache
+
+
+URL = "https://berkat.ru/avto?page=2"
+
+
+class Response:
+    def __init__(self, status, body="", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def text(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Отдаёт ответы по очереди и запоминает заголовки запросов."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers, timeout):
+        self.sent_headers.append(headers)
+        return self.responses.pop(0)
+
+
+def test_not_modified_page_is_served_from_cache():
+    cache = PageCache()
+    session = FakeSession(
+        Response(200, "<html>v1</html>", {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        Response(304),
+    )
+
+    first = asyncio.run(fetch(session, URL, cache=cache))
+    second = asyncio.run(fetch(session, URL, cache=cache))
+
+    assert first == second == "<html>v1</html>"
+    assert "If-None-Match" not in session.sent_headers[0]
+    assert session.sent_headers[1]["If-None-Match"] == '"abc"'
+    assert session.sent_headers[1]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_unchanged_page_reuses_parsed_ads():
+    cache = PageCache()
+    ads = [{"external_id": "1001"}]
+    cache.remember_response(URL, "<html>v1</html>", None, None)
+
+    assert cache.cached_ads(URL, "<html>v1</html>") is None
+    cache.store_ads(URL, "<html>v1</html>", ads)
+
+    assert cache.cached_ads(URL, "<html>v1</html>") is ads
+    # Без валидаторов условный запрос не отправляется, но разбор не повторяется
+    assert cache.conditional_headers(URL) == {}
+    assert cache.cached_ads(URL, "<html>v2</html>") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_cache_keeps_max_entries():
+    cache = PageCache(max_entries=2)
+    for page in range(3):
+        cache.store_ads(f"{URL}{page}", "<html></html>", [])
+
+    assert cache.stats()["entries"] == 2
+    assert cache.cached_ads(f"{URL}0", "<html></html>") is None
+    assert cache.cached_ads(f"{URL}2", "<html></html>") == []
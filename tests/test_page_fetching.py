@@ -0,0 +1,51 @@
+import asyncio
+
+from app.parsers import crawler
+from app.parsers.berkat_page import BerkatSource
+from app.parsers.crawler import HostThrottle
+
+
+def test_throttle_spaces_requests_to_one_host():
+    async def run():
+        loop = asyncio.get_running_loop()
+        throttle = HostThrottle(0.05)
+        start = loop.time()
+        times = {}
+        for url in ("https://a.test/1", "https://a.test/2", "https://b.test/1", "https://a.test/3"):
+            await throttle.wait(url)
+            times[url] = loop.time() - start
+        return times
+
+    times = asyncio.run(run())
+    assert times["https://a.test/2"] - times["https://a.test/1"] >= 0.045
+    assert times["https://a.test/3"] - times["https://a.test/2"] >= 0.045
+    # Другой хост паузу первого не ждёт
+    assert times["https://b.test/1"] - times["https://a.test/2"] < 0.03
+
+
+def test_pages_load_concurrently_and_keep_page_order(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fetch(session, url, *args):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        page = int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+        # Поздние страницы приходят раньше ранних
+        await asyncio.sleep(0.01 * (10 - page))
+        in_flight -= 1
+        return str(page)
+
+    async def parse_page_async(source, html, page):
+        return [{"external_id": html}]
+
+    monkeypatch.setattr(crawler, "fetch", fetch)
+    monkeypatch.setattr(crawler, "parse_page_async", parse_page_async)
+
+    ads = asyncio.run(
+        crawler.parse_pages(None, BerkatSource(), max_pages=8, concurrency=3, request_delay=0)
+    )
+
+    assert [ad["external_id"] for ad in ads] == [str(page) for page in range(1, 9)]
+    assert max_in_flight == 3
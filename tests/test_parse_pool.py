@@ -0,0 +1,53 @@
+import asyncio
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import settings
+from app.parsers import crawler
+from app.parsers.berkat_page import BerkatSource
+
+
+PAGE = """
+<html><body>
+<div class="board_list_item">
+  <h3 class="board_list_item_title"><a href="/content/200001">Продаю Ладу Гранту 2019</a></h3>
+  <span>450 000 руб.</span>
+</div>
+<div class="board_list_item">
+  <h3 class="board_list_item_title"><a href="/content/200002">Бампер на Приору</a></h3>
+</div>
+</body></html>
+"""
+
+
+def without_parsed_at(ads):
+    return [{key: value for key, value in ad.items() if key != "parsed_at"} for ad in ads]
+
+
+def test_pool_parses_like_inline(monkeypatch):
+    monkeypatch.setattr(settings, "PARSER_WORKERS", 1)
+    try:
+        ads = asyncio.run(crawler.parse_page_async(BerkatSource(), PAGE, 1))
+    finally:
+        crawler.shutdown_parse_pool()
+
+    inline_ads, blocks_count = BerkatSource().parse_page(PAGE)
+    assert blocks_count == 2
+    assert without_parsed_at(ads) == without_parsed_at(inline_ads)
+    assert [ad["external_id"] for ad in ads] == ["200001"]
+
+
+class BrokenPool(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+def test_broken_pool_is_recreated_once(monkeypatch):
+    # После пересоздания PARSER_WORKERS = 0 — повтор идёт в пул потоков loop
+    monkeypatch.setattr(settings, "PARSER_WORKERS", 0)
+    monkeypatch.setattr(crawler, "_parse_pool", BrokenPool())
+
+    ads = asyncio.run(crawler.parse_page_async(BerkatSource(), PAGE, 1))
+
+    assert [ad["external_id"] for ad in ads] == ["200001"]
+    assert crawler._parse_pool is None
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+from app.parsers.berkat_page import PARSER_BACKENDS, parse_page
+
+
+# Сокращённая страница выдачи berkat.ru/avto: разметка карточек как на сайте,
+# тексты, номера и фото объявлений заменены
+PAGE = (Path(__file__).parent / "fixtures" / "berkat_avto_page.html").read_text(encoding="utf-8")
+
+
+def parsed(backend):
+    page_ads, blocks_count = parse_page(PAGE, backend)
+    # parsed_at — время разбора, у каждого вызова своё
+    return [{key: value for key, value in ad.items() if key != "parsed_at"} for ad in page_ads], blocks_count
+
+
+@pytest.mark.parametrize("backend", [backend for backend in PARSER_BACKENDS if backend != "bs4"])
+def test_backend_matches_full_soup(backend):
+    assert parsed(backend) == parsed("bs4")
+
+
+def test_listing_page_fields():
+    page_ads, blocks_count = parsed("bs4")
+    by_id = {ad["external_id"]: ad for ad in page_ads}
+
+    # Запчасти, эвакуатор и объявление без марки отброшены
+    assert blocks_count == 10
+    assert list(by_id) == ["4812035", "4811977", "4811932", "4811904", "4811888", "4811833", "4811795"]
+
+    camry = by_id["4811977"]
+    assert camry["title"] == "Тойота Камри 2018"
+    assert camry["canonical_brand"] == "toyota"
+    assert camry["price"] == 2150000
+    assert camry["region"] == "Магас"
+    assert camry["photo_url"] == "https://berkat.ru/uploads/2024/05/4811977_1_small.jpg"
+
+    # Карточка без заголовка h3 и без фото
+    rio = by_id["4811932"]
+    assert rio["url"] == "https://berkat.ru/content/4811932"
+    assert rio["price"] == 780000
+    assert rio["photo_url"] is None
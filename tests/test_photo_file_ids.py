@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+
+from app.bot import telegram_bot
+from app.bot.telegram_bot import PhotoFileIdCache
+
+
+def test_photo_is_uploaded_once_for_concurrent_senders(monkeypatch):
+    cache = PhotoFileIdCache()
+    uploads = []
+    sent = []
+
+    async def send_photo(chat_id, photo, caption, parse_mode):
+        if photo.startswith("http"):
+            uploads.append(chat_id)
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(photo=[SimpleNamespace(file_id="file-1")])
+        sent.append((chat_id, photo))
+
+    monkeypatch.setattr(telegram_bot, "photo_file_ids", cache)
+    monkeypatch.setattr(telegram_bot, "bot", SimpleNamespace(send_photo=send_photo))
+    ad = SimpleNamespace(id=1, photo_url="http://example.com/1.jpg", photo_file_id=None)
+
+    async def run():
+        first = [asyncio.create_task(telegram_bot._send_photo(chat_id, ad, "")) for chat_id in (1, 2)]
+        # Первый загружает, второй ждёт; третий приходит, когда загрузка
+        # закончилась, но второй ещё не успел взять блокировку
+        await asyncio.sleep(0.011)
+        late = asyncio.create_task(telegram_bot._send_photo(3, ad, ""))
+        await asyncio.gather(*first, late)
+
+    asyncio.run(run())
+
+    assert uploads == [1]
+    assert sorted(sent) == [(2, "file-1"), (3, "file-1")]
+    assert cache._locks == {} and cache._lock_users == {}
+
+
+def test_lock_is_kept_while_someone_waits():
+    cache = PhotoFileIdCache()
+
+    async def run():
+        lock = cache.upload_lock(7)
+        await lock.acquire()
+        waiter = cache.upload_lock(7)
+        assert waiter is lock
+
+        lock.release()
+        cache.release_lock(7)
+        # Второй ещё не взял блокировку, но она та же
+        assert cache.upload_lock(7) is lock
+        cache.release_lock(7)
+        cache.release_lock(7)
+        assert 7 not in cache._locks
+
+    asyncio.run(run())
+
+
+def rejecting_bot(error_message, uploads):
+    async def send_photo(chat_id, photo, caption, parse_mode):
+        if photo.startswith("http"):
+            uploads.append(chat_id)
+            return SimpleNamespace(photo=[SimpleNamespace(file_id="file-2")])
+        raise TelegramBadRequest(method=None, message=error_message)
+
+    return SimpleNamespace(send_photo=send_photo)
+
+
+@pytest.mark.parametrize(
+    "error_message",
+    ["Bad Request: chat not found", "Bad Request: message caption is too long"],
+)
+def test_other_bad_requests_keep_the_cached_file_id(monkeypatch, error_message):
+    cache = PhotoFileIdCache()
+    cache.remember(1, "file-1")
+    uploads = []
+    monkeypatch.setattr(telegram_bot, "photo_file_ids", cache)
+    monkeypatch.setattr(telegram_bot, "bot", rejecting_bot(error_message, uploads))
+    ad = SimpleNamespace(id=1, photo_url="http://example.com/1.jpg", photo_file_id=None)
+
+    with pytest.raises(TelegramBadRequest):
+        asyncio.run(telegram_bot._send_photo(5, ad, ""))
+
+    assert cache.get(ad) == "file-1"
+    assert uploads == []
+
+
+def test_rejected_file_id_is_replaced_by_upload(monkeypatch):
+    cache = PhotoFileIdCache()
+    cache.remember(1, "file-1")
+    uploads = []
+    monkeypatch.setattr(telegram_bot, "photo_file_ids", cache)
+    monkeypatch.setattr(
+        telegram_bot, "bot", rejecting_bot("Bad Request: wrong file identifier/HTTP URL specified", uploads)
+    )
+    ad = SimpleNamespace(id=1, photo_url="http://example.com/1.jpg", photo_file_id=None)
+
+    asyncio.run(telegram_bot._send_photo(5, ad, ""))
+
+    assert uploads == [5]
+    assert cache.get(ad) == "file-2"
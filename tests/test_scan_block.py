@@ -0,0 +1,46 @@
+from bs4 import BeautifulSoup
+
+from app.parsers.berkat_page import parse_ad_block, scan_block
+
+
+BLOCK = """
+<div class="board_list_item">
+  <a href="/content/654321"><img data-src="/images/lazy.jpg"></a>
+  <a name="top">#</a>
+  <h3 class="board_list_item_title"><a href="/content/123456">Продаю Киа Рио 2015</a></h3>
+  <img src="/images/123456.jpg">
+  <div class="price"><span>350 000 руб.</span></div>
+  <div class="info">Пробег: 120 тыс. км</div>
+  <div class="region"><b>Назрань</b></div>
+</div>
+"""
+
+
+def block():
+    return BeautifulSoup(BLOCK, "lxml").select_one("div.board_list_item")
+
+
+def test_scan_block_finds_the_same_tags_as_find():
+    card = block()
+    found = scan_block(card)
+
+    title_h3 = card.find("h3", class_="board_list_item_title")
+    assert found["title_h3"] is title_h3
+    assert found["title_link"] is title_h3.find("a", href=True)
+    assert found["content_link"] is card.find("a", href=lambda href: href and "/content/" in href)
+    assert found["any_link"] is card.find("a", href=True)
+    assert found["first_a"] is card.find("a")
+    assert found["img"] is card.find("img", src=True)
+
+
+def test_parse_ad_block_reads_fields_from_one_scan():
+    ad = parse_ad_block(block())
+
+    assert ad["external_id"] == "123456"
+    assert ad["url"] == "https://berkat.ru/content/123456"
+    assert ad["title"] == "Продаю Киа Рио 2015"
+    assert ad["brand"] == "Киа" and ad["year"] == 2015
+    assert ad["price"] == 350000
+    assert ad["mileage"] == 120000
+    assert ad["region"] == "Назрань"
+    assert ad["photo_url"] == "https://berkat.ru/images/123456.jpg"
@@ -0,0 +1,83 @@
+import asyncio
+import pickle
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.db.crud import get_ads_by_filters
+from app.parsers import berkat_parser, crawler, sources
+from app.parsers.base import AdSource
+from app.parsers.berkat_page import BerkatSource
+from app.tasks.outbox import outbox_worker
+
+
+def test_source_must_implement_page_url_and_parse_page():
+    class Incomplete(AdSource):
+        name = "incomplete"
+
+        def page_url(self, page: int) -> str:
+            return f"https://example.com/?page={page}"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_berkat_source_survives_pickle():
+    # parse_page выполняется в пуле процессов
+    source = pickle.loads(pickle.dumps(BerkatSource(max_pages=3)))
+    assert source.name == "berkat.ru"
+    assert source.max_pages == 3
+    assert source.page_url(2).startswith(source.base_url)
+
+
+def test_registry_rejects_duplicates_and_skips_unknown_names(monkeypatch):
+    monkeypatch.setattr(sources, "SOURCES", {})
+    berkat = sources.register_source(BerkatSource())
+    with pytest.raises(ValueError):
+        sources.register_source(BerkatSource())
+
+    monkeypatch.setattr(settings, "PARSER_SOURCES", "unknown.ru, berkat.ru,")
+    assert sources.enabled_sources() == [berkat]
+
+
+def test_ads_default_to_berkat_source():
+    statements = []
+
+    class Session:
+        async def execute(self, statement):
+            statements.append(statement)
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    asyncio.run(get_ads_by_filters(Session()))
+    sql = str(statements[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "ads.source = 'berkat.ru'" in sql
+
+
+def test_berkat_wrapper_crawls_berkat_and_delivers(monkeypatch):
+    crawled = []
+    drained = []
+
+    async def crawl_source(source):
+        crawled.append(source.name)
+        return 2
+
+    async def drain():
+        drained.append(True)
+        return 0
+
+    async def stop():
+        pass
+
+    monkeypatch.setattr(crawler, "crawl_source", crawl_source)
+    monkeypatch.setattr(berkat_parser, "crawl_source", crawl_source)
+    monkeypatch.setattr(outbox_worker, "drain", drain)
+    monkeypatch.setattr(crawler.notification_dispatcher, "stop", stop)
+    monkeypatch.setattr(sources, "SOURCES", {"berkat.ru": BerkatSource(), "other.ru": BerkatSource()})
+    monkeypatch.setattr(berkat_parser, "SOURCES", sources.SOURCES)
+
+    assert asyncio.run(berkat_parser.berkat_parse_task_async()) == 2
+    assert asyncio.run(crawler.run_once([sources.SOURCES["berkat.ru"]])) == 2
+    assert crawled == ["berkat.ru", "berkat.ru"]
+    assert len(drained) == 2
@@ -0,0 +1,77 @@
+"""Сверка match_ads_to_filters (SQL) с FilterIndex на одних и тех же данных.
+
+Нужен Postgres: TEST_DB_URL=postgresql+psycopg://... Тест работает во
+временной схеме и удаляет её за собой.
+"""
+import asyncio
+import os
+import random
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.crud import filter_canonical_brand, match_ads_to_filters
+from app.db.models import Ad, Base, FilterSet, User
+from app.parsers.matching import FilterIndex
+from tests.matching_cases import random_ads, random_filter_sets
+
+
+TEST_DB_URL = os.environ.get("TEST_DB_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DB_URL, reason="TEST_DB_URL не задан")
+
+
+async def compare(schema: str) -> None:
+    engine = create_async_engine(TEST_DB_URL, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"CREATE SCHEMA {schema}"))
+            await conn.run_sync(Base.metadata.create_all)
+            lc_ctype = await conn.scalar(text("SHOW lc_ctype"))
+        if lc_ctype in ("C", "POSIX"):
+            pytest.xfail("lower() с LC_CTYPE=C не приводит кириллицу, регионы в разном регистре не совпадут")
+
+        rng = random.Random(11)
+        filter_sets = random_filter_sets(rng, 300)
+        ads = random_ads(rng, 200)
+
+        session = async_sessionmaker(engine, expire_on_commit=False)
+        async with session() as db:
+            db.add_all(User(telegram_id=fs.user_id) for fs in filter_sets)
+            await db.flush()
+            db.add_all(
+                FilterSet(
+                    id=fs.id,
+                    user_id=fs.user_id,
+                    name=fs.name,
+                    filters_json=fs.filters_json,
+                    canonical_brand=filter_canonical_brand(fs.filters_json),
+                )
+                for fs in filter_sets
+            )
+            db.add_all(
+                Ad(id=i, source="test", external_id=str(i), url=f"https://example.com/{i}", **ad)
+                for i, ad in enumerate(ads, start=1)
+            )
+            await db.commit()
+
+            rows = await match_ads_to_filters(db, range(1, len(ads) + 1))
+
+        in_sql = {(row["ad_id"], row["filter_id"]) for row in rows}
+        index = FilterIndex(filter_sets)
+        in_python = {
+            (ad_id, filter_id)
+            for ad_id, ad in enumerate(ads, start=1)
+            for filter_id in index.match(ad)
+        }
+        assert in_python, "на тестовых данных ничего не совпало"
+        assert in_sql == in_python
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await engine.dispose()
+
+
+def test_sql_matching_agrees_with_filter_index():
+    asyncio.run(compare(f"test_matching_{os.getpid()}"))
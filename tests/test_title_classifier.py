@@ -0,0 +1,24 @@
+import random
+
+from app.parsers.title_classifier import classify_title
+from benchmarks.bench_title_classifier import legacy_classify, new_classify, random_title
+
+
+def test_classify_title_matches_legacy_loops():
+    rng = random.Random(7)
+    for _ in range(2000):
+        title = random_title(rng)
+        assert new_classify(title) == legacy_classify(title), title
+
+
+def test_earlier_listed_brand_wins_and_model_follows_first_occurrence():
+    # «лада» стоит в KNOWN_BRANDS раньше «ваз», хотя в заголовке она дальше
+    title = "ваз 2107 лада седан"
+    classification = classify_title(title)
+    assert classification.brand == "лада"
+    assert title[classification.brand_end:].strip() == "седан"
+
+
+def test_non_car_title_is_rejected():
+    assert classify_title("продаю бампер на гранту").is_non_car
+    assert classify_title("киа рио 2015").is_non_car is False
@@ -0,0 +1,73 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.bot.webhook import create_webhook_app
+from app.core.config import settings
+
+
+def update(update_id):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": "привет",
+        },
+    }
+
+
+def test_updates_are_acknowledged_at_once_and_handled_with_a_limit(monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "WEBHOOK_PATH", "/webhook")
+    monkeypatch.setattr(settings, "WEBHOOK_SECRET", "s3cret")
+
+    running = 0
+    peak = 0
+    handled = []
+
+    async def run():
+        nonlocal running, peak
+        release = asyncio.Event()
+        dp = Dispatcher()
+
+        @dp.message()
+        async def on_message(message):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await release.wait()
+            running -= 1
+            handled.append(message.message_id)
+
+        bot = Bot("123456:test")
+        client = TestClient(TestServer(create_webhook_app(dp, bot)))
+        await client.start_server()
+        try:
+            headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+            # Ответы приходят, хотя ни один обработчик ещё не завершился
+            responses = await asyncio.gather(
+                *(client.post("/webhook", json=update(i), headers=headers) for i in range(5))
+            )
+            assert [response.status for response in responses] == [200] * 5
+
+            wrong = await client.post("/webhook", json=update(99), headers={"X-Telegram-Bot-Api-Secret-Token": "x"})
+            assert wrong.status == 401
+
+            await asyncio.sleep(0.05)
+            assert running == 2
+            release.set()
+            for _ in range(100):
+                if len(handled) == 5:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await client.close()
+            await bot.session.close()
+
+    asyncio.run(run())
+    assert peak == 2
+    assert sorted(handled) == [0, 1, 2, 3, 4]